@@ -30,3 +30,17 @@ Agent Name	Role	Description	Input	Output
 🌐 Translation Agent	Multi-language support	Translates tenders/responses into required languages (e.g., English ↔ French, Arabic)	Tender text	Translated versions
 🔗 Salesforce Connector Agent	Sync with CRM	Creates/updates Tender__c and related records, attaches generated files	All agent outputs	Salesforce records updated
 🌍 Business Impact (Nalya) Agent	Impact projection	Predicts business outcomes: “Will we win?”, “Which region benefits?”, “Revenue forecast”	Tender summary + pricing data + history	Region impact map, probability of new business
+
+⚙️ Runtime Components
+Component	Module	Role
+Shared model runtime	common.py	Anthropic transport, rate-limited scheduler (request/token budgets, retries, circuit breaker), NDJSON parsing and Tracer used by the SAP converter and the hub agents alike
+Agent DAG executor	tender_dag.py	Runs agents as soon as their inputs exist (inputs/outputs per agent in TENDER_AGENT_IO), in parallel on up to DAG_WORKERS threads, with per-agent timeouts and fallback outputs; wall-clock time follows the critical path
+Streaming tender extraction	tender_extract.py	Tender Understanding Agent reads the document page by page (mmap for text, lazy pages for PDF/Word/Excel), emits header fields first and line items in batches; parsed pages are cached by content hash so a corrigendum re-parses only changed pages
+Catalog matching index	catalog_index.py	Product & Molecule Matching Agent scores a whole tender against a prebuilt, memory-mapped index of the product master (INN normalisation, strength/formulation/pack inverted index, trigram fuzzy match)
+Pricing elasticity engine	pricing_engine.py	Pricing Optimization Agent fits win-probability curves per molecule/region over columnar NumPy bid history (shrunk towards molecule and global curves), simulates competitor prices per group and prices every line of one or many tenders in a single vectorised pass
+Salesforce delta sync	sf_sync.py	Salesforce Connector Agent hashes Tender__c / Tender_Line_Item__c records against the last synced state and upserts only changes through composite batches over pooled connections; attachments upload concurrently; MockSalesforce serves the same endpoints locally
+Translation memory	translation_memory.py	Translation Agent reuses exact and number-only near matches from a persistent SQLite translation memory (LRU-evicted) and sends only new, deduplicated segments to the model in token-budgeted parallel batches
+RFP retrieval index	rfp_retrieval.py	RFP Question Assistant indexes each tender once (BM25 in SQLite, optional local embeddings fused by rank), retrieves top-k passages per question and caches answers per normalised question and index fingerprint
+Document rendering	doc_render.py	Document Generator Agent compiles templates once, streams sections and row blocks through a content-keyed fragment cache (a price change re-renders only the fragments that read it) and renders language/team variants in a process pool
+Portal-feed intake queue	tender_intake.py	Durable SQLite work queue in front of the orchestrator: content-hash and tender-ID dedup (corrigenda supersede waiting jobs), earliest-deadline-first claiming with leases, bounded workers, blocking back-pressure on submit, and throughput / queue-lag / per-stage latency metrics
+Feature store	feature_store.py	Competitor Analysis, Risk & Compliance and Business Impact agents read pre-aggregated win/loss, pricing and value features per molecule, region, authority and competitor from one store, refreshed incrementally from a watermark and served from an in-process NumPy column cache
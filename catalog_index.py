@@ -0,0 +1,316 @@
+"""Prebuilt matching index for the Product & Molecule Matching Agent.
+
+Product master rows are normalised once (INN molecule names, canonical
+strengths, formulations and pack sizes) into inverted indexes, plus a
+character-trigram index over molecule names for misspellings and
+synonyms that are not in ``INN_SYNONYMS``.  A whole tender is then scored
+in one pass: lines are grouped by their normalised key so each distinct
+drug is resolved once, however many times it appears::
+
+    from catalog_index import CatalogIndex
+
+    CatalogIndex.build(product_master).save("catalog.idx")
+    index = CatalogIndex.load("catalog.idx")      # memory-mapped
+    matches = index.match_lines(tender["items"], top_k=3)
+
+The saved index is a directory of flat ``uint32`` arrays and a JSON
+vocabulary; ``load`` memory-maps the arrays, so start-up does not
+depend on catalogue size and several worker processes share one copy
+through the page cache.
+"""
+
+import array
+import heapq
+import json
+import mmap
+import os
+import re
+import sys
+import unicodedata
+
+from tender_extract import FORMULATIONS, STRENGTH_PATTERN
+
+INDEX_VERSION = 2
+FUZZY_MIN_SIMILARITY = 0.5
+FUZZY_MAX_CANDIDATES = 5
+WEIGHTS = {"molecule": 0.6, "strength": 0.25, "formulation": 0.1, "pack": 0.05}
+
+INN_SYNONYMS = {
+    "acetaminophen": "paracetamol",
+    "albuterol": "salbutamol",
+    "epinephrine": "adrenaline",
+    "norepinephrine": "noradrenaline",
+    "frusemide": "furosemide",
+    "lignocaine": "lidocaine",
+    "cyclosporine": "ciclosporin",
+    "amoxycillin": "amoxicillin",
+    "glibenclamide": "glyburide",
+    "rifampin": "rifampicin",
+    "isoproterenol": "isoprenaline",
+    "meperidine": "pethidine",
+    "acetylsalicylic acid": "aspirin",
+    "co-trimoxazole": "sulfamethoxazole trimethoprim",
+}
+SALT_WORDS = {"hydrochloride", "hcl", "sodium", "potassium", "calcium", "sulfate", "sulphate", "phosphate",
+              "maleate", "mesylate", "besylate", "citrate", "acetate", "tartrate", "succinate", "fumarate",
+              "bromide", "chloride", "monohydrate", "dihydrate", "trihydrate", "anhydrous", "disodium", "usp", "bp"}
+FORMULATION_ALIASES = {"tab": "tablet", "tabs": "tablet", "tablets": "tablet", "cap": "capsule", "caps": "capsule",
+                       "capsules": "capsule", "inj": "injection", "amp": "ampoule", "ampoules": "ampoule",
+                       "susp": "suspension", "soln": "solution", "oint": "ointment", "vials": "vial", "syr": "syrup"}
+UNIT_SCALE = {"g": ("mg", 1000.0), "mg": ("mg", 1.0), "mcg": ("mg", 0.001), "µg": ("mg", 0.001),
+              "iu": ("iu", 1.0), "ml": ("ml", 1.0), "%": ("%", 1.0)}
+PACK_PATTERN = re.compile(r"\b(\d+)\s*[x×]\s*(\d+)\b|\bpack of (\d+)\b", re.IGNORECASE)
+
+
+class CatalogIndexError(Exception):
+    """Raised when a saved catalogue index cannot be loaded."""
+
+
+def normalize_molecule(name):
+    """Canonical INN form: lowercase ASCII, salts dropped, synonyms mapped."""
+    text = unicodedata.normalize("NFKD", name or "").encode("ascii", "ignore").decode().lower()
+    text = re.sub(r"[^a-z0-9+\- ]+", " ", text)
+    text = re.split(r"(?<=\S)\s+\d", text.strip(), maxsplit=1)[0]
+    words = [word for word in text.split() if word not in SALT_WORDS]
+    text = " ".join(words)
+    if text in INN_SYNONYMS:
+        return INN_SYNONYMS[text]
+    return " ".join(INN_SYNONYMS.get(word, word) for word in words)
+
+
+def normalize_strength(text):
+    """Canonical strength such as ``500mg`` or ``100iu/ml``; ``None`` if absent."""
+    match = STRENGTH_PATTERN.search(text or "")
+    if not match:
+        return None
+    parts = re.findall(r"(\d*(?:\.\d+)?)\s*(mg|g|mcg|µg|ml|iu|%|dose|actuation)", match.group(1).lower())
+    canonical = []
+    for amount, unit in parts:
+        unit, scale = UNIT_SCALE.get(unit, (unit, 1.0))
+        value = float(amount or 1) * scale
+        canonical.append(f"{value:g}{unit}")
+    return "/".join(canonical) or None
+
+
+def normalize_formulation(text):
+    words = re.findall(r"[a-z]+", (text or "").lower())
+    for word in words:
+        word = FORMULATION_ALIASES.get(word, word)
+        if word in FORMULATIONS:
+            return word
+    return None
+
+
+def normalize_pack(text):
+    match = PACK_PATTERN.search(text or "")
+    if not match:
+        return None
+    if match.group(3):
+        return match.group(3)
+    return str(int(match.group(1)) * int(match.group(2)))
+
+
+def trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def product_key(row):
+    """Normalised ``(molecule, strength, formulation, pack)`` for a master or tender row."""
+    description = " ".join(str(row.get(field) or "") for field in ("name", "description", "strength", "formulation",
+                                                                     "pack", "packSize"))
+    return (
+        normalize_molecule(row.get("molecule") or row.get("inn") or row.get("name") or row.get("description")),
+        normalize_strength(row.get("strength") or description),
+        normalize_formulation(row.get("formulation") or description),
+        normalize_pack(str(row.get("pack") or row.get("packSize") or description)),
+    )
+
+
+def _flatten(lists):
+    offsets, postings = array.array("I", [0]), array.array("I")
+    for items in lists:
+        postings.extend(items)
+        offsets.append(len(postings))
+    return offsets, postings
+
+
+class CatalogIndex:
+    """Inverted indexes over a product master, built in memory or memory-mapped from disk.
+
+    Term ids index into ``offsets``/``postings``: molecule terms map to
+    SKU ids, attribute terms (``s:``, ``f:``, ``p:`` prefixes) map to SKU
+    ids, and trigram terms map to molecule ids.
+    """
+
+    def __init__(self, vocabulary, offsets, postings, trigram_counts, record_offsets, records, mapped=()):
+        self.molecules = vocabulary["molecules"]
+        self.molecule_ids = {name: i for i, name in enumerate(self.molecules)}
+        self.attributes = {name: i + len(self.molecules) for i, name in enumerate(vocabulary["attributes"])}
+        base = len(self.molecules) + len(vocabulary["attributes"])
+        self.trigram_ids = {name: i + base for i, name in enumerate(vocabulary["trigrams"])}
+        self.offsets = offsets
+        self.postings = postings
+        self.trigram_counts = trigram_counts
+        self.record_offsets = record_offsets
+        self.records = records
+        self._mapped = mapped
+
+    def __len__(self):
+        return len(self.record_offsets) - 1
+
+    @classmethod
+    def build(cls, products):
+        """Index an iterable of product master dicts (``sku``, ``name``/``molecule``, ...)."""
+        molecules, attributes, trigram_sets = {}, {}, {}
+        blob, record_offsets = bytearray(), array.array("I", [0])
+        for sku_id, row in enumerate(products):
+            molecule, strength, formulation, pack = product_key(row)
+            molecules.setdefault(molecule, []).append(sku_id)
+            for key in (f"s:{strength}" if strength else None, f"f:{formulation}" if formulation else None,
+                        f"p:{pack}" if pack else None):
+                if key:
+                    attributes.setdefault(key, []).append(sku_id)
+            record = {"row": row, "normalized": {"molecule": molecule, "strength": strength,
+                                                 "formulation": formulation, "pack": pack}}
+            blob += json.dumps(record, separators=(",", ":"), default=str).encode()
+            record_offsets.append(len(blob))
+
+        molecule_names = list(molecules)
+        for molecule_id, name in enumerate(molecule_names):
+            for gram in trigrams(name):
+                trigram_sets.setdefault(gram, []).append(molecule_id)
+        trigram_counts = array.array("I", (len(trigrams(name)) for name in molecule_names))
+        attribute_names = list(attributes)
+        offsets, postings = _flatten([molecules[name] for name in molecule_names]
+                                     + [attributes[name] for name in attribute_names]
+                                     + list(trigram_sets.values()))
+        vocabulary = {"molecules": molecule_names, "attributes": attribute_names, "trigrams": list(trigram_sets)}
+        return cls(vocabulary, offsets, postings, trigram_counts, record_offsets, bytes(blob))
+
+    def save(self, directory):
+        """Write the index as flat little-endian arrays plus a JSON vocabulary."""
+        os.makedirs(directory, exist_ok=True)
+        base = len(self.molecules) + len(self.attributes)
+        vocabulary = {
+            "version": INDEX_VERSION,
+            "molecules": self.molecules,
+            "attributes": sorted(self.attributes, key=self.attributes.get),
+            "trigrams": sorted(self.trigram_ids, key=self.trigram_ids.get),
+            "base": base,
+        }
+        for name, values in (("offsets", self.offsets), ("postings", self.postings),
+                             ("trigram_counts", self.trigram_counts), ("record_offsets", self.record_offsets)):
+            data = array.array("I", values)
+            if sys.byteorder != "little":
+                data.byteswap()
+            with open(os.path.join(directory, f"{name}.u32"), "wb") as handle:
+                handle.write(data.tobytes())
+        with open(os.path.join(directory, "records.jsonb"), "wb") as handle:
+            handle.write(self.records)
+        with open(os.path.join(directory, "vocabulary.json"), "w", encoding="utf-8") as handle:
+            json.dump(vocabulary, handle)
+
+    @classmethod
+    def load(cls, directory):
+        """Memory-map an index written by ``save``."""
+        with open(os.path.join(directory, "vocabulary.json"), encoding="utf-8") as handle:
+            vocabulary = json.load(handle)
+        if vocabulary.get("version") != INDEX_VERSION:
+            raise CatalogIndexError(f"{directory}: index version {vocabulary.get('version')}, expected {INDEX_VERSION}")
+        if sys.byteorder != "little":
+            raise CatalogIndexError("memory-mapped indexes need a little-endian host")
+        maps, views = [], {}
+        for name in ("offsets", "postings", "trigram_counts", "record_offsets", "records"):
+            path = os.path.join(directory, "records.jsonb" if name == "records" else f"{name}.u32")
+            with open(path, "rb") as handle:
+                if os.fstat(handle.fileno()).st_size == 0:
+                    views[name] = memoryview(b"").cast("I") if name != "records" else b""
+                    continue
+                view = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+            maps.append(view)
+            views[name] = view if name == "records" else memoryview(view).cast("I")
+        return cls(vocabulary, views["offsets"], views["postings"], views["trigram_counts"],
+                   views["record_offsets"], views["records"], tuple(maps))
+
+    def _postings(self, term_id):
+        return self.postings[self.offsets[term_id]:self.offsets[term_id + 1]]
+
+    def record(self, sku_id):
+        return json.loads(bytes(self.records[self.record_offsets[sku_id]:self.record_offsets[sku_id + 1]]))
+
+    def molecule_candidates(self, molecule):
+        """``[(molecule_id, similarity, kind)]`` for a normalised molecule name."""
+        if molecule in self.molecule_ids:
+            return [(self.molecule_ids[molecule], 1.0, "exact")]
+        grams = trigrams(molecule)
+        overlap = {}
+        for gram in grams:
+            term_id = self.trigram_ids.get(gram)
+            if term_id is not None:
+                for molecule_id in self._postings(term_id):
+                    overlap[molecule_id] = overlap.get(molecule_id, 0) + 1
+        scored = ((2 * shared / (len(grams) + self.trigram_counts[molecule_id]), molecule_id)
+                  for molecule_id, shared in overlap.items())
+        best = heapq.nlargest(FUZZY_MAX_CANDIDATES, scored)
+        return [(molecule_id, similarity, "fuzzy") for similarity, molecule_id in best
+                if similarity >= FUZZY_MIN_SIMILARITY]
+
+    def match_lines(self, lines, top_k=3):
+        """Score every tender line against the catalogue in one pass.
+
+        Returns one list of up to ``top_k`` matches per input line, each the
+        product master row as given to ``build`` plus ``score``, ``match``
+        (``exact``/``fuzzy``) and ``normalized`` (the key it was matched on).
+        Lines sharing a normalised key are scored once.
+        """
+        keys = [product_key(line) for line in lines]
+        attribute_sets, molecule_cache, scored = {}, {}, {}
+
+        def attribute_set(key):
+            if key not in attribute_sets:
+                term_id = self.attributes.get(key)
+                attribute_sets[key] = set(self._postings(term_id)) if term_id is not None else set()
+            return attribute_sets[key]
+
+        for key in set(keys):
+            molecule, strength, formulation, pack = key
+            if molecule not in molecule_cache:
+                molecule_cache[molecule] = self.molecule_candidates(molecule) if molecule else []
+            wanted = [(WEIGHTS["strength"], attribute_set(f"s:{strength}")) if strength else None,
+                      (WEIGHTS["formulation"], attribute_set(f"f:{formulation}")) if formulation else None,
+                      (WEIGHTS["pack"], attribute_set(f"p:{pack}")) if pack else None]
+            wanted = [entry for entry in wanted if entry]
+            best = []
+            for molecule_id, similarity, kind in molecule_cache[molecule]:
+                base = WEIGHTS["molecule"] * similarity
+                for sku_id in self._postings(molecule_id):
+                    score = base + sum(weight for weight, members in wanted if sku_id in members)
+                    entry = (score, -sku_id, kind)
+                    if len(best) < top_k:
+                        heapq.heappush(best, entry)
+                    elif entry > best[0]:
+                        heapq.heapreplace(best, entry)
+            scored[key] = [(score, -negative, kind) for score, negative, kind in sorted(best, reverse=True)]
+
+        records = {}
+        results = []
+        for key in keys:
+            matches = []
+            for score, sku_id, kind in scored[key]:
+                if sku_id not in records:
+                    records[sku_id] = self.record(sku_id)
+                record = records[sku_id]
+                matches.append(dict(record["row"], normalized=record["normalized"], score=round(score, 4),
+                                    match=kind))
+            results.append(matches)
+        return results
+
+    def close(self):
+        for name in ("offsets", "postings", "trigram_counts", "record_offsets"):
+            view = getattr(self, name)
+            if isinstance(view, memoryview):
+                view.release()
+        for view in self._mapped:
+            view.close()
+        self._mapped = ()
@@ -0,0 +1,292 @@
+"""Model transport, tracing and small helpers shared by the SAP test
+converter (``sap_pipeline``) and the Tender Intelligence Hub agents.
+
+A transport is any ``callable(prompt, max_tokens) -> text``.
+``AnthropicTransport`` calls the Messages API; ``RateLimitedTransport``
+wraps one with shared request and token budgets, retries and a circuit
+breaker, so several agents can share one client::
+
+    from common import AnthropicTransport, RateLimitedTransport, parse_ndjson
+
+    transport = RateLimitedTransport(AnthropicTransport())
+    rows = parse_ndjson(transport(prompt, 4000))
+
+``Tracer`` records timing spans and counters and exports them in the
+Chrome trace format.
+"""
+
+import contextlib
+import datetime
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+
+API_URL = "https://api.anthropic.com/v1/messages"
+MODEL = "claude-sonnet-4-20250514"
+SCHEDULER_RPM = 50
+SCHEDULER_INPUT_TPM = 30000
+SCHEDULER_MAX_ATTEMPTS = 5
+RETRY_BASE_S = 1.0
+RETRY_MAX_S = 30.0
+BREAKER_THRESHOLD = 5
+BREAKER_COOLDOWN_S = 30.0
+TRACE_MAX_SPANS = 50000
+
+
+class PipelineError(Exception):
+    """Raised when a model response or a pipeline stage cannot be used."""
+
+
+class TransportError(PipelineError):
+    """A failed model request; ``retryable`` marks 408/429/5xx and network errors."""
+
+    def __init__(self, message, status=None, retry_after=0.0, retryable=False):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+        self.retryable = retryable
+
+
+class AnthropicTransport:
+    """Sends one prompt to the Messages API and returns the response text."""
+
+    def __init__(self, api_key=None, model=MODEL, timeout=120.0):
+        self.api_key = api_key or os.environ.get("ANTHROPIC_API_KEY", "")
+        self.model = model
+        self.timeout = timeout
+
+    def __call__(self, prompt, max_tokens):
+        body = json.dumps({
+            "model": self.model,
+            "max_tokens": max_tokens,
+            "messages": [{"role": "user", "content": prompt}],
+        }).encode()
+        request = urllib.request.Request(API_URL, data=body, method="POST", headers={
+            "Content-Type": "application/json",
+            "x-api-key": self.api_key,
+            "anthropic-version": "2023-06-01",
+        })
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                data = json.load(response)
+        except urllib.error.HTTPError as exc:
+            try:
+                retry_after = float(exc.headers.get("retry-after") or 0)
+            except ValueError:
+                retry_after = 0.0
+            raise TransportError(f"HTTP {exc.code}", status=exc.code, retry_after=retry_after,
+                                 retryable=exc.code in (408, 429) or exc.code >= 500) from exc
+        except (urllib.error.URLError, TimeoutError) as exc:
+            raise TransportError(f"network error: {exc}", retryable=True) from exc
+        if data.get("stop_reason") == "max_tokens":
+            raise PipelineError("response truncated")
+        return data["content"][0]["text"]
+
+
+class RateLimitedTransport:
+    """Shares request and input-token budgets across threads and retries transient failures.
+
+    Requests wait while the last minute already used ``rpm`` requests or
+    ``input_tpm`` estimated input tokens.  Retryable failures back off
+    exponentially with full jitter (at least ``Retry-After``); after
+    ``BREAKER_THRESHOLD`` consecutive non-429 failures the circuit opens and
+    calls fail fast until ``BREAKER_COOLDOWN_S`` has passed.  Then a single
+    probe goes through while other calls wait; the circuit closes if it
+    succeeds and opens again if it fails.
+    """
+
+    def __init__(self, transport, rpm=SCHEDULER_RPM, input_tpm=SCHEDULER_INPUT_TPM,
+                 max_attempts=SCHEDULER_MAX_ATTEMPTS, clock=time.monotonic, sleep=time.sleep):
+        self.transport = transport
+        self.rpm = rpm
+        self.input_tpm = input_tpm
+        self.max_attempts = max_attempts
+        self.clock = clock
+        self.sleep = sleep
+        self.condition = threading.Condition()
+        self.sent = []
+        self.latencies = []
+        self.counters = {"completed": 0, "failed": 0, "retries": 0, "rejected": 0}
+        self.waiting = 0
+        self.in_flight = 0
+        self.failures = 0
+        self.open_until = 0.0
+        self.probing = False
+
+    def _breaker(self, now):
+        if self.failures < BREAKER_THRESHOLD:
+            return "closed"
+        return "open" if now < self.open_until else "half-open"
+
+    def _acquire(self, tokens):
+        """Wait for budget; returns ``True`` when this call is the half-open probe."""
+        with self.condition:
+            self.waiting += 1
+            try:
+                while True:
+                    now = self.clock()
+                    state = self._breaker(now)
+                    if state == "open":
+                        self.counters["rejected"] += 1
+                        raise TransportError("circuit open: model API is failing", retryable=False)
+                    if state == "half-open" and self.probing:
+                        self.condition.wait()
+                        continue
+                    self.sent = [(at, used) for at, used in self.sent if at > now - 60]
+                    used = sum(count for _, count in self.sent)
+                    if not self.sent or (len(self.sent) < self.rpm and used + tokens <= self.input_tpm):
+                        self.sent.append((now, tokens))
+                        self.in_flight += 1
+                        self.probing = state == "half-open"
+                        return self.probing
+                    self.condition.wait(self.sent[0][0] + 60 - now)
+            finally:
+                self.waiting -= 1
+
+    def _finish(self, latency, error=None, counter=None, probe=False):
+        with self.condition:
+            self.in_flight -= 1
+            if probe:
+                self.probing = False
+            if counter:
+                self.counters[counter] += 1
+            if error is None:
+                self.failures = 0
+                self.latencies = (self.latencies + [latency])[-200:]
+            elif isinstance(error, TransportError) and error.retryable and error.status != 429:
+                self.failures += 1
+                if self.failures >= BREAKER_THRESHOLD:
+                    self.open_until = self.clock() + BREAKER_COOLDOWN_S
+            self.condition.notify_all()
+
+    def __call__(self, prompt, max_tokens):
+        tokens = estimate_tokens(prompt)
+        for attempt in range(1, self.max_attempts + 1):
+            probe = self._acquire(tokens)
+            started = self.clock()
+            try:
+                text = self.transport(prompt, max_tokens)
+            except Exception as exc:
+                retry = isinstance(exc, TransportError) and exc.retryable and attempt < self.max_attempts
+                self._finish(self.clock() - started, exc, "retries" if retry else "failed", probe)
+                if not retry:
+                    raise
+                self.sleep(max(exc.retry_after, random.uniform(0, min(RETRY_MAX_S, RETRY_BASE_S * 2 ** attempt))))
+                continue
+            self._finish(self.clock() - started, counter="completed", probe=probe)
+            return text
+
+    def metrics(self):
+        """Queue depth, in-flight requests, counters and latency percentiles in milliseconds."""
+        with self.condition:
+            breaker = self._breaker(self.clock())
+            return {"queued": self.waiting, "inFlight": self.in_flight, **self.counters,
+                    "p50Ms": round(percentile(self.latencies, 0.5) * 1000),
+                    "p95Ms": round(percentile(self.latencies, 0.95) * 1000), "breaker": breaker}
+
+
+class Tracer:
+    """Thread-safe timing spans and counters for one run.
+
+    Mirrors ``createTracer`` in ``demo.py``: ``summary()`` aggregates spans per
+    stage and ``to_chrome_trace()`` returns a document that loads in
+    ``chrome://tracing`` or Perfetto, one lane per worker thread.
+    """
+
+    def __init__(self, label="run", max_spans=TRACE_MAX_SPANS):
+        self.run_id = f"{label}@{datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds')}"
+        self.max_spans = max_spans
+        self.origin = time.perf_counter()
+        self.spans = []
+        self.counters = {}
+        self.lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def span(self, name, **args):
+        """Time the enclosed block; the yielded dict can take extra ``args``."""
+        begin = time.perf_counter()
+        try:
+            yield args
+        finally:
+            self.record(name, begin, time.perf_counter() - begin, args)
+
+    def record(self, name, begin, duration, args=None):
+        with self.lock:
+            if len(self.spans) < self.max_spans:
+                self.spans.append((name, begin - self.origin, duration, threading.get_ident(), args or {}))
+
+    def count(self, name, amount=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def summary(self):
+        stages = {}
+        with self.lock:
+            spans, counters = list(self.spans), dict(self.counters)
+        for name, _, duration, _, _ in spans:
+            stage = stages.setdefault(name, {"count": 0, "totalMs": 0.0, "maxMs": 0.0})
+            stage["count"] += 1
+            stage["totalMs"] += duration * 1000
+            stage["maxMs"] = max(stage["maxMs"], duration * 1000)
+        for stage in stages.values():
+            stage["totalMs"] = round(stage["totalMs"], 3)
+            stage["maxMs"] = round(stage["maxMs"], 3)
+        return {"runId": self.run_id, "counters": counters, "stages": stages}
+
+    def to_chrome_trace(self):
+        lanes = {}
+        with self.lock:
+            spans = list(self.spans)
+        return {
+            "traceEvents": [{
+                "name": name,
+                "cat": name.split(".")[0],
+                "ph": "X",
+                "ts": round(begin * 1e6),
+                "dur": round(duration * 1e6),
+                "pid": 1,
+                "tid": lanes.setdefault(thread, len(lanes) + 1),
+                "args": args,
+            } for name, begin, duration, thread, args in spans],
+            "metadata": self.summary(),
+        }
+
+
+def estimate_tokens(value):
+    return -(-len(json.dumps(value)) // 4)
+
+
+def parse_ndjson(text):
+    """Parse the NDJSON output contract, tolerating fences and a bare JSON array."""
+    results = []
+    for line in text.splitlines():
+        line = line.strip().rstrip(",")
+        if not line or line.startswith("```") or line in ("[", "]"):
+            continue
+        try:
+            parsed = json.loads(line)
+        except ValueError as exc:
+            raise PipelineError(f"invalid JSON line: {line[:80]}") from exc
+        results.extend(parsed if isinstance(parsed, list) else [parsed])
+    return results
+
+
+def percentile(values, fraction):
+    """The ``fraction`` quantile of ``values`` (nearest rank); 0.0 when empty."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for block in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
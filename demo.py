@@ -1,15 +1,945 @@
-import React, { useState } from 'react';
+import React, { useEffect, useMemo, useRef, useState } from 'react';
 import { Upload, FileText, CheckCircle, Database, Download, AlertCircle, ChevronRight, Loader2, Sparkles, BarChart3, Zap } from 'lucide-react';
 import Papa from 'papaparse';
 
+const API_URL = 'https://api.anthropic.com/v1/messages';
+const MODEL = 'claude-sonnet-4-20250514';
+const CHUNK_TOKEN_BUDGET = 3000;
+const CHUNK_MAX_ROWS = 25;
+const CHUNK_MAX_TOKENS = 4000;
+const CHUNK_MAX_TOKENS_LIMIT = 16000;
+const CHUNK_RETRIES = 2;
+const SCHEDULER_MAX_IN_FLIGHT = 4;
+const SCHEDULER_RPM = 50;
+const SCHEDULER_INPUT_TPM = 30000;
+const SCHEDULER_MAX_ATTEMPTS = 5;
+const REQUEST_TIMEOUT_MS = 120000;
+const RETRY_BASE_MS = 1000;
+const RETRY_MAX_MS = 30000;
+const BREAKER_THRESHOLD = 5;
+const BREAKER_COOLDOWN_MS = 30000;
+const METRICS_POLL_MS = 500;
+const TRACE_MAX_SPANS = 50000;
+const PARSE_CHUNK_BYTES = 1024 * 1024;
+const PREVIEW_ROWS = 5;
+const CACHE_STORAGE_KEY = 'sap-test-converter-cache';
+const CACHE_MAX_ENTRIES = 20000;
+
+const STREAM_FLUSH_MS = 100;
+const QUERY_POOL_SIZE = 4;
+const QUERY_CONCURRENCY = 4;
+const QUERY_TIMEOUT_MS = 30000;
+const QUERY_PAGE_SIZE = 500;
+const QUERY_SAMPLE_ROWS = 5;
+const STAND_IN_ROWS = 2000;
+const LIST_OVERSCAN = 4;
+const EVAL_ROW_HEIGHT = 136;
+const EVAL_LIST_HEIGHT = 384;
+const QUERY_ROW_HEIGHT = 300;
+const QUERY_LIST_HEIGHT = 640;
+const EXPORT_CHUNK_CHARS = 64 * 1024;
+const EXPORT_ROW_GROUP = 1000;
+const EXPORT_COLUMNS = ['type', 'testCase', 'evaluation', 'score', 'feedback', 'sapQuery', 'description', 'status', 'rows', 'latencyMs', 'error'];
+
+const EVALUATE_PROMPT = 'Evaluate these test cases for quality, completeness, and clarity. Return ONLY newline-delimited JSON with no preamble or markdown: one JSON object per line, one line per test case, in the same order:\n\n{rows}\n\nLine format: {"testCase": "...", "evaluation": "pass/fail", "score": 0-100, "feedback": "..."}';
+const GENERATE_PROMPT = 'Convert these test cases to SAP queries. Return ONLY newline-delimited JSON with no preamble or markdown: one JSON object per line, one line per test case, in the same order:\n\n{rows}\n\nLine format: {"testCase": "...", "sapQuery": "SELECT ...", "description": "..."}';
+
+const createTracer = () => {
+  let origin = performance.now();
+  let runId = new Date().toISOString();
+  let spans = [];
+  let counters = {};
+
+  const record = (name, begin, duration, args = {}) => {
+    if (spans.length < TRACE_MAX_SPANS) spans.push({ name, begin: begin - origin, duration, args });
+  };
+
+  const summary = () => {
+    const stages = {};
+    spans.forEach(({ name, duration }) => {
+      const stage = stages[name] || (stages[name] = { count: 0, totalMs: 0, maxMs: 0 });
+      stage.count++;
+      stage.totalMs += duration;
+      stage.maxMs = Math.max(stage.maxMs, duration);
+    });
+    return { runId, counters: { ...counters }, stages };
+  };
+
+  return {
+    reset: (label) => {
+      origin = performance.now();
+      runId = `${label}@${new Date().toISOString()}`;
+      spans = [];
+      counters = {};
+    },
+    start: (name, args) => {
+      const begin = performance.now();
+      return (extra) => record(name, begin, performance.now() - begin, { ...args, ...extra });
+    },
+    record,
+    count: (name, amount = 1) => {
+      counters[name] = (counters[name] || 0) + amount;
+    },
+    summary,
+    toChromeTrace: () => {
+      const lanes = {};
+      return {
+        traceEvents: spans.map(({ name, begin, duration, args }) => ({
+          name,
+          cat: name.split('.')[0],
+          ph: 'X',
+          ts: Math.round(begin * 1000),
+          dur: Math.round(duration * 1000),
+          pid: 1,
+          tid: lanes[name.split('.')[0]] || (lanes[name.split('.')[0]] = Object.keys(lanes).length + 1),
+          args
+        })),
+        metadata: summary()
+      };
+    }
+  };
+};
+
+const tracer = createTracer();
+
+const createColumnStore = () => ({ fields: [], columns: [], length: 0 });
+
+const appendRows = (store, fields, rows) => {
+  fields.forEach((field) => {
+    if (store.fields.includes(field)) return;
+    store.fields.push(field);
+    store.columns.push({ codes: new Array(store.length).fill(0), values: [''], dict: new Map([['', 0]]) });
+  });
+
+  store.fields.forEach((field, col) => {
+    const column = store.columns[col];
+    rows.forEach((row) => {
+      const value = row[field] ?? '';
+      let code = column.dict.get(value);
+      if (code === undefined) {
+        code = column.values.length;
+        column.values.push(value);
+        column.dict.set(value, code);
+      }
+      column.codes.push(code);
+    });
+  });
+  store.length += rows.length;
+};
+
+const readRow = (store, idx) => {
+  const row = {};
+  store.fields.forEach((field, col) => {
+    const column = store.columns[col];
+    row[field] = column.values[column.codes[idx]];
+  });
+  return row;
+};
+
+const storeSource = (store) => ({ length: store.length, row: (idx) => readRow(store, idx) });
+const arraySource = (rows) => ({ length: rows.length, row: (idx) => rows[idx] });
+
+const estimateTokens = (value) => Math.ceil(JSON.stringify(value).length / 4);
+
+const chunkRows = (source, tokenBudget, maxRows) => {
+  const chunks = [];
+  let current = { start: 0, end: 0 };
+  let tokens = 0;
+
+  for (let idx = 0; idx < source.length; idx++) {
+    const cost = estimateTokens(source.row(idx));
+    const size = current.end - current.start;
+    if (size > 0 && (tokens + cost > tokenBudget || size >= maxRows)) {
+      chunks.push(current);
+      current = { start: idx, end: idx };
+      tokens = 0;
+    }
+    current.end = idx + 1;
+    tokens += cost;
+  }
+
+  if (current.end > current.start) chunks.push(current);
+  return chunks;
+};
+
+const runPool = async (items, limit, worker) => {
+  const outcomes = new Array(items.length);
+  let next = 0;
+
+  const lane = async () => {
+    while (next < items.length) {
+      const idx = next++;
+      try {
+        outcomes[idx] = { ok: true, value: await worker(items[idx], idx) };
+      } catch (err) {
+        outcomes[idx] = { ok: false, error: err };
+      }
+    }
+  };
+
+  await Promise.all(Array.from({ length: Math.min(limit, items.length) }, lane));
+  return outcomes;
+};
+
+const splitLines = (buffer, onLine) => {
+  let newline = buffer.indexOf('\n');
+  while (newline !== -1) {
+    onLine(buffer.slice(0, newline));
+    buffer = buffer.slice(newline + 1);
+    newline = buffer.indexOf('\n');
+  }
+  return buffer;
+};
+
+const requestError = (message, fields) => Object.assign(new Error(message), fields);
+
+const streamModel = async (prompt, maxTokens, onText, signal) => {
+  const response = await fetch(API_URL, {
+    signal,
+    method: 'POST',
+    headers: {
+      'Content-Type': 'application/json',
+    },
+    body: JSON.stringify({
+      model: MODEL,
+      max_tokens: maxTokens,
+      stream: true,
+      messages: [{ role: 'user', content: prompt }]
+    })
+  }).catch((err) => {
+    throw err.name === 'TypeError' ? requestError(err.message, { retryable: true }) : err;
+  });
+
+  if (!response.ok) {
+    throw requestError(`HTTP ${response.status}`, {
+      status: response.status,
+      retryAfterMs: Number(response.headers.get('retry-after')) * 1000 || 0,
+      retryable: response.status === 408 || response.status === 429 || response.status >= 500
+    });
+  }
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  const usage = { inputTokens: 0, outputTokens: 0 };
+  let pending = '';
+  let stopReason = null;
+
+  const handleEvent = (line) => {
+    if (!line.startsWith('data:')) return;
+    const event = JSON.parse(line.slice(5));
+    if (event.type === 'error') {
+      throw requestError(event.error?.message || 'stream error', {
+        status: event.error?.type === 'rate_limit_error' ? 429 : 529,
+        retryable: ['overloaded_error', 'rate_limit_error', 'api_error'].includes(event.error?.type)
+      });
+    }
+    if (event.type === 'message_start') usage.inputTokens = event.message?.usage?.input_tokens || 0;
+    if (event.type === 'content_block_delta' && event.delta.type === 'text_delta') onText(event.delta.text);
+    if (event.type === 'message_delta') {
+      stopReason = event.delta.stop_reason;
+      usage.outputTokens = event.usage?.output_tokens || 0;
+    }
+  };
+
+  for (;;) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    pending = splitLines(pending + decoder.decode(value, { stream: true }), handleEvent);
+  }
+  handleEvent(pending + decoder.decode());
+  if (stopReason === 'max_tokens') throw requestError('response truncated', { truncated: true });
+  return usage;
+};
+
+const isRetryable = (err) => err.retryable ?? err.name === 'TimeoutError';
+const isContentError = (err) => err.status === undefined && !err.circuitOpen && !isRetryable(err);
+
+const percentile = (values, p) => {
+  if (values.length === 0) return 0;
+  const sorted = [...values].sort((a, b) => a - b);
+  return Math.round(sorted[Math.min(sorted.length - 1, Math.floor(p * sorted.length))]);
+};
+
+const createScheduler = ({ rpm, inputTpm, maxInFlight, maxAttempts }) => {
+  const queue = [];
+  const sent = [];
+  const latencies = [];
+  const counters = { completed: 0, failed: 0, retries: 0, rejected: 0 };
+  const breaker = { failures: 0, openUntil: 0, probing: false };
+  let inFlight = 0;
+  let seq = 0;
+  let timer = null;
+
+  const enqueue = (job) => {
+    const at = queue.findIndex(other => other.priority > job.priority || (other.priority === job.priority && other.seq > job.seq));
+    queue.splice(at === -1 ? queue.length : at, 0, job);
+  };
+
+  const budgetWait = (tokens, now) => {
+    while (sent.length > 0 && sent[0].at <= now - 60000) sent.shift();
+    const used = sent.reduce((sum, entry) => sum + entry.tokens, 0);
+    if (sent.length === 0 || (sent.length < rpm && used + tokens <= inputTpm)) return 0;
+    return sent[0].at + 60000 - now;
+  };
+
+  const breakerState = (now) => {
+    if (breaker.failures < BREAKER_THRESHOLD) return 'closed';
+    return breaker.openUntil > now ? 'open' : 'half-open';
+  };
+
+  const dispatch = async (job) => {
+    const entry = { at: Date.now(), tokens: job.tokens };
+    const probe = breakerState(entry.at) === 'half-open';
+    const started = performance.now();
+    const endSpan = tracer.start('model.request', { attempt: job.attempts + 1, estimatedTokens: job.tokens });
+    sent.push(entry);
+    inFlight++;
+    tracer.count('model.requests');
+    if (probe) breaker.probing = true;
+
+    try {
+      const value = await job.task(AbortSignal.timeout(REQUEST_TIMEOUT_MS));
+      endSpan({ status: 'ok', ...value });
+      tracer.count('tokens.in', value?.inputTokens || 0);
+      tracer.count('tokens.out', value?.outputTokens || 0);
+      if (value?.inputTokens) entry.tokens = value.inputTokens;
+      latencies.push(performance.now() - started);
+      if (latencies.length > 200) latencies.shift();
+      breaker.failures = 0;
+      counters.completed++;
+      job.resolve(value);
+    } catch (err) {
+      const retryable = isRetryable(err);
+      endSpan({ status: err.status || err.name, retryable });
+      if (retryable && err.status !== 429) {
+        breaker.failures++;
+        if (breaker.failures >= BREAKER_THRESHOLD) breaker.openUntil = Date.now() + BREAKER_COOLDOWN_MS;
+      }
+      if (retryable && ++job.attempts < maxAttempts) {
+        const jitter = Math.random() * Math.min(RETRY_MAX_MS, RETRY_BASE_MS * 2 ** job.attempts);
+        job.notBefore = Date.now() + Math.max(err.retryAfterMs || 0, jitter);
+        counters.retries++;
+        tracer.count('retries');
+        enqueue(job);
+      } else {
+        counters.failed++;
+        job.reject(err);
+      }
+    } finally {
+      if (probe) breaker.probing = false;
+      inFlight--;
+      pump();
+    }
+  };
+
+  const pump = () => {
+    clearTimeout(timer);
+    timer = null;
+    const now = Date.now();
+    let wake = Infinity;
+
+    if (breakerState(now) === 'open') {
+      queue.splice(0).forEach((job) => {
+        counters.rejected++;
+        job.reject(requestError('circuit open: model API is failing, try again shortly', { retryable: false, circuitOpen: true }));
+      });
+      return;
+    }
+
+    while (inFlight < maxInFlight && queue.length > 0 && !breaker.probing) {
+      const idx = queue.findIndex(job => job.notBefore <= now);
+      if (idx === -1) {
+        wake = Math.min(...queue.map(job => job.notBefore)) - now;
+        break;
+      }
+      const wait = budgetWait(queue[idx].tokens, now);
+      if (wait > 0) {
+        wake = wait;
+        break;
+      }
+      dispatch(queue.splice(idx, 1)[0]);
+      if (breakerState(now) === 'half-open') break;
+    }
+
+    if (wake < Infinity) timer = setTimeout(pump, Math.max(wake, 10));
+  };
+
+  return {
+    schedule: (task, { priority = 1, tokens = 0 } = {}) => new Promise((resolve, reject) => {
+      enqueue({ task, priority, tokens, seq: seq++, attempts: 0, notBefore: 0, resolve, reject });
+      pump();
+    }),
+    metrics: () => ({
+      queued: queue.length,
+      inFlight,
+      ...counters,
+      p50Ms: percentile(latencies, 0.5),
+      p95Ms: percentile(latencies, 0.95),
+      breaker: breakerState(Date.now())
+    })
+  };
+};
+
+const modelScheduler = createScheduler({
+  rpm: SCHEDULER_RPM,
+  inputTpm: SCHEDULER_INPUT_TPM,
+  maxInFlight: SCHEDULER_MAX_IN_FLIGHT,
+  maxAttempts: SCHEDULER_MAX_ATTEMPTS
+});
+
+const parseNdjsonLine = (line) => {
+  const text = line.trim().replace(/,$/, '');
+  if (!text || text.startsWith('```') || text === '[' || text === ']') return [];
+  const parsed = JSON.parse(text);
+  return Array.isArray(parsed) ? parsed : [parsed];
+};
+
+const fillPrompt = (template, rows) => template.replace('{rows}', () => JSON.stringify(rows));
+
+const normalizeRow = (row) => {
+  const normalized = {};
+  Object.keys(row).sort().forEach((key) => {
+    const value = row[key];
+    normalized[key.trim()] = typeof value === 'string' ? value.trim().replace(/\s+/g, ' ') : value;
+  });
+  return normalized;
+};
+
+const hashString = (text) => {
+  let h1 = 0xdeadbeef;
+  let h2 = 0x41c6ce57;
+  for (let i = 0; i < text.length; i++) {
+    const ch = text.charCodeAt(i);
+    h1 = Math.imul(h1 ^ ch, 2654435761);
+    h2 = Math.imul(h2 ^ ch, 1597334677);
+  }
+  h1 = Math.imul(h1 ^ (h1 >>> 16), 2246822507) ^ Math.imul(h2 ^ (h2 >>> 13), 3266489909);
+  h2 = Math.imul(h2 ^ (h2 >>> 16), 2246822507) ^ Math.imul(h1 ^ (h1 >>> 13), 3266489909);
+  return (h2 >>> 0).toString(16).padStart(8, '0') + (h1 >>> 0).toString(16).padStart(8, '0');
+};
+
+const cacheKey = (template, row) => hashString(`${MODEL}\u0000${template}\u0000${JSON.stringify(normalizeRow(row))}`);
+
+const createResultCache = (storageKey, maxEntries) => {
+  const entries = new Map();
+  const stats = { hits: 0, misses: 0 };
+
+  try {
+    const saved = typeof localStorage !== 'undefined' && localStorage.getItem(storageKey);
+    if (saved) JSON.parse(saved).forEach(([key, value]) => entries.set(key, value));
+  } catch (err) {
+    entries.clear();
+  }
+
+  return {
+    get: (key) => {
+      if (!entries.has(key)) {
+        stats.misses++;
+        return undefined;
+      }
+      const value = entries.get(key);
+      entries.delete(key);
+      entries.set(key, value);
+      stats.hits++;
+      return value;
+    },
+    set: (key, value) => {
+      entries.delete(key);
+      entries.set(key, value);
+      while (entries.size > maxEntries) entries.delete(entries.keys().next().value);
+    },
+    flush: () => {
+      if (typeof localStorage === 'undefined') return;
+      for (;;) {
+        try {
+          localStorage.setItem(storageKey, JSON.stringify([...entries]));
+          return;
+        } catch (err) {
+          // quota exceeded: drop the least recently used half and retry until the write fits
+          if (entries.size === 0) return;
+          const keep = Math.floor(entries.size / 2);
+          while (entries.size > keep) entries.delete(entries.keys().next().value);
+        }
+      }
+    },
+    invalidate: () => {
+      entries.clear();
+      stats.hits = 0;
+      stats.misses = 0;
+      try {
+        if (typeof localStorage !== 'undefined') localStorage.removeItem(storageKey);
+      } catch (err) {
+        // storage unavailable; the in-memory cache is already empty
+      }
+    },
+    stats: () => ({ ...stats, entries: entries.size })
+  };
+};
+
+const resultCache = createResultCache(CACHE_STORAGE_KEY, CACHE_MAX_ENTRIES);
+
+const emptyEvaluationStats = () => ({ count: 0, passed: 0, failed: 0, scoreSum: 0 });
+
+const tallyEvaluation = (stats, test, sign) => {
+  stats.count += sign;
+  if (test.evaluation === 'pass') stats.passed += sign;
+  if (test.evaluation === 'fail') stats.failed += sign;
+  stats.scoreSum += sign * (test.score || 0);
+};
+
+const runChunked = async (source, template, { onProgress, onPartial, onChange = () => {} }) => {
+  const results = new Array(source.length);
+  const keys = new Array(source.length);
+  const misses = [];
+  const setSlot = (idx, value) => {
+    onChange(results[idx], value);
+    results[idx] = value;
+  };
+
+  const endLookup = tracer.start('cache.lookup');
+  for (let idx = 0; idx < source.length; idx++) {
+    keys[idx] = cacheKey(template, source.row(idx));
+    const cached = resultCache.get(keys[idx]);
+    if (cached === undefined) misses.push(idx);
+    else setSlot(idx, cached);
+  }
+  endLookup({ rows: source.length, hits: source.length - misses.length });
+  tracer.count('rows', source.length);
+  tracer.count('cache.hits', source.length - misses.length);
+  tracer.count('cache.misses', misses.length);
+
+  const missSource = { length: misses.length, row: (i) => source.row(misses[i]) };
+  const snapshot = () => {
+    const endMerge = tracer.start('merge');
+    const merged = results.filter(result => result !== undefined);
+    endMerge({ rows: merged.length });
+    return merged;
+  };
+  if (misses.length < source.length) onPartial(snapshot);
+  const chunks = chunkRows(missSource, CHUNK_TOKEN_BUDGET, CHUNK_MAX_ROWS)
+    .map(chunk => ({ ...chunk, maxTokens: CHUNK_MAX_TOKENS, attempts: 0 }));
+  let pending = chunks.map((_, idx) => idx);
+  let total = chunks.length;
+  let lastError = null;
+  let failedChunks = 0;
+  let done = 0;
+
+  onProgress(0, total);
+  for (let round = 0; pending.length > 0; round++) {
+    const priority = round === 0 ? 1 : 0;
+    const outcomes = await runPool(pending, pending.length, async (chunkIdx) => {
+      const { start, end, maxTokens } = chunks[chunkIdx];
+      const endPrompt = tracer.start('prompt.build');
+      const rows = Array.from({ length: end - start }, (_, i) => missSource.row(start + i));
+      const prompt = fillPrompt(template, rows);
+      endPrompt({ rows: rows.length, chars: prompt.length });
+      let received = 0;
+      let buffer = '';
+      let parseMs = 0;
+      const accept = (line) => {
+        const parseStart = performance.now();
+        const parsed = parseNdjsonLine(line);
+        parseMs += performance.now() - parseStart;
+        parsed.forEach((result) => {
+          if (received >= rows.length) throw new Error(`expected ${rows.length} results, got more`);
+          setSlot(misses[start + received++], result);
+          onPartial(snapshot);
+        });
+      };
+
+      try {
+        await modelScheduler.schedule((signal) => {
+          for (let i = start; i < start + received; i++) setSlot(misses[i], undefined);
+          received = 0;
+          buffer = '';
+          return streamModel(prompt, maxTokens, (text) => {
+            buffer = splitLines(buffer + text, accept);
+          }, signal);
+        }, { priority, tokens: estimateTokens(prompt) });
+        accept(buffer);
+        tracer.record('json.parse', performance.now() - parseMs, parseMs, { rows: received });
+        if (received !== rows.length) {
+          throw new Error(`expected ${rows.length} results, got ${received}`);
+        }
+      } catch (err) {
+        for (let i = start; i < end; i++) setSlot(misses[i], undefined);
+        onPartial(snapshot);
+        throw err;
+      }
+
+      for (let i = start; i < end; i++) resultCache.set(keys[misses[i]], results[misses[i]]);
+      onProgress(++done, total);
+    });
+    lastError = outcomes.find(o => !o.ok)?.error || lastError;
+    const retry = [];
+    pending.forEach((chunkIdx, idx) => {
+      const { ok, error } = outcomes[idx];
+      if (ok) return;
+      const chunk = chunks[chunkIdx];
+      if (error.truncated && chunk.end - chunk.start > 1) {
+        // resending the same rows would be cut off again: retry each half as a chunk of its own
+        const mid = chunk.start + Math.ceil((chunk.end - chunk.start) / 2);
+        retry.push(chunks.push({ ...chunk, end: mid, attempts: 0 }) - 1, chunks.push({ ...chunk, start: mid, attempts: 0 }) - 1);
+        total++;
+      } else if (error.truncated && chunk.maxTokens < CHUNK_MAX_TOKENS_LIMIT) {
+        chunk.maxTokens = Math.min(chunk.maxTokens * 2, CHUNK_MAX_TOKENS_LIMIT);
+        retry.push(chunkIdx);
+      } else if (!error.truncated && isContentError(error) && chunk.attempts++ < CHUNK_RETRIES) {
+        retry.push(chunkIdx);
+      } else {
+        failedChunks++;
+      }
+    });
+    pending = retry;
+  }
+
+  resultCache.flush();
+  return {
+    results: snapshot(),
+    cached: source.length - misses.length,
+    failedChunks,
+    totalChunks: total,
+    lastError
+  };
+};
+
+const seededRandom = (seed) => () => {
+  seed = (seed + 0x6d2b79f5) | 0;
+  let t = Math.imul(seed ^ (seed >>> 15), 1 | seed);
+  t = (t + Math.imul(t ^ (t >>> 7), 61 | t)) ^ t;
+  return ((t ^ (t >>> 14)) >>> 0) / 4294967296;
+};
+
+const STAND_IN_SCHEMA = {
+  MARA: { MATNR: (i) => `M-${String(i).padStart(8, '0')}`, MTART: ['FERT', 'HALB', 'ROH', 'HAWA'], MATKL: ['001', '002', '010', '020'], MEINS: ['EA', 'KG', 'L'], ERSDA: 'date' },
+  KNA1: { KUNNR: (i) => String(100000 + i), NAME1: (i) => `Customer ${i}`, LAND1: ['DE', 'US', 'FR', 'IN', 'AE'], ORT01: ['Berlin', 'Austin', 'Lyon', 'Pune', 'Dubai'] },
+  VBAK: { VBELN: (i) => String(5000000 + i), ERDAT: 'date', AUART: ['OR', 'RE', 'CR'], KUNNR: (i, rnd) => String(100000 + Math.floor(rnd() * STAND_IN_ROWS)), NETWR: 'amount', WAERK: ['EUR', 'USD'] },
+  EKKO: { EBELN: (i) => String(4500000000 + i), BUKRS: ['1000', '2000', '3000'], BSART: ['NB', 'FO', 'UB'], LIFNR: (i, rnd) => String(300000 + Math.floor(rnd() * 500)), AEDAT: 'date' },
+  BKPF: { BUKRS: ['1000', '2000', '3000'], BELNR: (i) => String(1900000000 + i), GJAHR: ['2023', '2024', '2025'], BLART: ['SA', 'KR', 'DR'], BUDAT: 'date' }
+};
+
+const buildStandInTables = () => {
+  const rnd = seededRandom(42);
+  const tables = {};
+  Object.entries(STAND_IN_SCHEMA).forEach(([table, columns]) => {
+    tables[table] = Array.from({ length: STAND_IN_ROWS }, (_, i) => {
+      const row = {};
+      Object.entries(columns).forEach(([column, spec]) => {
+        if (Array.isArray(spec)) row[column] = spec[Math.floor(rnd() * spec.length)];
+        else if (spec === 'date') row[column] = new Date(Date.UTC(2023, 0, 1) + Math.floor(rnd() * 1000) * 86400000).toISOString().slice(0, 10).replace(/-/g, '');
+        else if (spec === 'amount') row[column] = Math.round(rnd() * 1000000) / 100;
+        else row[column] = spec(i, rnd);
+      });
+      return row;
+    });
+  });
+  return tables;
+};
+
+const compareValues = {
+  '=': (a, b) => a == b,
+  '<>': (a, b) => a != b,
+  '!=': (a, b) => a != b,
+  '<': (a, b) => a < b,
+  '>': (a, b) => a > b,
+  '<=': (a, b) => a <= b,
+  '>=': (a, b) => a >= b,
+  LIKE: (a, b) => new RegExp(`^${String(b).replace(/[.*+?^${}()|[\]\\]/g, '\\$&').replace(/%/g, '.*').replace(/_/g, '.')}$`, 'i').test(String(a))
+};
+
+const parseStandInQuery = (sql) => {
+  const match = sql.trim().replace(/\s+/g, ' ').replace(/\.$|;$/, '').match(
+    /^SELECT (SINGLE )?(.+?) FROM (\w+)(?: WHERE (.+?))?(?: UP TO (\d+) ROWS)?(?: LIMIT (\d+))?$/i
+  );
+  if (!match) throw new Error('unsupported SQL for the local stand-in');
+  const [, single, columnList, table, where, upTo, limit] = match;
+
+  const conditions = where ? where.split(/ AND /i).map((condition) => {
+    const parts = condition.match(/^(\w+) ?(<>|!=|<=|>=|=|<|>| LIKE ) ?('(?:[^']|'')*'|-?\d+(?:\.\d+)?)$/i);
+    if (!parts) throw new Error(`unsupported condition: ${condition}`);
+    const value = parts[3].startsWith("'") ? parts[3].slice(1, -1).replace(/''/g, "'") : Number(parts[3]);
+    return { column: parts[1].toUpperCase(), test: compareValues[parts[2].trim().toUpperCase()], value };
+  }) : [];
+
+  const columns = columnList.trim() === '*' ? null : columnList.split(/[\s,]+/).filter(Boolean).map(c => c.toUpperCase());
+  const maxRows = single ? 1 : Number(upTo || limit) || Infinity;
+  return { table: table.toUpperCase(), columns, conditions, maxRows };
+};
+
+const createStandInAdapter = () => {
+  let tables = null;
+  return {
+    name: 'Local stand-in',
+    connect: async () => {
+      tables = tables || buildStandInTables();
+      return {
+        execute: async function* (sql, { signal, pageSize }) {
+          const query = parseStandInQuery(sql);
+          const rows = tables[query.table];
+          if (!rows) throw new Error(`table ${query.table} not found`);
+          const known = Object.keys(rows[0]);
+          [...(query.columns || []), ...query.conditions.map(c => c.column)].forEach((column) => {
+            if (column !== 'COUNT(*)' && !known.includes(column)) throw new Error(`unknown column ${query.table}.${column}`);
+          });
+
+          const isCount = query.columns?.length === 1 && query.columns[0] === 'COUNT(*)';
+          let page = [];
+          let matched = 0;
+          for (const row of rows) {
+            if (matched >= query.maxRows) break;
+            if (!query.conditions.every(c => c.test(row[c.column], c.value))) continue;
+            matched++;
+            if (isCount) continue;
+            page.push(query.columns ? Object.fromEntries(query.columns.map(c => [c, row[c]])) : row);
+            if (page.length === pageSize) {
+              yield page;
+              page = [];
+              await new Promise(resolve => setTimeout(resolve, 0));
+              signal.throwIfAborted();
+            }
+          }
+          if (isCount) page = [{ 'COUNT(*)': matched }];
+          if (page.length > 0) yield page;
+        },
+        close: async () => {}
+      };
+    }
+  };
+};
+
+const createHttpAdapter = (baseUrl) => ({
+  name: baseUrl,
+  connect: async () => ({
+    execute: async function* (sql, { signal, pageSize }) {
+      let cursor = null;
+      do {
+        const response = await fetch(`${baseUrl}/query`, {
+          method: 'POST',
+          headers: { 'Content-Type': 'application/json' },
+          body: JSON.stringify({ sql, pageSize, cursor }),
+          signal
+        });
+        if (!response.ok) throw new Error(`HTTP ${response.status}`);
+        const page = await response.json();
+        cursor = page.nextCursor;
+        yield page.rows;
+      } while (cursor);
+    },
+    close: async () => {}
+  })
+});
+
+const createConnectionPool = (adapter, size) => {
+  const idle = [];
+  const waiters = [];
+  let open = 0;
+
+  return {
+    acquire: async () => {
+      if (idle.length > 0) return idle.pop();
+      if (open < size) {
+        open++;
+        try {
+          return await adapter.connect();
+        } catch (err) {
+          open--;
+          throw err;
+        }
+      }
+      return new Promise(resolve => waiters.push(resolve));
+    },
+    release: (connection) => {
+      const waiter = waiters.shift();
+      if (waiter) waiter(connection);
+      else idle.push(connection);
+    },
+    name: adapter.name,
+    stats: () => ({ open, idle: idle.length, waiting: waiters.length })
+  };
+};
+
+const queryPool = createConnectionPool(createStandInAdapter(), QUERY_POOL_SIZE);
+
+const runQuery = async (pool, sql, signal) => {
+  const controller = new AbortController();
+  const abort = () => controller.abort(signal.reason);
+  const timer = setTimeout(() => controller.abort(new Error('timeout')), QUERY_TIMEOUT_MS);
+  signal.addEventListener('abort', abort);
+  const started = performance.now();
+  const endSpan = tracer.start('query.execute');
+  const result = { query: sql, rows: 0, sample: [], status: 'success' };
+
+  let connection = null;
+  try {
+    connection = await pool.acquire();
+    controller.signal.throwIfAborted();
+    for await (const page of connection.execute(sql, { signal: controller.signal, pageSize: QUERY_PAGE_SIZE })) {
+      controller.signal.throwIfAborted();
+      result.rows += page.length;
+      if (result.sample.length < QUERY_SAMPLE_ROWS) result.sample.push(...page.slice(0, QUERY_SAMPLE_ROWS - result.sample.length));
+    }
+    if (result.rows === 1 && result.sample[0]?.['COUNT(*)'] !== undefined) result.rows = result.sample[0]['COUNT(*)'];
+  } catch (err) {
+    result.status = signal.aborted ? 'cancelled' : controller.signal.reason?.message === 'timeout' ? 'timeout' : 'error';
+    result.error = result.status === 'error' ? err.message : result.status;
+  } finally {
+    clearTimeout(timer);
+    signal.removeEventListener('abort', abort);
+    if (connection) pool.release(connection);
+  }
+
+  result.latencyMs = Math.round(performance.now() - started);
+  endSpan({ rows: result.rows, status: result.status });
+  return result;
+};
+
+const executeQueries = (pool, queries, signal, onResult) => runPool(queries, QUERY_CONCURRENCY, async (sql, idx) => {
+  const result = await runQuery(pool, sql, signal);
+  onResult(idx, result);
+  return result;
+});
+
+function* exportRecords({ evaluatedTests, sapQueries, queryResults }) {
+  for (const test of evaluatedTests) yield { type: 'evaluation', ...test };
+  for (let idx = 0; idx < sapQueries.length; idx++) {
+    const { query, sample, ...result } = queryResults[idx] || {};
+    yield { type: 'query', ...sapQueries[idx], ...result };
+  }
+}
+
+const csvCell = (value) => {
+  if (value === undefined || value === null) return '';
+  const text = typeof value === 'object' ? JSON.stringify(value) : String(value);
+  return /[",\r\n]/.test(text) ? `"${text.replace(/"/g, '""')}"` : text;
+};
+
+function* jsonPieces(data, meta) {
+  yield `{"timestamp":${JSON.stringify(meta.timestamp)},"partial":${meta.partial}`;
+  for (const key of ['evaluatedTests', 'sapQueries', 'queryResults']) {
+    yield `,"${key}":[`;
+    for (let idx = 0; idx < data[key].length; idx++) yield (idx ? ',\n' : '\n') + JSON.stringify(data[key][idx]);
+    yield ']';
+  }
+  yield '}\n';
+}
+
+function* ndjsonPieces(data, meta) {
+  yield JSON.stringify({ type: 'meta', ...meta }) + '\n';
+  for (const record of exportRecords(data)) yield JSON.stringify(record) + '\n';
+}
+
+function* csvPieces(data) {
+  yield EXPORT_COLUMNS.join(',') + '\r\n';
+  for (const record of exportRecords(data)) yield EXPORT_COLUMNS.map(column => csvCell(record[column])).join(',') + '\r\n';
+}
+
+function* columnarPieces(data, meta) {
+  yield JSON.stringify({ type: 'meta', ...meta, columns: EXPORT_COLUMNS }) + '\n';
+  let group = [];
+  let rowGroup = 0;
+  const flush = () => JSON.stringify({
+    rowGroup: rowGroup++,
+    rows: group.length,
+    columns: Object.fromEntries(EXPORT_COLUMNS.map(column => [column, group.map(record => record[column] ?? null)]))
+  }) + '\n';
+  for (const record of exportRecords(data)) {
+    group.push(record);
+    if (group.length === EXPORT_ROW_GROUP) {
+      yield flush();
+      group = [];
+    }
+  }
+  if (group.length > 0) yield flush();
+}
+
+const EXPORT_FORMATS = {
+  json: { label: 'JSON', extension: 'json', type: 'application/json', pieces: jsonPieces },
+  ndjson: { label: 'NDJSON', extension: 'ndjson', type: 'application/x-ndjson', pieces: ndjsonPieces },
+  csv: { label: 'CSV', extension: 'csv', type: 'text/csv', pieces: csvPieces },
+  columnar: { label: 'Columnar', extension: 'columns.ndjson', type: 'application/x-ndjson', pieces: columnarPieces }
+};
+
+const exportStream = (pieces) => {
+  const encoder = new TextEncoder();
+  return new ReadableStream({
+    pull: async (controller) => {
+      let text = '';
+      let next = pieces.next();
+      while (!next.done) {
+        text += next.value;
+        if (text.length >= EXPORT_CHUNK_CHARS) break;
+        next = pieces.next();
+      }
+      if (text) controller.enqueue(encoder.encode(text));
+      if (next.done) controller.close();
+      await new Promise(resolve => setTimeout(resolve, 0));
+    }
+  });
+};
+
+const saveStream = async (stream, filename, type) => {
+  if (typeof window.showSaveFilePicker === 'function') {
+    const handle = await window.showSaveFilePicker({ suggestedName: filename });
+    await stream.pipeTo(await handle.createWritable());
+    return;
+  }
+  const blob = await new Response(stream).blob();
+  const url = URL.createObjectURL(new Blob([blob], { type }));
+  const a = document.createElement('a');
+  a.href = url;
+  a.download = filename;
+  a.click();
+  setTimeout(() => URL.revokeObjectURL(url), 0);
+};
+
+const VirtualList = ({ items, itemHeight, maxHeight, className, renderItem }) => {
+  const [scrollTop, setScrollTop] = useState(0);
+  const height = Math.min(maxHeight, items.length * itemHeight);
+  const first = Math.max(0, Math.floor(scrollTop / itemHeight) - LIST_OVERSCAN);
+  const last = Math.min(items.length, Math.ceil((scrollTop + height) / itemHeight) + LIST_OVERSCAN);
+
+  return (
+    <div className={`overflow-auto ${className}`} style={{ height }} onScroll={(e) => setScrollTop(e.currentTarget.scrollTop)}>
+      <div className="relative" style={{ height: items.length * itemHeight }}>
+        {items.slice(first, last).map((item, offset) => (
+          <div key={first + offset} className="absolute inset-x-0" style={{ top: (first + offset) * itemHeight, height: itemHeight }}>
+            {renderItem(item, first + offset)}
+          </div>
+        ))}
+      </div>
+    </div>
+  );
+};
+
 const SAP_TEST_CASE_CONVERTER = () => {
   const [currentStep, setCurrentStep] = useState(0);
-  const [csvData, setCsvData] = useState([]);
+  const columnStore = useRef(createColumnStore());
+  const [rowCount, setRowCount] = useState(0);
+  const [preview, setPreview] = useState({ fields: [], rows: [] });
+  const [parsing, setParsing] = useState(false);
   const [evaluatedTests, setEvaluatedTests] = useState([]);
+  const [evaluationStats, setEvaluationStats] = useState(emptyEvaluationStats());
   const [sapQueries, setSapQueries] = useState([]);
   const [queryResults, setQueryResults] = useState([]);
-  const [loading, setLoading] = useState(false);
+  const [executing, setExecuting] = useState(false);
+  const executionAbort = useRef(null);
+  const [activeStage, setActiveStage] = useState(null);
+  const loading = activeStage !== null;
   const [error, setError] = useState('');
+  const [progress, setProgress] = useState({ done: 0, total: 0 });
+  const [cacheStats, setCacheStats] = useState(resultCache.stats());
+  const [exportFormat, setExportFormat] = useState('json');
+  const [exportGzip, setExportGzip] = useState(false);
+  const [exporting, setExporting] = useState(false);
+  const [schedulerMetrics, setSchedulerMetrics] = useState(modelScheduler.metrics());
+
+  useEffect(() => {
+    if (!loading) return undefined;
+    const interval = setInterval(() => setSchedulerMetrics(modelScheduler.metrics()), METRICS_POLL_MS);
+    return () => {
+      clearInterval(interval);
+      setSchedulerMetrics(modelScheduler.metrics());
+    };
+  }, [loading]);
 
   const steps = [
     { id: 0, name: 'Upload', icon: Upload, color: 'from-violet-500 to-purple-500' },
@@ -22,113 +952,256 @@ const SAP_TEST_CASE_CONVERTER = () => {
     const file = e.target.files[0];
     if (!file) return;
 
+    tracer.reset(file.name);
+    const endParse = tracer.start('csv.parse', { file: file.name, bytes: file.size });
+    const store = createColumnStore();
+    columnStore.current = store;
+    setRowCount(0);
+    setPreview({ fields: [], rows: [] });
+    setParsing(true);
+    setError('');
+
     Papa.parse(file, {
       header: true,
       skipEmptyLines: true,
-      complete: (results) => {
-        setCsvData(results.data);
-        setError('');
+      worker: true,
+      chunkSize: PARSE_CHUNK_BYTES,
+      chunk: (results) => {
+        if (columnStore.current !== store) return;
+        tracer.count('csv.chunks');
+        const needsPreview = store.length < PREVIEW_ROWS;
+        appendRows(store, results.meta.fields || [], results.data);
+        if (needsPreview) {
+          const count = Math.min(store.length, PREVIEW_ROWS);
+          setPreview({ fields: [...store.fields], rows: Array.from({ length: count }, (_, idx) => readRow(store, idx)) });
+        }
+        setRowCount(store.length);
+      },
+      complete: () => {
+        if (columnStore.current !== store) return;
+        endParse({ rows: store.length });
+        tracer.count('rows.parsed', store.length);
+        setRowCount(store.length);
+        setParsing(false);
       },
       error: (error) => {
+        setParsing(false);
         setError(`Error parsing CSV: ${error.message}`);
       }
     });
   };
 
+  const streamInto = (apply) => {
+    let timer = null;
+    let latest = null;
+    return {
+      onPartial: (snapshot) => {
+        latest = snapshot;
+        if (timer) return;
+        timer = setTimeout(() => {
+          timer = null;
+          apply(latest());
+        }, STREAM_FLUSH_MS);
+      },
+      cancel: () => clearTimeout(timer)
+    };
+  };
+
+  const reportPartial = (run, label) => {
+    if (run.failedChunks === 0) return;
+    setError(`${label}: ${run.failedChunks} of ${run.totalChunks} batches failed after retries (${run.lastError?.message}). Showing partial results.`);
+  };
+
   const evaluateTestCases = async () => {
-    setLoading(true);
+    setActiveStage('evaluate');
     setError('');
     
+    const endStage = tracer.start('stage.evaluate');
+    const stats = emptyEvaluationStats();
+    const stream = streamInto((partial) => {
+      setEvaluatedTests(partial);
+      setEvaluationStats({ ...stats });
+      if (partial.length > 0) setCurrentStep(2);
+    });
+
     try {
-      const response = await fetch('https://api.anthropic.com/v1/messages', {
-        method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-        },
-        body: JSON.stringify({
-          model: 'claude-sonnet-4-20250514',
-          max_tokens: 1000,
-          messages: [{
-            role: 'user',
-            content: `Evaluate these test cases for quality, completeness, and clarity. Return ONLY a JSON array with no preamble or markdown:\n\n${JSON.stringify(csvData)}\n\nFormat: [{"testCase": "...", "evaluation": "pass/fail", "score": 0-100, "feedback": "..."}]`
-          }]
-        })
+      const run = await runChunked(storeSource(columnStore.current), EVALUATE_PROMPT, {
+        onProgress: (done, total) => setProgress({ done, total }),
+        onPartial: stream.onPartial,
+        onChange: (previous, next) => {
+          if (previous) tallyEvaluation(stats, previous, -1);
+          if (next) tallyEvaluation(stats, next, 1);
+        }
       });
-
-      const data = await response.json();
-      const content = data.content[0].text.trim();
-      const cleanContent = content.replace(/```json|```/g, '').trim();
-      const evaluated = JSON.parse(cleanContent);
+      stream.cancel();
+      if (run.results.length === 0) throw run.lastError || new Error('no test cases evaluated');
       
-      setEvaluatedTests(evaluated);
+      setEvaluatedTests(run.results);
+      setEvaluationStats({ ...stats });
+      setCacheStats(resultCache.stats());
+      reportPartial(run, 'Evaluation');
       setCurrentStep(2);
     } catch (err) {
+      stream.cancel();
+      setEvaluatedTests([]);
+      setEvaluationStats(emptyEvaluationStats());
+      setCurrentStep(1);
       setError(`Evaluation failed: ${err.message}`);
     } finally {
-      setLoading(false);
+      endStage({ rows: stats.count });
+      setActiveStage(null);
     }
   };
 
   const generateSAPQueries = async () => {
-    setLoading(true);
+    setActiveStage('generate');
     setError('');
     
+    const stream = streamInto((partial) => {
+      setSapQueries(partial);
+      setQueryResults(partial.map(q => ({ query: q.sapQuery, status: 'pending' })));
+      if (partial.length > 0) setCurrentStep(3);
+    });
+
+    let generated = null;
+    const endStage = tracer.start('stage.generate');
     try {
       const passedTests = evaluatedTests.filter(t => t.evaluation === 'pass');
       
-      const response = await fetch('https://api.anthropic.com/v1/messages', {
-        method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-        },
-        body: JSON.stringify({
-          model: 'claude-sonnet-4-20250514',
-          max_tokens: 1000,
-          messages: [{
-            role: 'user',
-            content: `Convert these test cases to SAP queries. Return ONLY a JSON array:\n\n${JSON.stringify(passedTests)}\n\nFormat: [{"testCase": "...", "sapQuery": "SELECT ...", "description": "..."}]`
-          }]
-        })
+      const run = await runChunked(arraySource(passedTests), GENERATE_PROMPT, {
+        onProgress: (done, total) => setProgress({ done, total }),
+        onPartial: stream.onPartial
       });
-
-      const data = await response.json();
-      const content = data.content[0].text.trim();
-      const cleanContent = content.replace(/```json|```/g, '').trim();
-      const queries = JSON.parse(cleanContent);
+      stream.cancel();
+      if (run.results.length === 0) throw run.lastError || new Error('no queries generated');
+      const queries = run.results;
       
       setSapQueries(queries);
-      
-      const mockResults = queries.map(q => ({
-        query: q.sapQuery,
-        rows: Math.floor(Math.random() * 100) + 1,
-        status: 'success'
-      }));
-      
-      setQueryResults(mockResults);
+      setQueryResults(queries.map(q => ({ query: q.sapQuery, status: 'pending' })));
+      setCacheStats(resultCache.stats());
+      reportPartial(run, 'Query generation');
       setCurrentStep(3);
+      generated = queries;
     } catch (err) {
+      stream.cancel();
+      setSapQueries([]);
+      setQueryResults([]);
+      setCurrentStep(2);
       setError(`Query generation failed: ${err.message}`);
     } finally {
-      setLoading(false);
+      endStage({ queries: generated?.length || 0 });
+      setActiveStage(null);
     }
+
+    if (generated) await runQueries(generated);
   };
 
-  const exportResults = () => {
-    const exportData = {
-      evaluatedTests,
-      sapQueries,
-      queryResults,
-      timestamp: new Date().toISOString()
-    };
-    
-    const blob = new Blob([JSON.stringify(exportData, null, 2)], { type: 'application/json' });
-    const url = URL.createObjectURL(blob);
-    const a = document.createElement('a');
-    a.href = url;
-    a.download = `sap-test-results-${Date.now()}.json`;
-    a.click();
+  const runQueries = async (queries) => {
+    const controller = new AbortController();
+    executionAbort.current = controller;
+    setExecuting(true);
+    const results = queries.map(q => ({ query: q.sapQuery, status: 'pending' }));
+    const stream = streamInto(setQueryResults);
+    const endStage = tracer.start('stage.execute', { queries: queries.length });
+    try {
+      await executeQueries(queryPool, queries.map(q => q.sapQuery), controller.signal, (idx, result) => {
+        results[idx] = result;
+        stream.onPartial(() => [...results]);
+      });
+    } finally {
+      endStage();
+      stream.cancel();
+      setQueryResults([...results]);
+      executionAbort.current = null;
+      setExecuting(false);
+    }
+  };
+
+  const executedCount = useMemo(() => queryResults.filter(r => r.status !== 'pending').length, [queryResults]);
+  const averageScore = evaluationStats.count > 0 ? Math.round(evaluationStats.scoreSum / evaluationStats.count) : 0;
+
+  const cancelQueries = () => executionAbort.current?.abort(new Error('cancelled'));
+
+  const invalidateCache = () => {
+    resultCache.invalidate();
+    setCacheStats(resultCache.stats());
+  };
+
+  const exportResults = async () => {
+    const format = EXPORT_FORMATS[exportFormat];
+    const partial = loading || executing;
+    const meta = { timestamp: new Date().toISOString(), partial };
+    let stream = exportStream(format.pieces({ evaluatedTests, sapQueries, queryResults }, meta));
+    let filename = `sap-test-results-${partial ? 'partial-' : ''}${Date.now()}.${format.extension}`;
+    if (exportGzip) {
+      stream = stream.pipeThrough(new CompressionStream('gzip'));
+      filename += '.gz';
+    }
+
+    setExporting(true);
+    const endSpan = tracer.start('export', { format: exportFormat, gzip: exportGzip, partial });
+    try {
+      await saveStream(stream, filename, exportGzip ? 'application/gzip' : format.type);
+    } catch (err) {
+      if (err.name !== 'AbortError') setError(`Export failed: ${err.message}`);
+    } finally {
+      endSpan();
+      setExporting(false);
+    }
+  };
+
+  const exportTrace = async () => {
+    const pieces = [JSON.stringify(tracer.toChromeTrace())][Symbol.iterator]();
+    try {
+      await saveStream(exportStream(pieces), `sap-test-trace-${Date.now()}.json`, 'application/json');
+    } catch (err) {
+      if (err.name !== 'AbortError') setError(`Trace export failed: ${err.message}`);
+    }
+  };
+
+  const recordRender = (id, phase, actualDuration, baseDuration, startTime) => {
+    tracer.record(`render.${id}`, startTime, actualDuration, { phase });
   };
 
+  const renderSchedulerMetrics = () => loading && (
+    <p className="mt-4 text-xs text-slate-500 font-mono">
+      queue {schedulerMetrics.queued} · in flight {schedulerMetrics.inFlight} · retries {schedulerMetrics.retries} · p50 {schedulerMetrics.p50Ms} ms · p95 {schedulerMetrics.p95Ms} ms · breaker {schedulerMetrics.breaker}
+    </p>
+  );
+
+  const renderExportControls = () => (
+    <div className="inline-flex items-center gap-4">
+      <select
+        value={exportFormat}
+        onChange={(e) => setExportFormat(e.target.value)}
+        className="px-4 py-5 bg-white/10 text-white rounded-2xl font-semibold border border-white/20 backdrop-blur-sm"
+      >
+        {Object.entries(EXPORT_FORMATS).map(([key, format]) => (
+          <option key={key} value={key} className="bg-slate-900">{format.label}</option>
+        ))}
+      </select>
+      <label className="flex items-center gap-2 text-sm text-slate-300 font-semibold">
+        <input type="checkbox" checked={exportGzip} onChange={(e) => setExportGzip(e.target.checked)} />
+        gzip
+      </label>
+      <button
+        onClick={exportResults}
+        disabled={exporting}
+        className="inline-flex items-center gap-4 px-10 py-5 bg-gradient-to-r from-violet-500 to-purple-600 text-white rounded-2xl font-semibold hover:shadow-2xl hover:shadow-violet-500/50 transition-all duration-300 hover:scale-105 disabled:opacity-50 disabled:cursor-not-allowed disabled:hover:scale-100"
+      >
+        {exporting ? <Loader2 className="w-6 h-6 animate-spin" /> : <Download className="w-6 h-6" />}
+        {loading || executing ? 'Export Partial Results' : 'Export Results'}
+      </button>
+      <button
+        onClick={exportTrace}
+        title="Per-stage timings and counters in Chrome trace format"
+        className="px-6 py-5 bg-white/10 text-white rounded-2xl font-semibold hover:bg-white/20 transition-all duration-300 backdrop-blur-sm border border-white/20"
+      >
+        Trace
+      </button>
+    </div>
+  );
+
   const copyToClipboard = (text) => {
     navigator.clipboard.writeText(text);
   };
@@ -240,7 +1313,7 @@ const SAP_TEST_CASE_CONVERTER = () => {
                 <input type="file" accept=".csv" onChange={handleFileUpload} className="hidden" />
               </label>
 
-              {csvData.length > 0 && (
+              {rowCount > 0 && (
                 <div className="mt-12 p-8 bg-gradient-to-br from-emerald-500/10 to-teal-500/10 border border-emerald-500/30 rounded-3xl backdrop-blur-sm">
                   <div className="flex items-center justify-between mb-6">
                     <div className="flex items-center gap-4">
@@ -248,13 +1321,14 @@ const SAP_TEST_CASE_CONVERTER = () => {
                         <CheckCircle className="w-8 h-8 text-white" />
                       </div>
                       <div className="text-left">
-                        <p className="font-bold text-white text-xl">File Loaded</p>
-                        <p className="text-emerald-400">{csvData.length} test cases detected</p>
+                        <p className="font-bold text-white text-xl">{parsing ? 'Loading File...' : 'File Loaded'}</p>
+                        <p className="text-emerald-400">{rowCount} test cases {parsing ? 'read so far' : 'detected'}</p>
                       </div>
                     </div>
                     <button
                       onClick={() => setCurrentStep(1)}
-                      className="flex items-center gap-3 px-8 py-4 bg-gradient-to-r from-emerald-500 to-teal-600 text-white rounded-xl font-semibold hover:shadow-2xl hover:shadow-emerald-500/50 transition-all duration-300 hover:scale-105"
+                      disabled={parsing}
+                      className="flex items-center gap-3 px-8 py-4 bg-gradient-to-r from-emerald-500 to-teal-600 text-white rounded-xl font-semibold hover:shadow-2xl hover:shadow-emerald-500/50 transition-all duration-300 hover:scale-105 disabled:opacity-50 disabled:cursor-not-allowed disabled:hover:scale-100"
                     >
                       Continue
                       <ChevronRight className="w-6 h-6" />
@@ -264,13 +1338,13 @@ const SAP_TEST_CASE_CONVERTER = () => {
                     <table className="w-full text-sm">
                       <thead>
                         <tr className="border-b border-white/10">
-                          {Object.keys(csvData[0] || {}).map((key) => (
+                          {preview.fields.map((key) => (
                             <th key={key} className="px-4 py-3 text-left font-semibold text-violet-400">{key}</th>
                           ))}
                         </tr>
                       </thead>
                       <tbody>
-                        {csvData.slice(0, 5).map((row, idx) => (
+                        {preview.rows.map((row, idx) => (
                           <tr key={idx} className="border-b border-white/5 hover:bg-white/5 transition-colors">
                             {Object.values(row).map((val, i) => (
                               <td key={i} className="px-4 py-3 text-slate-300">{val}</td>
@@ -300,10 +1374,10 @@ const SAP_TEST_CASE_CONVERTER = () => {
                 disabled={loading}
                 className="inline-flex items-center gap-4 px-10 py-5 bg-gradient-to-r from-blue-500 to-cyan-600 text-white rounded-2xl font-semibold hover:shadow-2xl hover:shadow-blue-500/50 transition-all duration-300 hover:scale-105 disabled:opacity-50 disabled:cursor-not-allowed disabled:hover:scale-100"
               >
-                {loading ? (
+                {activeStage === 'evaluate' ? (
                   <>
                     <Loader2 className="w-6 h-6 animate-spin" />
-                    Analyzing with AI...
+                    Analyzing with AI... {progress.total > 0 && `(${progress.done}/${progress.total} batches)`}
                   </>
                 ) : (
                   <>
@@ -312,6 +1386,7 @@ const SAP_TEST_CASE_CONVERTER = () => {
                   </>
                 )}
               </button>
+              {renderSchedulerMetrics()}
 
               <div className="mt-12 p-8 bg-gradient-to-br from-blue-500/10 to-cyan-500/10 border border-blue-500/30 rounded-3xl backdrop-blur-sm">
                 <div className="flex items-center justify-center gap-4">
@@ -319,10 +1394,20 @@ const SAP_TEST_CASE_CONVERTER = () => {
                     <FileText className="w-6 h-6 text-white" />
                   </div>
                   <p className="text-lg">
-                    <span className="font-bold text-white text-2xl">{csvData.length}</span>
+                    <span className="font-bold text-white text-2xl">{rowCount}</span>
                     <span className="text-slate-400 ml-2">test cases ready</span>
                   </p>
                 </div>
+                <div className="flex items-center justify-center gap-4 mt-6 text-sm text-slate-400">
+                  <span>Cache: {cacheStats.hits} hits / {cacheStats.misses} misses, {cacheStats.entries} entries</span>
+                  <button
+                    onClick={invalidateCache}
+                    disabled={loading}
+                    className="px-4 py-2 bg-white/10 text-white rounded-xl text-xs font-bold hover:bg-white/20 transition-all disabled:opacity-50 disabled:cursor-not-allowed"
+                  >
+                    Clear Cache
+                  </button>
+                </div>
               </div>
             </div>
           )}
@@ -334,66 +1419,76 @@ const SAP_TEST_CASE_CONVERTER = () => {
                 <div className="w-24 h-24 bg-gradient-to-br from-emerald-500 to-teal-600 rounded-3xl flex items-center justify-center mx-auto mb-8 shadow-2xl shadow-emerald-500/30">
                   <CheckCircle className="w-12 h-12 text-white" />
                 </div>
-                <h2 className="text-4xl font-bold text-white mb-3">Evaluation Complete</h2>
-                <p className="text-slate-400 text-lg">Review results and generate SAP queries</p>
+                <h2 className="text-4xl font-bold text-white mb-3">{activeStage === 'evaluate' ? 'Evaluating...' : 'Evaluation Complete'}</h2>
+                <p className="text-slate-400 text-lg">
+                  {activeStage === 'evaluate' ? `${evaluatedTests.length} of ${rowCount} test cases evaluated so far` : 'Review results and generate SAP queries'}
+                </p>
+                {renderSchedulerMetrics()}
               </div>
 
               <div className="grid grid-cols-3 gap-6 mb-10">
                 <div className="p-6 bg-gradient-to-br from-emerald-500/20 to-teal-500/20 border border-emerald-500/30 rounded-2xl backdrop-blur-sm hover:scale-105 transition-transform">
                   <p className="text-4xl font-bold text-emerald-400 mb-2">
-                    {evaluatedTests.filter(t => t.evaluation === 'pass').length}
+                    {evaluationStats.passed}
                   </p>
                   <p className="text-sm text-emerald-300 font-semibold">Passed Tests</p>
                 </div>
                 <div className="p-6 bg-gradient-to-br from-red-500/20 to-pink-500/20 border border-red-500/30 rounded-2xl backdrop-blur-sm hover:scale-105 transition-transform">
                   <p className="text-4xl font-bold text-red-400 mb-2">
-                    {evaluatedTests.filter(t => t.evaluation === 'fail').length}
+                    {evaluationStats.failed}
                   </p>
                   <p className="text-sm text-red-300 font-semibold">Failed Tests</p>
                 </div>
                 <div className="p-6 bg-gradient-to-br from-blue-500/20 to-cyan-500/20 border border-blue-500/30 rounded-2xl backdrop-blur-sm hover:scale-105 transition-transform">
                   <p className="text-4xl font-bold text-blue-400 mb-2">
-                    {Math.round(evaluatedTests.reduce((sum, t) => sum + (t.score || 0), 0) / evaluatedTests.length)}%
+                    {averageScore}%
                   </p>
                   <p className="text-sm text-blue-300 font-semibold">Average Score</p>
                 </div>
               </div>
 
-              <div className="max-h-96 overflow-auto mb-10 rounded-2xl border border-white/10">
-                {evaluatedTests.map((test, idx) => (
-                  <div key={idx} className={`p-6 border-b border-white/10 last:border-b-0 backdrop-blur-sm transition-all hover:bg-white/5 ${
-                    test.evaluation === 'pass' ? 'bg-emerald-500/5' : 'bg-red-500/5'
-                  }`}>
-                    <div className="flex items-start justify-between">
-                      <div className="flex-1">
-                        <p className="font-semibold text-white text-lg">{test.testCase}</p>
-                        <p className="text-sm text-slate-400 mt-2">{test.feedback}</p>
-                      </div>
-                      <div className="flex items-center gap-3 ml-6">
-                        <span className={`px-4 py-2 rounded-xl text-xs font-bold ${
-                          test.evaluation === 'pass' ? 'bg-gradient-to-r from-emerald-500 to-teal-600 text-white' : 'bg-gradient-to-r from-red-500 to-pink-600 text-white'
-                        }`}>
-                          {test.evaluation.toUpperCase()}
-                        </span>
-                        <span className="px-4 py-2 bg-white/10 text-white rounded-xl text-xs font-bold backdrop-blur-sm">
-                          {test.score}%
-                        </span>
+              <React.Profiler id="evaluations" onRender={recordRender}>
+                <VirtualList
+                  items={evaluatedTests}
+                  itemHeight={EVAL_ROW_HEIGHT}
+                  maxHeight={EVAL_LIST_HEIGHT}
+                  className="mb-10 rounded-2xl border border-white/10"
+                  renderItem={(test) => (
+                    <div className={`h-full p-6 border-b border-white/10 backdrop-blur-sm transition-all hover:bg-white/5 ${
+                      test.evaluation === 'pass' ? 'bg-emerald-500/5' : 'bg-red-500/5'
+                    }`}>
+                      <div className="flex items-start justify-between">
+                        <div className="flex-1 min-w-0">
+                          <p className="font-semibold text-white text-lg truncate">{test.testCase}</p>
+                          <p className="text-sm text-slate-400 mt-2 line-clamp-2">{test.feedback}</p>
+                        </div>
+                        <div className="flex items-center gap-3 ml-6">
+                          <span className={`px-4 py-2 rounded-xl text-xs font-bold ${
+                            test.evaluation === 'pass' ? 'bg-gradient-to-r from-emerald-500 to-teal-600 text-white' : 'bg-gradient-to-r from-red-500 to-pink-600 text-white'
+                          }`}>
+                            {String(test.evaluation).toUpperCase()}
+                          </span>
+                          <span className="px-4 py-2 bg-white/10 text-white rounded-xl text-xs font-bold backdrop-blur-sm">
+                            {test.score}%
+                          </span>
+                        </div>
                       </div>
                     </div>
-                  </div>
-                ))}
-              </div>
+                  )}
+                />
+              </React.Profiler>
 
-              <div className="text-center">
+              <div className="flex justify-center gap-6">
                 <button
                   onClick={generateSAPQueries}
-                  disabled={loading || evaluatedTests.filter(t => t.evaluation === 'pass').length === 0}
+                  disabled={loading || evaluationStats.passed === 0}
                   className="inline-flex items-center gap-4 px-10 py-5 bg-gradient-to-r from-violet-500 to-purple-600 text-white rounded-2xl font-semibold hover:shadow-2xl hover:shadow-violet-500/50 transition-all duration-300 hover:scale-105 disabled:opacity-50 disabled:cursor-not-allowed disabled:hover:scale-100"
                 >
                   {loading ? (
                     <>
                       <Loader2 className="w-6 h-6 animate-spin" />
-                      Generating SAP Queries...
+                      {activeStage === 'evaluate' ? 'Evaluating Test Cases...' : 'Generating SAP Queries...'}{' '}
+                      {progress.total > 0 && `(${progress.done}/${progress.total} batches)`}
                     </>
                   ) : (
                     <>
@@ -402,6 +1497,7 @@ const SAP_TEST_CASE_CONVERTER = () => {
                     </>
                   )}
                 </button>
+                {renderExportControls()}
               </div>
             </div>
           )}
@@ -413,51 +1509,80 @@ const SAP_TEST_CASE_CONVERTER = () => {
                 <div className="w-24 h-24 bg-gradient-to-br from-pink-500 to-rose-600 rounded-3xl flex items-center justify-center mx-auto mb-8 shadow-2xl shadow-pink-500/30">
                   <BarChart3 className="w-12 h-12 text-white" />
                 </div>
-                <h2 className="text-4xl font-bold text-white mb-3">Results Ready</h2>
-                <p className="text-slate-400 text-lg">SAP queries generated successfully</p>
+                <h2 className="text-4xl font-bold text-white mb-3">{activeStage === 'generate' ? 'Generating...' : executing ? 'Executing Queries...' : 'Results Ready'}</h2>
+                <p className="text-slate-400 text-lg">
+                  {activeStage === 'generate' ? `${sapQueries.length} SAP queries generated so far` :
+                    executing ? `${executedCount} of ${queryResults.length} queries executed on ${queryPool.name}` :
+                    'SAP queries generated successfully'}
+                </p>
+                {renderSchedulerMetrics()}
               </div>
 
-              <div className="space-y-6 mb-10">
-                {sapQueries.map((query, idx) => (
-                  <div key={idx} className="rounded-2xl overflow-hidden border border-white/10 backdrop-blur-sm hover:border-violet-500/50 transition-all">
-                    <div className="bg-gradient-to-r from-violet-500/20 to-purple-500/20 px-8 py-6 border-b border-white/10">
-                      <div className="flex items-center justify-between">
-                        <div className="flex-1">
-                          <h3 className="font-bold text-white text-xl mb-2">{query.testCase}</h3>
-                          <p className="text-sm text-slate-300">{query.description}</p>
+              <React.Profiler id="queries" onRender={recordRender}>
+                <VirtualList
+                  items={sapQueries}
+                  itemHeight={QUERY_ROW_HEIGHT}
+                  maxHeight={QUERY_LIST_HEIGHT}
+                  className="mb-10"
+                  renderItem={(query, idx) => (
+                    <div className="h-full pb-6">
+                      <div className="h-full flex flex-col rounded-2xl overflow-hidden border border-white/10 backdrop-blur-sm hover:border-violet-500/50 transition-all">
+                        <div className="bg-gradient-to-r from-violet-500/20 to-purple-500/20 px-8 py-6 border-b border-white/10">
+                          <div className="flex items-center justify-between">
+                            <div className="flex-1 min-w-0">
+                              <h3 className="font-bold text-white text-xl mb-2 truncate">{query.testCase}</h3>
+                              <p className="text-sm text-slate-300 truncate">{query.description}</p>
+                            </div>
+                            <div className="flex items-center gap-3">
+                              <span className={`px-5 py-2 text-white rounded-xl text-sm font-bold shadow-lg ${
+                                queryResults[idx]?.status === 'success' ? 'bg-gradient-to-r from-emerald-500 to-teal-600' :
+                                queryResults[idx]?.status === 'pending' ? 'bg-white/10' :
+                                'bg-gradient-to-r from-red-500 to-pink-600'
+                              }`} title={queryResults[idx]?.error}>
+                                {queryResults[idx]?.status === 'success' ? `${queryResults[idx].rows} rows · ${queryResults[idx].latencyMs} ms` :
+                                  queryResults[idx]?.status === 'pending' ? 'Pending' :
+                                  queryResults[idx]?.status.toUpperCase()}
+                              </span>
+                              <button
+                                onClick={() => copyToClipboard(query.sapQuery)}
+                                className="px-6 py-3 bg-gradient-to-r from-violet-500 to-purple-600 text-white rounded-xl text-sm font-bold hover:shadow-2xl hover:shadow-violet-500/50 transition-all hover:scale-105"
+                              >
+                                Copy Query
+                              </button>
+                            </div>
+                          </div>
                         </div>
-                        <div className="flex items-center gap-3">
-                          <span className="px-5 py-2 bg-gradient-to-r from-emerald-500 to-teal-600 text-white rounded-xl text-sm font-bold shadow-lg">
-                            {queryResults[idx]?.rows} rows
-                          </span>
-                          <button
-                            onClick={() => copyToClipboard(query.sapQuery)}
-                            className="px-6 py-3 bg-gradient-to-r from-violet-500 to-purple-600 text-white rounded-xl text-sm font-bold hover:shadow-2xl hover:shadow-violet-500/50 transition-all hover:scale-105"
-                          >
-                            Copy Query
-                          </button>
+                        <div className="flex-1 min-h-0 overflow-auto p-8 bg-slate-950/80 backdrop-blur-sm">
+                          <pre className="text-sm text-emerald-400 font-mono overflow-x-auto">{query.sapQuery}</pre>
+                          {queryResults[idx]?.status === 'error' && (
+                            <p className="mt-4 text-sm text-red-400">{queryResults[idx].error}</p>
+                          )}
                         </div>
                       </div>
                     </div>
-                    <div className="p-8 bg-slate-950/80 backdrop-blur-sm">
-                      <pre className="text-sm text-emerald-400 font-mono overflow-x-auto">{query.sapQuery}</pre>
-                    </div>
-                  </div>
-                ))}
-              </div>
+                  )}
+                />
+              </React.Profiler>
 
               <div className="flex justify-center gap-6">
-                <button
-                  onClick={exportResults}
-                  className="inline-flex items-center gap-4 px-10 py-5 bg-gradient-to-r from-violet-500 to-purple-600 text-white rounded-2xl font-semibold hover:shadow-2xl hover:shadow-violet-500/50 transition-all duration-300 hover:scale-105"
-                >
-                  <Download className="w-6 h-6" />
-                  Export Results
-                </button>
+                {executing && (
+                  <button
+                    onClick={cancelQueries}
+                    className="inline-flex items-center gap-4 px-10 py-5 bg-gradient-to-r from-red-500 to-pink-600 text-white rounded-2xl font-semibold hover:shadow-2xl hover:shadow-red-500/50 transition-all duration-300 hover:scale-105"
+                  >
+                    <Loader2 className="w-6 h-6 animate-spin" />
+                    Cancel Queries
+                  </button>
+                )}
+                {renderExportControls()}
                 <button
                   onClick={() => {
-                    setCsvData([]);
+                    cancelQueries();
+                    columnStore.current = createColumnStore();
+                    setRowCount(0);
+                    setPreview({ fields: [], rows: [] });
                     setEvaluatedTests([]);
+                    setEvaluationStats(emptyEvaluationStats());
                     setSapQueries([]);
                     setQueryResults([]);
                     setCurrentStep(0);
@@ -0,0 +1,234 @@
+// Offline benchmark for the client-side helpers in demo.py.
+//
+// sap_bench.py times the Python port of the pipeline; this script times the
+// code the browser actually runs.  It loads the plain-JavaScript part of
+// demo.py (everything above the React components), replaces `fetch` with a
+// replay of fixtures/recorded_responses.json streamed as Messages API
+// server-sent events, lifts the scheduler's rate budgets so only
+// client-side cost is measured, and times appendRows, the runChunked cache
+// lookup / prompt build / stream parse / merge, the stand-in query adapter
+// and the export serialisers through the component's own tracer:
+//
+//     node demo_bench.mjs --sizes 100,1000,10000 --repeat 3 --save demo-bench.json
+//     node demo_bench.mjs --baseline demo-bench.json --threshold 0.2
+//
+// Results use the same shape as sap_bench.py.  With --baseline the exit
+// status is 1 when any stage is slower than the baseline by more than
+// --threshold (as a fraction).  React rendering is not covered; its
+// timings are in the trace the UI exports.
+
+import { readFileSync, writeFileSync } from 'node:fs';
+import { dirname, join } from 'node:path';
+import { fileURLToPath } from 'node:url';
+
+const ROOT = dirname(fileURLToPath(import.meta.url));
+const DEMO = join(ROOT, 'demo.py');
+const FIXTURES = join(ROOT, 'fixtures', 'recorded_responses.json');
+const SIZES = [100, 1000, 10000, 100000];
+const STAGES = ['csv.append', 'cache.lookup', 'prompt.build', 'model.request', 'json.parse', 'merge', 'query.execute', 'export.write'];
+const PARSE_CHUNK_ROWS = 5000;
+const NOISE_FLOOR_MS = 5.0;
+
+const MODULES = ['SD', 'MM', 'FI', 'PP', 'CO'];
+const ACTIONS = ['Create', 'Change', 'Display', 'Post', 'Release', 'Reverse'];
+const OBJECTS = ['sales order', 'purchase order', 'material', 'customer', 'vendor invoice', 'delivery'];
+
+const recorded = JSON.parse(readFileSync(FIXTURES, 'utf8'));
+
+const loadHelpers = (fetchImpl) => {
+  const source = readFileSync(DEMO, 'utf8');
+  const start = source.indexOf('const API_URL');
+  const end = source.indexOf('const VirtualList');
+  if (start === -1 || end === -1) throw new Error('demo.py layout changed: helper block not found');
+  const body = source.slice(start, end)
+    .replace(/const SCHEDULER_RPM = \d+;/, 'const SCHEDULER_RPM = Infinity;')
+    .replace(/const SCHEDULER_INPUT_TPM = \d+;/, 'const SCHEDULER_INPUT_TPM = Infinity;');
+  const names = ['tracer', 'createColumnStore', 'appendRows', 'storeSource', 'arraySource', 'runChunked', 'resultCache',
+    'queryPool', 'executeQueries', 'exportStream', 'EXPORT_FORMATS', 'EVALUATE_PROMPT', 'GENERATE_PROMPT', 'STREAM_FLUSH_MS'];
+  return new Function('fetch', `${body}\nreturn { ${names.join(', ')} };`)(fetchImpl);
+};
+
+const sumCodes = (text) => [...text].reduce((sum, ch) => sum + ch.codePointAt(0), 0);
+
+// Answers pipeline prompts from recorded responses, one line per input row,
+// picking lines exactly as sap_bench.ReplayTransport does.
+const createReplayFetch = (templates) => async (url, { body }) => {
+  const prompt = JSON.parse(body).messages[0].content;
+  const match = templates.find(({ prefix, suffix }) => prompt.startsWith(prefix) && prompt.endsWith(suffix));
+  if (!match) throw new Error('prompt does not match a pipeline template');
+  const batch = JSON.parse(prompt.slice(match.prefix.length, prompt.length - match.suffix.length));
+  const events = [{ type: 'message_start', message: { usage: { input_tokens: Math.ceil(prompt.length / 4) } } }];
+  batch.forEach((row) => {
+    const name = match.name(row);
+    const line = JSON.stringify({ testCase: name, ...match.lines[sumCodes(name) % match.lines.length] });
+    events.push({ type: 'content_block_delta', delta: { type: 'text_delta', text: `${line}\n` } });
+  });
+  events.push({ type: 'message_delta', delta: { stop_reason: 'end_turn' }, usage: { output_tokens: 0 } });
+  return new Response(events.map(event => `data: ${JSON.stringify(event)}\n\n`).join(''));
+};
+
+const seededRandom = (seed) => () => {
+  seed = (seed * 1664525 + 1013904223) >>> 0;
+  return seed / 4294967296;
+};
+
+const syntheticRows = (count, seed = 7) => {
+  const rnd = seededRandom(seed);
+  const pick = (values) => values[Math.floor(rnd() * values.length)];
+  return Array.from({ length: count }, (_, i) => {
+    const action = pick(ACTIONS);
+    const object = pick(OBJECTS);
+    const steps = Array.from({ length: 2 + Math.floor(rnd() * 4) },
+      (_, n) => `Step ${n + 1}: ${pick(ACTIONS).toLowerCase()} ${pick(OBJECTS)}`);
+    return {
+      'Test Case': `TC-${String(i).padStart(6, '0')} ${action} ${object}`,
+      Module: pick(MODULES),
+      Steps: steps.join('; '),
+      'Expected Result': `${object[0].toUpperCase()}${object.slice(1)} is ${action.toLowerCase()}d without errors`
+    };
+  });
+};
+
+const median = (values) => {
+  const sorted = [...values].sort((a, b) => a - b);
+  const mid = Math.floor(sorted.length / 2);
+  return sorted.length % 2 ? sorted[mid] : (sorted[mid - 1] + sorted[mid]) / 2;
+};
+
+const round = (value, digits = 3) => Math.round(value * 10 ** digits) / 10 ** digits;
+
+const runOnce = async (helpers, rows, format) => {
+  const { tracer, resultCache } = helpers;
+  tracer.reset(`bench-${rows.length}`);
+  resultCache.invalidate();
+
+  const store = helpers.createColumnStore();
+  const fields = Object.keys(rows[0] || {});
+  for (let start = 0; start < rows.length; start += PARSE_CHUNK_ROWS) {
+    const endAppend = tracer.start('csv.append');
+    helpers.appendRows(store, fields, rows.slice(start, start + PARSE_CHUNK_ROWS));
+    endAppend();
+  }
+
+  // Mirrors streamInto in the component: partial snapshots are taken at most
+  // once per STREAM_FLUSH_MS.
+  const throttled = () => {
+    let timer = null;
+    let latest = null;
+    return {
+      onPartial: (snapshot) => {
+        latest = snapshot;
+        if (!timer) timer = setTimeout(() => { timer = null; latest(); }, helpers.STREAM_FLUSH_MS);
+      },
+      cancel: () => clearTimeout(timer)
+    };
+  };
+
+  const evaluateStream = throttled();
+  const evaluated = await helpers.runChunked(helpers.storeSource(store), helpers.EVALUATE_PROMPT,
+    { onProgress: () => {}, onPartial: evaluateStream.onPartial });
+  evaluateStream.cancel();
+  const passed = evaluated.results.filter(test => test.evaluation === 'pass');
+  const generateStream = throttled();
+  const generated = await helpers.runChunked(helpers.arraySource(passed), helpers.GENERATE_PROMPT,
+    { onProgress: () => {}, onPartial: generateStream.onPartial });
+  generateStream.cancel();
+
+  const queries = generated.results;
+  const queryResults = new Array(queries.length);
+  await helpers.executeQueries(helpers.queryPool, queries.map(q => q.sapQuery), new AbortController().signal,
+    (idx, result) => { queryResults[idx] = result; });
+
+  const endExport = tracer.start('export.write', { format });
+  const data = { evaluatedTests: evaluated.results, sapQueries: queries, queryResults };
+  const pieces = helpers.EXPORT_FORMATS[format].pieces(data, { timestamp: new Date().toISOString(), partial: false });
+  const reader = helpers.exportStream(pieces).getReader();
+  let bytes = 0;
+  for (let next = await reader.read(); !next.done; next = await reader.read()) bytes += next.value.length;
+  endExport({ bytes });
+  return tracer.summary();
+};
+
+const replayTemplate = (template, lines, name) => {
+  const [prefix, suffix] = template.split('{rows}');
+  return { prefix, suffix, lines, name };
+};
+
+const bench = async (sizes, repeat, format, log) => {
+  const templates = [];
+  const helpers = loadHelpers(createReplayFetch(templates));
+  templates.push(
+    replayTemplate(helpers.EVALUATE_PROMPT, recorded.evaluate, row => row['Test Case'] || Object.values(row)[0] || ''),
+    replayTemplate(helpers.GENERATE_PROMPT, recorded.generate, row => row.testCase || '')
+  );
+
+  const results = {};
+  for (const size of sizes) {
+    const rows = syntheticRows(size);
+    const runs = [];
+    for (let i = 0; i < repeat; i++) {
+      const started = performance.now();
+      const summary = await runOnce(helpers, rows, format);
+      runs.push({ ms: performance.now() - started, summary });
+    }
+    const wall = median(runs.map(run => run.ms));
+    results[String(size)] = {
+      wallMs: round(wall),
+      rowsPerSecond: wall > 0 ? round(size / (wall / 1000), 1) : 0,
+      stages: Object.fromEntries(STAGES.map(stage => [stage,
+        round(median(runs.map(run => run.summary.stages[stage]?.totalMs || 0)))])),
+      counters: runs[runs.length - 1].summary.counters
+    };
+    log(formatRow(size, results[String(size)]));
+  }
+  return { format, repeat, sizes: results };
+};
+
+const compare = (current, baseline, threshold) => {
+  const regressions = [];
+  Object.entries(current.sizes).forEach(([size, entry]) => {
+    const before = baseline.sizes?.[size];
+    if (!before) return;
+    [['wall', entry.wallMs], ...Object.entries(entry.stages)].forEach(([stage, ms]) => {
+      const old = stage === 'wall' ? before.wallMs : before.stages?.[stage];
+      if (old !== undefined && ms - old > NOISE_FLOOR_MS && ms > old * (1 + threshold)) regressions.push([size, stage, old, ms]);
+    });
+  });
+  return regressions;
+};
+
+const formatRow = (size, entry) => {
+  const stages = STAGES.map(stage => `${stage}=${entry.stages[stage].toFixed(1)}`).join('  ');
+  return `${String(size).padStart(7)} rows  ${entry.wallMs.toFixed(1).padStart(10)} ms  ${entry.rowsPerSecond.toFixed(1).padStart(10)} rows/s  ${stages}`;
+};
+
+const parseArgs = (argv) => {
+  const args = { sizes: SIZES, repeat: 3, format: 'json', save: null, baseline: null, threshold: 0.2 };
+  for (let i = 0; i < argv.length; i += 2) {
+    const [flag, value] = [argv[i], argv[i + 1]];
+    if (flag === '--sizes') args.sizes = value.split(',').filter(size => size.trim()).map(Number);
+    else if (flag === '--repeat') args.repeat = Number(value);
+    else if (flag === '--format') args.format = value;
+    else if (flag === '--save') args.save = value;
+    else if (flag === '--baseline') args.baseline = value;
+    else if (flag === '--threshold') args.threshold = Number(value);
+    else throw new Error(`unknown option ${flag}`);
+  }
+  return args;
+};
+
+const main = async () => {
+  const args = parseArgs(process.argv.slice(2));
+  const results = await bench(args.sizes, args.repeat, args.format, console.log);
+  if (args.save) writeFileSync(args.save, JSON.stringify(results, null, 2));
+  if (!args.baseline) return 0;
+  const regressions = compare(results, JSON.parse(readFileSync(args.baseline, 'utf8')), args.threshold);
+  regressions.forEach(([size, stage, old, ms]) =>
+    console.error(`regression: ${size} rows ${stage} ${old.toFixed(1)} ms -> ${ms.toFixed(1)} ms`));
+  return regressions.length ? 1 : 0;
+};
+
+main().then((code) => process.exit(code), (err) => {
+  console.error(err);
+  process.exit(2);
+});
@@ -0,0 +1,324 @@
+"""Compiled, cached and parallel rendering for the Document Generator Agent.
+
+Proposal templates are HTML (or plain text) with a small syntax:
+
+* ``{{ tender.authority }}`` or ``{{ row.price | money }}`` inserts a value;
+  the filters are ``money``, ``number``, ``upper`` and ``raw``.  HTML
+  templates are escaped unless ``raw`` is used.
+* ``{% section pricing teams=sales,supply %} ... {% endsection %}`` marks a
+  top-level section; ``teams`` limits it to those team variants.
+* ``{% rows pricing.lines %} ... {% endrows %}`` repeats its body per item,
+  with the item available as ``row``.
+
+Templates are compiled once per process and cached by path and mtime.
+Rendering writes each piece to a fragment cache keyed by the piece's
+template source and the exact values it reads.  Table rows are cached in
+blocks of ``ROW_BLOCK``.  After a price change, only the fragments that
+read a changed price are rendered again; everything else is copied from
+the cache.  The output file is assembled by streaming fragments, so a
+3,000-line schedule never sits in memory as one document.
+``render_variants`` renders language and team variants in a process pool::
+
+    from doc_render import DocumentRenderer, render_variants
+
+    DocumentRenderer(".render-cache").render("templates/proposal.html", data, "out/proposal-en.html")
+    render_variants([
+        {"template": "templates/proposal.html", "data": data_fr, "output": "out/fr.pdf", "language": "fr"},
+        {"template": "templates/proposal.html", "data": data, "output": "out/supply.pdf", "team": "supply"},
+    ])
+
+PDF output needs ``weasyprint``, imported only when a ``.pdf`` target is
+requested.
+"""
+
+import concurrent.futures
+import hashlib
+import html
+import json
+import os
+import re
+import shutil
+import threading
+
+ROW_BLOCK = 250
+RENDER_WORKERS = os.cpu_count() or 2
+RTL_LANGUAGES = {"ar", "he", "fa", "ur"}
+
+TAG_PATTERN = re.compile(r"{{\s*(.+?)\s*}}|{%\s*(.+?)\s*%}", re.DOTALL)
+FILTERS = {
+    "money": lambda value: f"{float(value):,.2f}",
+    "number": lambda value: f"{value:,}" if isinstance(value, (int, float)) else str(value),
+    "upper": lambda value: str(value).upper(),
+    "raw": lambda value: value,
+}
+
+
+class RenderError(Exception):
+    """Raised when a template cannot be compiled or a document cannot be written."""
+
+
+def resolve(data, path):
+    value = data
+    for part in path:
+        if isinstance(value, dict):
+            value = value.get(part)
+        elif isinstance(value, (list, tuple)) and part.isdigit() and int(part) < len(value):
+            value = value[int(part)]
+        else:
+            return None
+        if value is None:
+            return None
+    return value
+
+
+class Piece:
+    """A run of literal text and fields, or a ``rows`` loop over a list.
+
+    ``paths`` are the data paths the piece reads outside its loop body;
+    together with ``source`` they form its fragment cache key.
+    """
+
+    def __init__(self, source, ops, rows=None, body=None):
+        self.source = source
+        self.ops = ops
+        self.rows = rows
+        self.body = body
+        self.paths = sorted({op[1] for op in ops if op[0] == "field" and op[1][0] != "row"})
+        self.row_paths = sorted({op[1] for op in body or () if op[0] == "field" and op[1][0] != "row"})
+        self.digest = hashlib.sha256(source.encode()).hexdigest()
+
+
+class Section:
+    def __init__(self, name, teams, pieces):
+        self.name = name
+        self.teams = teams
+        self.pieces = pieces
+
+
+def _field(expression):
+    name, *filters = [part.strip() for part in expression.split("|")]
+    unknown = [f for f in filters if f not in FILTERS]
+    if unknown:
+        raise RenderError(f"unknown filter {unknown[0]!r} in {{{{ {expression} }}}}")
+    return ("field", tuple(name.split(".")), tuple(filters))
+
+
+def compile_source(source):
+    """Compile template text into ``Section`` objects."""
+    sections, current, pieces, ops, start = [], None, [], [], 0
+    rows = body = None
+    cursor = 0
+
+    def flush(end):
+        nonlocal ops, start
+        if ops:
+            pieces.append(Piece(source[start:end], ops))
+        ops, start = [], end
+
+    def close_section(name, teams):
+        nonlocal pieces
+        if pieces:
+            sections.append(Section(name, teams, pieces))
+        pieces = []
+
+    for match in TAG_PATTERN.finditer(source):
+        text = source[cursor:match.start()]
+        target = body if body is not None else ops
+        if text:
+            target.append(("text", text))
+        cursor = match.end()
+        if match.group(1):
+            target.append(_field(match.group(1)))
+            continue
+        words = match.group(2).split()
+        keyword = words[0]
+        if keyword == "section":
+            if current or body is not None:
+                raise RenderError(f"nested section {words[1:]!r}")
+            flush(match.start())
+            close_section("_", None)
+            options = dict(word.split("=", 1) for word in words[2:] if "=" in word)
+            current = (words[1], frozenset(options["teams"].split(",")) if "teams" in options else None)
+            start = match.end()
+        elif keyword == "endsection":
+            if not current or body is not None:
+                raise RenderError("endsection without section")
+            flush(match.start())
+            close_section(*current)
+            current, start = None, match.end()
+        elif keyword == "rows":
+            if body is not None:
+                raise RenderError("nested rows")
+            flush(match.start())
+            rows, body, row_start = tuple(words[1].split(".")), [], match.start()
+        elif keyword == "endrows":
+            if body is None:
+                raise RenderError("endrows without rows")
+            pieces.append(Piece(source[row_start:match.end()], [], rows, body))
+            rows, body, start = None, None, match.end()
+        else:
+            raise RenderError(f"unknown tag {{% {keyword} %}}")
+    if current or body is not None:
+        raise RenderError("unclosed section or rows")
+    if source[cursor:]:
+        ops.append(("text", source[cursor:]))
+    flush(len(source))
+    close_section("_", None)
+    return sections
+
+
+class CompiledTemplate:
+    def __init__(self, path):
+        with open(path, encoding="utf-8") as handle:
+            source = handle.read()
+        self.path = path
+        self.escape = os.path.splitext(path)[1].lower() in (".html", ".htm", ".xhtml")
+        self.sections = compile_source(source)
+
+
+_templates = {}
+_templates_lock = threading.Lock()
+
+
+def load_template(path):
+    """Compiled template for ``path``, cached until the file changes."""
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+    with _templates_lock:
+        template = _templates.get(key)
+    if template is None:
+        template = CompiledTemplate(path)
+        with _templates_lock:
+            _templates[key] = template
+    return template
+
+
+class FragmentCache:
+    """Rendered fragments on disk, keyed by content hash."""
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def path(self, key):
+        return os.path.join(self.directory, key[:2], key)
+
+    def has(self, key):
+        return os.path.exists(self.path(key))
+
+    def write(self, key, chunks):
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporary, "w", encoding="utf-8") as handle:
+            for chunk in chunks:
+                handle.write(chunk)
+        os.replace(temporary, path)
+
+
+class DocumentRenderer:
+    """Renders compiled templates through a ``FragmentCache``."""
+
+    def __init__(self, cache_dir=".render-cache", row_block=ROW_BLOCK):
+        self.cache = FragmentCache(cache_dir)
+        self.row_block = row_block
+
+    @staticmethod
+    def _emit(ops, data, row, escape):
+        for op in ops:
+            if op[0] == "text":
+                yield op[1]
+                continue
+            _, path, filters = op
+            value = resolve(row, path[1:]) if path[0] == "row" else resolve(data, path)
+            if value is None:
+                continue
+            for name in filters:
+                value = FILTERS[name](value)
+            yield html.escape(str(value)) if escape and "raw" not in filters else str(value)
+
+    @staticmethod
+    def _key(*parts):
+        return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()
+
+    def _fragments(self, template, data, team, stats):
+        for section in template.sections:
+            if team and section.teams is not None and team not in section.teams:
+                continue
+            section_stats = stats["sections"].setdefault(section.name, {"rendered": 0, "reused": 0})
+            for piece in section.pieces:
+                values = [resolve(data, path) for path in piece.paths]
+                if piece.rows is None:
+                    keys = [(self._key(piece.digest, template.escape, values), None)]
+                else:
+                    items = resolve(data, piece.rows) or []
+                    shared = [resolve(data, path) for path in piece.row_paths]
+                    keys = [(self._key(piece.digest, template.escape, shared, items[start:start + self.row_block]),
+                             items[start:start + self.row_block])
+                            for start in range(0, len(items), self.row_block)]
+                for key, block in keys:
+                    if self.cache.has(key):
+                        section_stats["reused"] += 1
+                    else:
+                        if block is None:
+                            chunks = self._emit(piece.ops, data, None, template.escape)
+                        else:
+                            chunks = (chunk for item in block
+                                      for chunk in self._emit(piece.body, data, item, template.escape))
+                        self.cache.write(key, chunks)
+                        section_stats["rendered"] += 1
+                    yield key
+
+    def render(self, template_path, data, output, team=None, language=None):
+        """Render one document to ``output`` (``.html``, ``.txt`` or ``.pdf``) and return stats."""
+        template = load_template(template_path)
+        data = dict(data, language=language or data.get("language", "en"),
+                    direction="rtl" if (language or data.get("language")) in RTL_LANGUAGES else "ltr", team=team)
+        stats = {"output": output, "team": team, "language": data["language"], "sections": {}}
+        pdf = output.lower().endswith(".pdf")
+        target = f"{output}.html" if pdf else output
+        os.makedirs(os.path.dirname(os.path.abspath(target)), exist_ok=True)
+        temporary = f"{target}.tmp"
+        with open(temporary, "w", encoding="utf-8") as out:
+            for key in self._fragments(template, data, team, stats):
+                with open(self.cache.path(key), encoding="utf-8") as fragment:
+                    shutil.copyfileobj(fragment, out)
+        os.replace(temporary, target)
+        if pdf:
+            write_pdf(target, output)
+        stats["rendered"] = sum(section["rendered"] for section in stats["sections"].values())
+        stats["reused"] = sum(section["reused"] for section in stats["sections"].values())
+        return stats
+
+
+def write_pdf(html_path, pdf_path):
+    try:
+        from weasyprint import HTML
+    except ImportError as exc:
+        raise RenderError("PDF output needs weasyprint (pip install weasyprint)") from exc
+    HTML(filename=html_path).write_pdf(pdf_path)
+
+
+def _render_job(job, cache_dir):
+    renderer = DocumentRenderer(cache_dir)
+    return renderer.render(job["template"], job["data"], job["output"], job.get("team"), job.get("language"))
+
+
+def render_variants(jobs, cache_dir=".render-cache", workers=RENDER_WORKERS):
+    """Render many documents concurrently in a process pool, sharing one fragment cache.
+
+    Each job is a dict with ``template``, ``data`` and ``output``, plus
+    optional ``team`` and ``language``.  Returns per-job stats in order;
+    a failed job's entry has an ``error`` instead.
+    """
+    if workers <= 1 or len(jobs) <= 1:
+        return [_render_job(job, cache_dir) for job in jobs]
+    results = [None] * len(jobs)
+    with concurrent.futures.ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+        futures = {pool.submit(_render_job, job, cache_dir): index for index, job in enumerate(jobs)}
+        for future in concurrent.futures.as_completed(futures):
+            index = futures[future]
+            try:
+                results[index] = future.result()
+            except Exception as exc:
+                results[index] = {"output": jobs[index]["output"], "error": str(exc)}
+    return results
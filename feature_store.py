@@ -0,0 +1,276 @@
+"""Precomputed feature store shared by the Competitor Analysis, Risk &
+Compliance and Business Impact agents.
+
+Tender outcomes (our bid, the winning bid, competing bids) are folded
+into additive aggregates per molecule, region, authority, competitor,
+molecule/region and competitor/molecule.  The aggregates are counts,
+wins, value and price sums.  They live in SQLite and are refreshed
+incrementally from a high-water mark, so a refresh costs as much as the
+new outcomes and not the whole history.  Readers get them from an
+in-process NumPy column cache, rebuilt per kind only after that kind
+changed::
+
+    from feature_store import FeatureStore
+
+    store = FeatureStore("features.sqlite3")
+    store.refresh(lambda after, limit: fetch_outcomes(after, limit))   # or store.ingest(rows)
+    store.competitor_features("paracetamol", "AE")
+    store.risk_features(tender)
+    store.impact_features(tender)
+
+``tender_dag`` passes the store to all three agents as their optional
+``features`` input.
+"""
+
+import datetime
+import json
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+KINDS = ("molecule", "region", "authority", "competitor", "molecule_region", "competitor_molecule")
+STATS = ("n", "wins", "value", "price", "price_sq", "ratio", "ratio_n", "last")
+REFRESH_BATCH = 50000
+TOP_COMPETITORS = 5
+
+
+def _text(value):
+    return str(value or "").strip().lower()
+
+
+def _timestamp(value):
+    if isinstance(value, (int, float)):
+        return float(value)
+    if not value:
+        return 0.0
+    try:
+        return datetime.datetime.fromisoformat(str(value)).timestamp()
+    except ValueError:
+        return 0.0
+
+
+def aggregate(rows):
+    """Fold outcome rows into ``{(kind, key): [n, wins, value, price, price_sq, ratio, ratio_n, last]}``.
+
+    Each row is a dict with ``molecule``, ``region``, ``authority``,
+    ``date``, ``quantity``, ``ourPrice``, ``winningPrice``, ``won``,
+    ``winner`` and ``competitors`` (``[{"name", "price"}]``).
+    """
+    totals = {}
+
+    def add(kind, key, won, value, price, ratio, last):
+        stats = totals.setdefault((kind, key), [0, 0, 0.0, 0.0, 0.0, 0.0, 0, 0.0])
+        stats[0] += 1
+        stats[1] += 1 if won else 0
+        stats[2] += value
+        stats[3] += price
+        stats[4] += price * price
+        if ratio is not None:
+            stats[5] += ratio
+            stats[6] += 1
+        stats[7] = max(stats[7], last)
+
+    for row in rows:
+        molecule, region, authority = _text(row.get("molecule")), _text(row.get("region")), _text(row.get("authority"))
+        quantity = float(row.get("quantity") or 0)
+        our_price = float(row.get("ourPrice") or 0)
+        winning = float(row.get("winningPrice") or 0)
+        won = bool(row.get("won"))
+        last = _timestamp(row.get("date"))
+        ratio = our_price / winning if our_price and winning else None
+        value = winning * quantity
+        for kind, key in (("molecule", molecule), ("region", region), ("authority", authority),
+                          ("molecule_region", f"{molecule}|{region}")):
+            if key and key != "|":
+                add(kind, key, won, value, winning, ratio, last)
+        winner = _text(row.get("winner"))
+        for competitor in row.get("competitors") or ():
+            name, price = _text(competitor.get("name")), float(competitor.get("price") or 0)
+            if not name:
+                continue
+            versus = price / our_price if price and our_price else None
+            for kind, key in (("competitor", name), ("competitor_molecule", f"{name}|{molecule}")):
+                add(kind, key, winner == name, price * quantity, price, versus, last)
+    return totals
+
+
+class ColumnCache:
+    """One aggregate kind as NumPy columns plus a key -> row index."""
+
+    def __init__(self, rows):
+        self.index = {key: position for position, (key, *_) in enumerate(rows)}
+        columns = np.array([stats for _, *stats in rows], dtype=np.float64).reshape(len(rows), len(STATS))
+        self.columns = dict(zip(STATS, columns.T))
+        n = self.columns["n"]
+        safe = np.maximum(n, 1)
+        mean = self.columns["price"] / safe
+        self.features = {
+            "tenders": n,
+            "wins": self.columns["wins"],
+            "winRate": (self.columns["wins"] + 1) / (n + 2),
+            "avgPrice": mean,
+            "priceCv": np.sqrt(np.maximum(self.columns["price_sq"] / safe - mean ** 2, 0)) / np.maximum(mean, 1e-9),
+            "avgRatio": np.where(self.columns["ratio_n"] > 0,
+                                 self.columns["ratio"] / np.maximum(self.columns["ratio_n"], 1), np.nan),
+            "totalValue": self.columns["value"],
+            "lastSeen": self.columns["last"],
+        }
+
+    def get(self, key):
+        position = self.index.get(key)
+        if position is None:
+            return None
+        return {name: (None if np.isnan(column[position]) else round(float(column[position]), 6))
+                for name, column in self.features.items()}
+
+    def many(self, keys, feature):
+        """``feature`` values for ``keys`` as an array (NaN where a key is unknown)."""
+        positions = np.array([self.index.get(key, -1) for key in keys], dtype=np.int64)
+        values = self.features[feature][np.maximum(positions, 0)] if len(self.index) else np.zeros(len(keys))
+        return np.where(positions >= 0, values, np.nan)
+
+
+class FeatureStore:
+    """SQLite-backed aggregates with an incremental refresh and a column cache."""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS aggregates (
+            kind TEXT NOT NULL, key TEXT NOT NULL, n INTEGER NOT NULL, wins INTEGER NOT NULL,
+            value REAL NOT NULL, price REAL NOT NULL, price_sq REAL NOT NULL, ratio REAL NOT NULL,
+            ratio_n INTEGER NOT NULL, last REAL NOT NULL, PRIMARY KEY (kind, key));
+        CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+    """
+
+    def __init__(self, path="features.sqlite3"):
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.executescript(self.SCHEMA)
+        self.lock = threading.Lock()
+        self.caches = {}
+        self.competitors_by_molecule = None
+
+    @property
+    def watermark(self):
+        with self.lock:
+            row = self.connection.execute("SELECT value FROM meta WHERE key = 'watermark'").fetchone()
+        return json.loads(row[0]) if row else None
+
+    def ingest(self, rows, watermark=None):
+        """Add new outcome rows to the aggregates; returns the number of keys touched.
+
+        Rows must not have been ingested before; ``refresh`` guarantees
+        that with the stored ``watermark``.
+        """
+        totals = aggregate(rows)
+        with self.lock:
+            with self.connection:
+                self.connection.executemany(
+                    "INSERT INTO aggregates VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT (kind, key) DO UPDATE SET n = n + excluded.n, wins = wins + excluded.wins, "
+                    "value = value + excluded.value, price = price + excluded.price, "
+                    "price_sq = price_sq + excluded.price_sq, ratio = ratio + excluded.ratio, "
+                    "ratio_n = ratio_n + excluded.ratio_n, last = MAX(last, excluded.last)",
+                    [(kind, key, *stats) for (kind, key), stats in totals.items()])
+                if watermark is not None:
+                    self.connection.execute("INSERT OR REPLACE INTO meta VALUES ('watermark', ?)",
+                                            (json.dumps(watermark),))
+            for kind in {kind for kind, _ in totals}:
+                self.caches.pop(kind, None)
+            if totals:
+                self.competitors_by_molecule = None
+        return len(totals)
+
+    def refresh(self, fetch, batch=REFRESH_BATCH):
+        """Pull outcomes newer than the watermark and fold them in.
+
+        ``fetch(after, limit)`` returns up to ``limit`` rows with an ``id``
+        greater than ``after`` (``None`` on the first run), in ``id`` order.
+        Returns ``{"rows", "seconds"}``.
+        """
+        started, total = time.perf_counter(), 0
+        after = self.watermark
+        while True:
+            rows = list(fetch(after, batch))
+            if not rows:
+                break
+            after = rows[-1]["id"]
+            self.ingest(rows, watermark=after)
+            total += len(rows)
+            if len(rows) < batch:
+                break
+        return {"rows": total, "seconds": round(time.perf_counter() - started, 3)}
+
+    def cache(self, kind):
+        """The ``ColumnCache`` for ``kind``, loaded on first use after a change."""
+        if kind not in KINDS:
+            raise ValueError(f"unknown feature kind {kind!r}")
+        with self.lock:
+            cached = self.caches.get(kind)
+            if cached is None:
+                rows = self.connection.execute(
+                    f"SELECT key, {', '.join(STATS)} FROM aggregates WHERE kind = ?", (kind,)).fetchall()
+                cached = self.caches[kind] = ColumnCache(rows)
+            return cached
+
+    def get(self, kind, key):
+        return self.cache(kind).get(_text(key))
+
+    def _competitor_index(self):
+        with self.lock:
+            index = self.competitors_by_molecule
+        if index is None:
+            index = {}
+            for key in self.cache("competitor_molecule").index:
+                competitor, molecule = key.split("|", 1)
+                index.setdefault(molecule, []).append(competitor)
+            with self.lock:
+                self.competitors_by_molecule = index
+        return index
+
+    def competitor_features(self, molecule, region=None, top=TOP_COMPETITORS):
+        """Competitor Analysis: strongest competitors on a molecule and the market around it."""
+        molecule = _text(molecule)
+        pairs = self.cache("competitor_molecule")
+        names = self._competitor_index().get(molecule, [])
+        keys = [f"{name}|{molecule}" for name in names]
+        wins = pairs.many(keys, "wins")
+        ranked = [names[i] for i in np.argsort(-np.nan_to_num(wins))[:top]]
+        return {
+            "molecule": self.get("molecule", molecule),
+            "marketInRegion": self.get("molecule_region", f"{molecule}|{_text(region)}") if region else None,
+            "competitors": [dict(pairs.get(f"{name}|{molecule}"), name=name, overall=self.get("competitor", name))
+                            for name in ranked],
+        }
+
+    def risk_features(self, tender):
+        """Risk & Compliance: track record with the authority and on each molecule."""
+        molecules = sorted({_text(item.get("molecule")) for item in tender.get("items", []) if item.get("molecule")})
+        cache = self.cache("molecule")
+        win_rates = cache.many(molecules, "winRate")
+        known = ~np.isnan(win_rates)
+        return {
+            "authority": self.get("authority", tender.get("authority")),
+            "molecules": len(molecules),
+            "knownMolecules": int(known.sum()),
+            "meanMoleculeWinRate": round(float(win_rates[known].mean()), 6) if known.any() else None,
+            "unknownMolecules": [name for name, seen in zip(molecules, known) if not seen],
+        }
+
+    def impact_features(self, tender):
+        """Business Impact: regional win rate and market value per molecule."""
+        region = _text(tender.get("region"))
+        molecules = sorted({_text(item.get("molecule")) for item in tender.get("items", []) if item.get("molecule")})
+        pairs = self.cache("molecule_region")
+        keys = [f"{molecule}|{region}" for molecule in molecules]
+        values, win_rates = pairs.many(keys, "totalValue"), pairs.many(keys, "winRate")
+        return {
+            "region": self.get("region", region),
+            "marketValue": round(float(np.nansum(values)), 2),
+            "molecules": {molecule: {"winRate": None if np.isnan(rate) else round(float(rate), 6),
+                                     "marketValue": None if np.isnan(value) else round(float(value), 2)}
+                          for molecule, rate, value in zip(molecules, win_rates, values)},
+        }
+
+    def close(self):
+        self.connection.close()
@@ -0,0 +1,312 @@
+"""Vectorised price-elasticity engine for the Pricing Optimization Agent.
+
+Historical bids are held as NumPy columns.  For every molecule/region the
+engine fits a win-probability curve against the bid's price relative to
+the lowest competitor price, using a ridge-regularised logistic model
+that shrinks towards the molecule-wide curve, and that towards the
+global curve, so thin histories still get a sensible result.  All groups
+are fitted together with grouped Newton steps (``np.bincount``), not one
+regression per group.
+
+To price a tender, the engine runs a Monte Carlo over each group's
+competitor price distribution on a grid of relative prices.  This is done
+once per distinct molecule/region, then applied to every line item with
+array arithmetic.  Lines for molecules with no bid history get no
+suggestion and are listed in the quote's ``unpriced``.  Several tenders
+can be priced in one call::
+
+    from pricing_engine import BidHistory, PricingEngine
+
+    engine = PricingEngine(BidHistory.from_records(history_rows))
+    quote = engine.price_tender({"region": "AE", "items": items})
+    quotes = engine.price_tenders([tender_a, tender_b, tender_c])
+"""
+
+import threading
+
+import numpy as np
+
+PRICE_GRID = np.linspace(0.7, 1.3, 61)
+SIMULATIONS = 512
+CURVE_BLOCK = 64
+NEWTON_STEPS = 12
+RIDGE = 2.0
+PRIOR_BIDS = 20
+RANGE_TOLERANCE = 0.95
+MIN_LOG_SIGMA = 0.05
+SEED = 20240601
+
+
+class PricingError(Exception):
+    """Raised when there is no bid history to price from."""
+
+
+def _median_by_group(groups, values, count):
+    """Per-group medians of ``values`` (NaN where a group has no rows)."""
+    order = np.lexsort((values, groups))
+    sorted_groups, sorted_values = groups[order], values[order]
+    sizes = np.bincount(sorted_groups, minlength=count)
+    starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+    medians = np.full(count, np.nan)
+    present = sizes > 0
+    low = starts[present] + (sizes[present] - 1) // 2
+    high = starts[present] + sizes[present] // 2
+    medians[present] = (sorted_values[low] + sorted_values[high]) / 2
+    return medians
+
+
+def fit_logistic_groups(groups, x, won, count, prior, ridge=RIDGE, steps=NEWTON_STEPS):
+    """Fit ``P(win) = sigmoid(a - b * x)`` for every group at once.
+
+    ``prior`` is a ``(count, 2)`` array of ``(a, b)`` the ridge penalty
+    pulls each group towards; groups without rows return their prior.
+    """
+    theta = prior.astype(float).copy()
+    y = won.astype(float)
+    for _ in range(steps):
+        a, b = theta[groups, 0], theta[groups, 1]
+        p = 1.0 / (1.0 + np.exp(-(a - b * x)))
+        w = p * (1.0 - p)
+        residual = p - y
+        grad_a = np.bincount(groups, residual, count) + ridge * (theta[:, 0] - prior[:, 0])
+        grad_b = -np.bincount(groups, residual * x, count) + ridge * (theta[:, 1] - prior[:, 1])
+        h_aa = np.bincount(groups, w, count) + ridge
+        h_ab = -np.bincount(groups, w * x, count)
+        h_bb = np.bincount(groups, w * x * x, count) + ridge
+        det = h_aa * h_bb - h_ab * h_ab
+        theta[:, 0] -= (h_bb * grad_a - h_ab * grad_b) / det
+        theta[:, 1] -= (h_aa * grad_b - h_ab * grad_a) / det
+    return theta
+
+
+class BidHistory:
+    """Columnar store of historical tender bids.
+
+    Columns are NumPy arrays of equal length: ``molecule`` and ``region``
+    (integer codes into ``molecules``/``regions``), ``price`` (our unit
+    bid), ``competitor`` (lowest competing unit bid, NaN if unknown) and
+    ``won``.  ``version`` increases on every append so fitted curves know
+    when to refresh.
+    """
+
+    def __init__(self):
+        self.molecules, self.regions = {}, {}
+        self.molecule = np.empty(0, np.int32)
+        self.region = np.empty(0, np.int32)
+        self.price = np.empty(0, np.float64)
+        self.competitor = np.empty(0, np.float64)
+        self.won = np.empty(0, bool)
+        self.version = 0
+
+    def __len__(self):
+        return len(self.price)
+
+    @classmethod
+    def from_records(cls, records):
+        history = cls()
+        history.append(records)
+        return history
+
+    @staticmethod
+    def _code(vocabulary, name):
+        return vocabulary.setdefault(str(name or "").strip().lower(), len(vocabulary))
+
+    def append(self, records):
+        """Add bid dicts with ``molecule``, ``region``, ``price``, ``competitorPrice`` and ``won``."""
+        rows = [(self._code(self.molecules, row["molecule"]), self._code(self.regions, row.get("region")),
+                 float(row["price"]), float(row.get("competitorPrice") or np.nan), bool(row.get("won")))
+                for row in records if float(row.get("price") or 0) > 0]
+        if not rows:
+            return
+        molecule, region, price, competitor, won = zip(*rows)
+        self.molecule = np.concatenate((self.molecule, np.asarray(molecule, np.int32)))
+        self.region = np.concatenate((self.region, np.asarray(region, np.int32)))
+        self.price = np.concatenate((self.price, price))
+        self.competitor = np.concatenate((self.competitor, competitor))
+        self.won = np.concatenate((self.won, np.asarray(won, bool)))
+        self.version += 1
+
+
+class ElasticityModel:
+    """Fitted curves and competitor price distributions for one history version.
+
+    Group ``0`` is global, groups ``1..M`` are molecule-wide and the rest
+    are molecule/region pairs.  Curves shrink along that chain; ``lookup``
+    falls back from the pair to the molecule but never to the global group,
+    whose reference price says nothing about an unseen product.
+    """
+
+    def __init__(self, history):
+        self.version = history.version
+        molecules, regions = len(history.molecules), max(len(history.regions), 1)
+        self.molecules, self.regions = dict(history.molecules), dict(history.regions)
+        self.region_count = regions
+        count = 1 + molecules + molecules * regions
+        self.count = count
+        mol_group = 1 + history.molecule
+        pair_group = 1 + molecules + history.molecule * regions + history.region
+
+        groups = np.concatenate((np.zeros(len(history), np.int64), mol_group, pair_group))
+        price = np.tile(history.price, 3)
+        competitor = np.tile(history.competitor, 3)
+        won = np.tile(history.won, 3)
+        self.rows = np.bincount(groups, minlength=count)
+
+        self.reference = _median_by_group(groups, price, count)
+        known = ~np.isnan(competitor)
+        log_competitor = np.log(competitor[known])
+        observed = np.bincount(groups[known], minlength=count)
+        mean = np.bincount(groups[known], log_competitor, count) / np.maximum(observed, 1)
+        var = np.bincount(groups[known], log_competitor ** 2, count) / np.maximum(observed, 1) - mean ** 2
+        self.log_mu = np.where(observed > 0, mean, np.nan)
+        self.log_sigma = np.where(observed > 1, np.sqrt(np.maximum(var, 0)), np.nan)
+
+        imputed = np.where(np.isnan(history.competitor), self.reference[pair_group], history.competitor)
+        x = np.tile(np.log(history.price / imputed), 3)
+        self.parents = np.zeros(count, np.int64)
+        self.parents[1 + molecules:] = 1 + np.arange(count - 1 - molecules) // regions
+        self.theta = np.zeros((count, 2))
+        self.theta[:, 1] = 5.0
+        for level in (slice(0, 1), slice(1, 1 + molecules), slice(1 + molecules, count)):
+            prior = self.theta[self.parents]
+            prior[0] = (0.0, 5.0)
+            mask = (groups >= (level.start or 0)) & (groups < level.stop)
+            fitted = fit_logistic_groups(groups[mask], x[mask], won[mask], count, prior)
+            self.theta[level] = fitted[level]
+        self.theta[:, 1] = np.maximum(self.theta[:, 1], 0.1)
+        self._curves = {}
+        self._lock = threading.Lock()
+
+    def lookup(self, molecule, region):
+        """Most specific fitted group id for a molecule/region, or ``None`` for an unseen molecule."""
+        mol = self.molecules.get(str(molecule or "").strip().lower())
+        reg = self.regions.get(str(region or "").strip().lower())
+        if mol is not None and reg is not None:
+            pair = 1 + len(self.molecules) + mol * self.region_count + reg
+            if self.rows[pair]:
+                return pair
+        if mol is not None and self.rows[1 + mol]:
+            return 1 + mol
+        return None
+
+    def _distribution(self, group):
+        chain = [group, self.parents[group], 0]
+        mu = next((self.log_mu[g] for g in chain if not np.isnan(self.log_mu[g])), np.log(self.reference[group]))
+        mu -= np.log(self.reference[group])
+        sigma = next((self.log_sigma[g] for g in chain if not np.isnan(self.log_sigma[g])), 0.15)
+        return mu, max(sigma, MIN_LOG_SIGMA)
+
+    def win_curves(self, groups, rng):
+        """``(len(groups), len(PRICE_GRID))`` win probabilities and their MC standard errors.
+
+        Prices are relative to each group's reference price; competitor
+        prices are sampled from the group's log-normal, relative to the
+        same reference.  Curves are cached per group and simulated
+        ``CURVE_BLOCK`` groups at a time to bound memory.
+        """
+        with self._lock:
+            missing = [g for g in dict.fromkeys(groups) if g not in self._curves]
+        for start in range(0, len(missing), CURVE_BLOCK):
+            block = missing[start:start + CURVE_BLOCK]
+            mu, sigma = np.array([self._distribution(g) for g in block]).T
+            log_competitor = mu[:, None] + sigma[:, None] * rng.standard_normal((len(block), SIMULATIONS))
+            a, b = self.theta[block, 0], self.theta[block, 1]
+            x = np.log(PRICE_GRID)[None, :, None] - log_competitor[:, None, :]
+            wins = 1.0 / (1.0 + np.exp(-(a[:, None, None] - b[:, None, None] * x)))
+            mean, stderr = wins.mean(axis=2), wins.std(axis=2) / np.sqrt(SIMULATIONS)
+            with self._lock:
+                for i, g in enumerate(block):
+                    self._curves[g] = (mean[i], stderr[i])
+        with self._lock:
+            curves = [self._curves[g] for g in groups]
+        return np.array([c[0] for c in curves]), np.array([c[1] for c in curves])
+
+
+class PricingEngine:
+    """Suggests bid ranges for whole tenders from a ``BidHistory``.
+
+    The fitted model is cached and refitted only after the history has
+    been appended to.
+    """
+
+    def __init__(self, history, seed=SEED):
+        self.history = history
+        self.seed = seed
+        self._model = None
+        self._lock = threading.Lock()
+
+    @property
+    def model(self):
+        if not len(self.history):
+            raise PricingError("bid history is empty")
+        with self._lock:
+            if self._model is None or self._model.version != self.history.version:
+                self._model = ElasticityModel(self.history)
+            return self._model
+
+    def price_tender(self, tender):
+        return self.price_tenders([tender])[0]
+
+    def price_tenders(self, tenders):
+        """Price every line of every tender in one vectorised pass.
+
+        Each tender is a dict with ``region`` and ``items`` (dicts with
+        ``molecule``, ``quantity`` and optionally ``unitCost``).  Returns
+        one quote per tender with per-line suggestions; lines whose molecule
+        has no history have ``suggestedPrice`` ``None``, count as zero
+        confidence and are listed by line number in ``unpriced``.
+        """
+        model = self.model
+        rng = np.random.default_rng(self.seed)
+        lines = [(t, item) for t, tender in enumerate(tenders) for item in tender.get("items", [])]
+        quotes = [{"lines": [], "suggestedTotal": 0.0, "expectedValue": 0.0, "confidence": 0.0, "unpriced": []}
+                  for _ in tenders]
+        found = [model.lookup(item.get("molecule"), tenders[t].get("region")) for t, item in lines]
+        priced = [i for i, group in enumerate(found) if group is not None]
+        suggestions = {}
+        if priced:
+            groups = np.array([found[i] for i in priced])
+            unique, inverse = np.unique(groups, return_inverse=True)
+            curves, stderr = model.win_curves(unique.tolist(), rng)
+            win, win_err = curves[inverse], stderr[inverse]
+
+            reference = model.reference[groups]
+            quantity = np.array([float(lines[i][1].get("quantity") or 1) for i in priced])
+            cost = np.array([float(lines[i][1].get("unitCost") or 0) for i in priced])
+            prices = reference[:, None] * PRICE_GRID[None, :]
+            expected = (prices - cost[:, None]) * quantity[:, None] * win
+
+            best = expected.argmax(axis=1)
+            rows = np.arange(len(priced))
+            peak = expected[rows, best]
+            good = expected >= np.where(peak > 0, peak * RANGE_TOLERANCE, peak)[:, None]
+            low = np.where(good, prices, np.inf).min(axis=1)
+            high = np.where(good, prices, -np.inf).max(axis=1)
+            support = model.rows[groups]
+            confidence = (support / (support + PRIOR_BIDS)) * (1.0 - np.minimum(win_err[rows, best] * 10, 1.0))
+            for k, i in enumerate(priced):
+                suggestions[i] = ({
+                    "suggestedPrice": round(float(prices[k, best[k]]), 4),
+                    "bidRange": [round(float(low[k]), 4), round(float(high[k]), 4)],
+                    "winProbability": round(float(win[k, best[k]]), 4),
+                    "expectedValue": round(float(peak[k]), 2),
+                    "confidence": round(float(confidence[k]), 3),
+                }, float(prices[k, best[k]] * quantity[k]), float(peak[k]))
+
+        unpriced = ({"suggestedPrice": None, "bidRange": None, "winProbability": None, "expectedValue": None,
+                     "confidence": 0.0}, 0.0, 0.0)
+        for i, (t, item) in enumerate(lines):
+            quote = quotes[t]
+            number = item.get("line", len(quote["lines"]) + 1)
+            suggestion, total, value = suggestions.get(i, unpriced)
+            if i not in suggestions:
+                quote["unpriced"].append(number)
+            quote["lines"].append({"line": number, "molecule": item.get("molecule"), **suggestion})
+            quote["suggestedTotal"] += total
+            quote["expectedValue"] += value
+        for quote in quotes:
+            if quote["lines"]:
+                quote["confidence"] = round(float(np.mean([line["confidence"] for line in quote["lines"]])), 3)
+                quote["suggestedTotal"] = round(quote["suggestedTotal"], 2)
+                quote["expectedValue"] = round(quote["expectedValue"], 2)
+        return quotes
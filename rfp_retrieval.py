@@ -0,0 +1,256 @@
+"""Per-tender retrieval index for the RFP Question Assistant.
+
+A tender's extracted text is chunked and indexed once, at ingestion, into
+a SQLite file holding the chunks, BM25 postings and, optionally, chunk
+embeddings from a local model.  Each question then retrieves only the
+top-k passages, so the prompt size (and latency) stays the same whether
+the tender has 8 pages or 800::
+
+    from rfp_retrieval import RetrievalIndex, RfpAssistant
+
+    index = RetrievalIndex.from_document("tender.pdf", "indexes/MOH-2026-0457.rfp")
+    assistant = RfpAssistant(RetrievalIndex.open("indexes/MOH-2026-0457.rfp"))
+    reply = assistant.ask("What are the eligibility criteria?")
+
+Answers are cached in the same file under the normalised question and
+the index fingerprint, so the sales team gets repeat questions back
+instantly and a re-indexed corrigendum never returns stale answers.
+Embeddings need NumPy and an ``embed(texts) -> vectors`` callable (for
+example a sentence-transformers model's ``encode``).
+"""
+
+import hashlib
+import json
+import math
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+
+from common import AnthropicTransport, RateLimitedTransport
+from tender_extract import iter_pages
+
+CHUNK_WORDS = 180
+CHUNK_OVERLAP = 30
+TOP_K = 6
+BM25_K1 = 1.2
+BM25_B = 0.75
+RRF_K = 60
+ANSWER_MAX_TOKENS = 1000
+STOPWORDS = frozenset("a an and are as at be by for from has have in is it its of on or shall that the this to was "
+                      "were will with what which who whom when where how do does any all".split())
+
+ANSWER_PROMPT = (
+    "Answer the question about this tender using only the numbered passages below. Cite passages as [n] and "
+    "say so if the passages do not contain the answer.\n\nQuestion: {question}\n\n{passages}"
+)
+
+
+def tokenize(text):
+    words = re.findall(r"\w+", unicodedata.normalize("NFKC", text).casefold())
+    return [word[:-1] if len(word) > 4 and word.endswith("s") and not word.endswith("ss") else word
+            for word in words if word not in STOPWORDS]
+
+
+def normalize_question(question):
+    return " ".join(re.findall(r"\w+", unicodedata.normalize("NFKC", question).casefold()))
+
+
+def chunk_pages(pages, words=CHUNK_WORDS, overlap=CHUNK_OVERLAP):
+    """Yield ``(page, text)`` chunks of about ``words`` words from ``(page, text)`` pairs.
+
+    Chunks overlap by ``overlap`` words and never span pages, so every
+    passage can be cited by page number.
+    """
+    step = max(words - overlap, 1)
+    for number, text in pages:
+        tokens = text.split()
+        for start in range(0, max(len(tokens) - overlap, 1), step):
+            piece = " ".join(tokens[start:start + words])
+            if piece:
+                yield number, piece
+
+
+class RetrievalIndex:
+    """BM25 (plus optional embedding) index over one tender, stored in SQLite."""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+        CREATE TABLE IF NOT EXISTS chunks (id INTEGER PRIMARY KEY, page INTEGER, length INTEGER, text TEXT,
+                                           vector BLOB);
+        CREATE TABLE IF NOT EXISTS postings (term TEXT NOT NULL, chunk INTEGER NOT NULL, tf INTEGER NOT NULL);
+        CREATE TABLE IF NOT EXISTS answers (key TEXT PRIMARY KEY, question TEXT, answer TEXT, sources TEXT,
+                                            created REAL);
+    """
+
+    def __init__(self, connection, embed=None):
+        self.connection = connection
+        self.embed = embed
+        self.lock = threading.Lock()
+        meta = dict(connection.execute("SELECT key, value FROM meta"))
+        self.count = int(meta.get("count", 0))
+        self.average_length = float(meta.get("average_length", 0)) or 1.0
+        self.fingerprint = meta.get("fingerprint", "")
+        self.embedded = meta.get("embedded") == "1"
+        self._vectors = None
+
+    @classmethod
+    def build(cls, path, pages, embed=None):
+        """Index ``(page, text)`` pairs into a fresh file at ``path``.
+
+        Cached answers survive only if the re-indexed text is identical.
+        """
+        connection = sqlite3.connect(path, check_same_thread=False)
+        connection.executescript(cls.SCHEMA)
+        previous = connection.execute("SELECT value FROM meta WHERE key = 'fingerprint'").fetchone()
+        connection.executescript("DROP TABLE chunks; DROP TABLE postings; DROP TABLE meta;" + cls.SCHEMA)
+        digest = hashlib.sha256()
+        total = count = 0
+        batch = []
+        for chunk_id, (page, text) in enumerate(chunk_pages(pages)):
+            terms = tokenize(text)
+            counts = {}
+            for term in terms:
+                counts[term] = counts.get(term, 0) + 1
+            connection.execute("INSERT INTO chunks (id, page, length, text) VALUES (?, ?, ?, ?)",
+                               (chunk_id, page, len(terms), text))
+            connection.executemany("INSERT INTO postings VALUES (?, ?, ?)",
+                                   [(term, chunk_id, tf) for term, tf in counts.items()])
+            digest.update(text.encode())
+            total += len(terms)
+            count += 1
+            batch.append((chunk_id, text))
+            if embed and len(batch) >= 64:
+                cls._store_vectors(connection, embed, batch)
+                batch = []
+        if embed and batch:
+            cls._store_vectors(connection, embed, batch)
+        connection.execute("CREATE INDEX postings_term ON postings (term)")
+        if previous is None or previous[0] != digest.hexdigest():
+            connection.execute("DELETE FROM answers")
+        connection.executemany("INSERT INTO meta VALUES (?, ?)", [
+            ("count", str(count)),
+            ("average_length", str(total / count if count else 0)),
+            ("fingerprint", digest.hexdigest()),
+            ("embedded", "1" if embed else "0"),
+        ])
+        connection.commit()
+        return cls(connection, embed)
+
+    @staticmethod
+    def _store_vectors(connection, embed, batch):
+        import numpy as np
+
+        vectors = np.asarray(embed([text for _, text in batch]), dtype=np.float32)
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        connection.executemany("UPDATE chunks SET vector = ? WHERE id = ?",
+                               [(vector.tobytes(), chunk_id) for (chunk_id, _), vector in zip(batch, vectors)])
+
+    @classmethod
+    def from_document(cls, document, path, embed=None):
+        """Index a tender file read page by page with ``tender_extract``."""
+        return cls.build(path, ((page.number, page.text()) for page in iter_pages(document)), embed)
+
+    @classmethod
+    def open(cls, path, embed=None):
+        return cls(sqlite3.connect(path, check_same_thread=False), embed)
+
+    def _bm25(self, question, limit):
+        terms = set(tokenize(question))
+        scores = {}
+        with self.lock:
+            for term in terms:
+                postings = self.connection.execute(
+                    "SELECT p.chunk, p.tf, c.length FROM postings p JOIN chunks c ON c.id = p.chunk WHERE p.term = ?",
+                    (term,)).fetchall()
+                if not postings:
+                    continue
+                idf = math.log(1 + (self.count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for chunk, tf, length in postings:
+                    norm = tf + BM25_K1 * (1 - BM25_B + BM25_B * length / self.average_length)
+                    scores[chunk] = scores.get(chunk, 0.0) + idf * tf * (BM25_K1 + 1) / norm
+        return sorted(scores, key=scores.get, reverse=True)[:limit]
+
+    def _dense(self, question, limit):
+        import numpy as np
+
+        with self.lock:
+            if self._vectors is None:
+                rows = self.connection.execute("SELECT id, vector FROM chunks WHERE vector IS NOT NULL").fetchall()
+                ids = np.array([row[0] for row in rows], dtype=np.int64)
+                matrix = np.frombuffer(b"".join(row[1] for row in rows), dtype=np.float32)
+                self._vectors = (ids, matrix.reshape(len(rows), -1) if rows else matrix)
+        ids, matrix = self._vectors
+        if not len(ids):
+            return []
+        query = np.asarray(self.embed([question]), dtype=np.float32)[0]
+        scores = matrix @ (query / max(np.linalg.norm(query), 1e-12))
+        top = np.argsort(-scores)[:limit]
+        return ids[top].tolist()
+
+    def search(self, question, k=TOP_K):
+        """Top-``k`` passages as ``[{"chunk", "page", "text"}]``.
+
+        With embeddings (an ``embed`` callable and an index built with one),
+        BM25 and vector rankings are merged by reciprocal rank fusion.
+        """
+        rankings = [self._bm25(question, k * 4)]
+        if self.embed is not None and self.embedded:
+            rankings.append(self._dense(question, k * 4))
+        fused = {}
+        for ranking in rankings:
+            for rank, chunk in enumerate(ranking):
+                fused[chunk] = fused.get(chunk, 0.0) + 1.0 / (RRF_K + rank + 1)
+        best = sorted(fused, key=fused.get, reverse=True)[:k]
+        if not best:
+            return []
+        with self.lock:
+            rows = dict((row[0], row[1:]) for row in self.connection.execute(
+                f"SELECT id, page, text FROM chunks WHERE id IN ({','.join('?' * len(best))})", best))
+        return [{"chunk": chunk, "page": rows[chunk][0], "text": rows[chunk][1]} for chunk in best]
+
+    def cached_answer(self, question):
+        with self.lock:
+            row = self.connection.execute("SELECT answer, sources FROM answers WHERE key = ?",
+                                          (self._answer_key(question),)).fetchone()
+        return (row[0], json.loads(row[1])) if row else None
+
+    def cache_answer(self, question, answer, sources):
+        with self.lock:
+            self.connection.execute("INSERT OR REPLACE INTO answers VALUES (?, ?, ?, ?, ?)",
+                                    (self._answer_key(question), question, answer, json.dumps(sources), time.time()))
+            self.connection.commit()
+
+    def _answer_key(self, question):
+        return hashlib.sha256(f"{self.fingerprint}\0{normalize_question(question)}".encode()).hexdigest()
+
+    def close(self):
+        self.connection.close()
+
+
+class RfpAssistant:
+    """Answers tender questions from retrieved passages, with a shared answer cache.
+
+    ``transport`` follows the ``common`` contract,
+    ``callable(prompt, max_tokens) -> text``.
+    """
+
+    def __init__(self, index, transport=None, k=TOP_K):
+        self.index = index
+        self.transport = transport or RateLimitedTransport(AnthropicTransport())
+        self.k = k
+
+    def ask(self, question):
+        cached = self.index.cached_answer(question)
+        if cached:
+            answer, sources = cached
+            return {"answer": answer, "sources": sources, "cached": True}
+        passages = self.index.search(question, self.k)
+        context = "\n\n".join(f"[{n}] (page {passage['page']}) {passage['text']}"
+                              for n, passage in enumerate(passages, 1))
+        answer = self.transport(ANSWER_PROMPT.format(question=question, passages=context), ANSWER_MAX_TOKENS).strip()
+        sources = [{"ref": n, "page": passage["page"], "chunk": passage["chunk"]}
+                   for n, passage in enumerate(passages, 1)]
+        self.index.cache_answer(question, answer, sources)
+        return {"answer": answer, "sources": sources, "cached": False}
@@ -0,0 +1,184 @@
+"""Offline benchmark for the SAP test converter pipeline.
+
+Generates seeded synthetic CSV suites, replays the recorded model responses
+in ``fixtures/recorded_responses.json`` instead of calling the API, and
+reports per-stage timings from the pipeline ``Tracer``.  No network access
+is needed, so runs are comparable across commits::
+
+    python sap_bench.py --sizes 100,1000,10000 --repeat 3 --save bench.json
+    python sap_bench.py --baseline bench.json --threshold 0.2
+
+With ``--baseline`` the exit status is 1 when any stage is slower than the
+baseline by more than ``--threshold`` (as a fraction).
+
+This covers the Python port in ``sap_pipeline`` only.  The browser code in
+``demo.py`` (``appendRows``, ``chunkRows``, the ``runChunked`` merge, the
+export serialisers) is timed by ``node demo_bench.mjs``, which takes the
+same options and writes results in the same shape.
+"""
+
+import argparse
+import csv
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+from common import Tracer
+from sap_pipeline import EVALUATE_PROMPT, EXPORT_FORMATS, GENERATE_PROMPT, StandInExecutor, process_file, write_export
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "recorded_responses.json")
+SIZES = (100, 1000, 10000, 100000)
+STAGES = ("csv.parse", "prompt.build", "model.request", "json.parse", "merge", "query.execute", "export.write")
+NOISE_FLOOR_MS = 5.0
+
+MODULES = ["SD", "MM", "FI", "PP", "CO"]
+ACTIONS = ["Create", "Change", "Display", "Post", "Release", "Reverse"]
+OBJECTS = ["sales order", "purchase order", "material", "customer", "vendor invoice", "delivery"]
+
+
+def write_synthetic_csv(path, rows, seed=7):
+    """Write ``rows`` deterministic test cases shaped like a typical upload."""
+    rnd = random.Random(seed)
+    with open(path, "w", newline="", encoding="utf-8") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(["Test Case", "Module", "Steps", "Expected Result"])
+        for i in range(rows):
+            action, obj = rnd.choice(ACTIONS), rnd.choice(OBJECTS)
+            writer.writerow([
+                f"TC-{i:06d} {action} {obj}",
+                rnd.choice(MODULES),
+                "; ".join(f"Step {n}: {rnd.choice(ACTIONS).lower()} {rnd.choice(OBJECTS)}"
+                          for n in range(1, rnd.randint(3, 6))),
+                f"{obj.capitalize()} is {action.lower()}d without errors",
+            ])
+
+
+class ReplayTransport:
+    """Answers pipeline prompts from recorded responses, one line per input row.
+
+    The prompt template is recognised from its fixed prefix, the row batch is
+    recovered from between the prefix and suffix, and recorded lines are
+    cycled by row position so results are deterministic for a given suite.
+    """
+
+    def __init__(self, path=FIXTURES, latency=0.0):
+        with open(path, encoding="utf-8") as handle:
+            recorded = json.load(handle)
+        self.latency = latency
+        self.templates = [
+            (EVALUATE_PROMPT.split("{rows}"), recorded["evaluate"], self._test_case),
+            (GENERATE_PROMPT.split("{rows}"), recorded["generate"], lambda row: row.get("testCase", "")),
+        ]
+        self.offsets = {}
+
+    @staticmethod
+    def _test_case(row):
+        return row.get("Test Case") or next(iter(row.values()), "")
+
+    def __call__(self, prompt, max_tokens):
+        for (prefix, suffix), lines, name in self.templates:
+            if prompt.startswith(prefix) and prompt.endswith(suffix):
+                batch = json.loads(prompt[len(prefix):len(prompt) - len(suffix)])
+                break
+        else:
+            raise ValueError("prompt does not match a pipeline template")
+        if self.latency:
+            time.sleep(self.latency)
+        return "\n".join(
+            json.dumps({"testCase": name(row), **lines[sum(map(ord, name(row))) % len(lines)]}) for row in batch
+        )
+
+
+def run_once(path, fmt, executor, transport):
+    """Process one suite end to end and return its tracer summary."""
+    tracer = Tracer(os.path.basename(path))
+    document, _, _ = process_file(path, transport, executor, tracer)
+    with tracer.span("export.write", format=fmt):
+        write_export(document, f"{path}.{EXPORT_FORMATS[fmt][0]}", fmt)
+    return tracer.summary()
+
+
+def bench(sizes=SIZES, repeat=3, fmt="json", latency=0.0, log=None):
+    """Run every suite size ``repeat`` times and return median stage timings."""
+    log = log or (lambda message: None)
+    executor = StandInExecutor()
+    transport = ReplayTransport(latency=latency)
+    results = {}
+    with tempfile.TemporaryDirectory() as work:
+        for size in sizes:
+            path = os.path.join(work, f"suite-{size}.csv")
+            write_synthetic_csv(path, size)
+            runs = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                summary = run_once(path, fmt, executor, transport)
+                runs.append((time.perf_counter() - started, summary))
+            wall = statistics.median(seconds for seconds, _ in runs)
+            results[str(size)] = {
+                "wallMs": round(wall * 1000, 3),
+                "rowsPerSecond": round(size / wall, 1) if wall > 0 else 0.0,
+                "stages": {
+                    stage: round(statistics.median(summary["stages"].get(stage, {}).get("totalMs", 0.0)
+                                                   for _, summary in runs), 3)
+                    for stage in STAGES
+                },
+                "counters": runs[-1][1]["counters"],
+            }
+            log(format_row(size, results[str(size)]))
+    return {"format": fmt, "repeat": repeat, "sizes": results}
+
+
+def compare(current, baseline, threshold=0.2):
+    """Return ``(size, stage, baseline_ms, current_ms)`` for every regression."""
+    regressions = []
+    for size, entry in current["sizes"].items():
+        before = baseline.get("sizes", {}).get(size)
+        if not before:
+            continue
+        for stage, ms in [("wall", entry["wallMs"])] + list(entry["stages"].items()):
+            old = before["wallMs"] if stage == "wall" else before["stages"].get(stage)
+            if old is not None and ms - old > NOISE_FLOOR_MS and ms > old * (1 + threshold):
+                regressions.append((size, stage, old, ms))
+    return regressions
+
+
+def format_row(size, entry):
+    stages = "  ".join(f"{stage}={entry['stages'][stage]:.1f}" for stage in STAGES)
+    return f"{size:>7} rows  {entry['wallMs']:>10.1f} ms  {entry['rowsPerSecond']:>10.1f} rows/s  {stages}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the SAP converter pipeline offline.")
+    parser.add_argument("--sizes", default=",".join(map(str, SIZES)),
+                        help="comma-separated suite sizes in rows (default: %(default)s)")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per size; medians are reported (default: %(default)s)")
+    parser.add_argument("--format", choices=sorted(EXPORT_FORMATS), default="json",
+                        help="export format to time (default: %(default)s)")
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="simulated seconds per model request (default: %(default)s)")
+    parser.add_argument("--save", help="write results as JSON to this path")
+    parser.add_argument("--baseline", help="compare against a JSON file written by --save")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="allowed slowdown versus the baseline (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    results = bench(sizes, args.repeat, args.format, args.latency, log=print)
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as handle:
+            json.dump(results, handle, indent=2)
+    if not args.baseline:
+        return 0
+    with open(args.baseline, encoding="utf-8") as handle:
+        regressions = compare(results, json.load(handle), args.threshold)
+    for size, stage, old, new in regressions:
+        print(f"regression: {size} rows {stage} {old:.1f} ms -> {new:.1f} ms", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,436 @@
+"""Headless batch runner for the SAP test converter.
+
+Runs the same Upload -> Evaluate -> Generate -> Results stages as the
+``demo.py`` component over directories or globs of CSV files, without a
+browser.  Each input file produces the export that ``exportResults``
+downloads (JSON by default; NDJSON, CSV or columnar with ``--format``).
+Usage::
+
+    python sap_pipeline.py suites/ 'nightly/**/*.csv' --out results --workers 8
+
+or, from Python::
+
+    from sap_pipeline import run_batch
+    report = run_batch(["suites/"], "results", workers=8)
+"""
+
+import argparse
+import concurrent.futures
+import csv
+import datetime
+import glob
+import gzip
+import hashlib
+import json
+import os
+import random
+import re
+import sqlite3
+import sys
+import threading
+import time
+
+from common import (AnthropicTransport, PipelineError, RateLimitedTransport, Tracer, estimate_tokens, file_digest,
+                    parse_ndjson)
+
+CHUNK_TOKEN_BUDGET = 3000
+CHUNK_MAX_ROWS = 25
+CHUNK_MAX_TOKENS = 4000
+CHUNK_CONCURRENCY = 4
+CHUNK_RETRIES = 2
+QUERY_TIMEOUT_S = 30.0
+QUERY_SAMPLE_ROWS = 5
+STAND_IN_ROWS = 2000
+CHECKPOINT_FILE = ".checkpoint.json"
+TRACE_FILE = "trace.json"
+EXPORT_ROW_GROUP = 1000
+EXPORT_COLUMNS = ["type", "testCase", "evaluation", "score", "feedback", "sapQuery", "description",
+                  "status", "rows", "latencyMs", "error"]
+
+EVALUATE_PROMPT = (
+    "Evaluate these test cases for quality, completeness, and clarity. Return ONLY newline-delimited JSON "
+    "with no preamble or markdown: one JSON object per line, one line per test case, in the same order:"
+    '\n\n{rows}\n\nLine format: {"testCase": "...", "evaluation": "pass/fail", "score": 0-100, "feedback": "..."}'
+)
+GENERATE_PROMPT = (
+    "Convert these test cases to SAP queries. Return ONLY newline-delimited JSON with no preamble or markdown: "
+    "one JSON object per line, one line per test case, in the same order:"
+    '\n\n{rows}\n\nLine format: {"testCase": "...", "sapQuery": "SELECT ...", "description": "..."}'
+)
+
+
+def read_rows(path):
+    """Read a CSV test-case file into a list of row dicts, skipping empty lines.
+
+    Cells past the last header column are dropped; missing cells read as ``""``.
+    """
+    rows = []
+    with open(path, newline="", encoding="utf-8-sig") as handle:
+        for row in csv.DictReader(handle, restval=""):
+            row.pop(None, None)
+            if any(value.strip() for value in row.values()):
+                rows.append(row)
+    return rows
+
+
+def chunk_rows(rows, token_budget=CHUNK_TOKEN_BUDGET, max_rows=CHUNK_MAX_ROWS):
+    """Split rows into contiguous ``(start, end)`` ranges under a token budget."""
+    chunks = []
+    start = tokens = 0
+    for idx, row in enumerate(rows):
+        cost = estimate_tokens(row)
+        if idx > start and (tokens + cost > token_budget or idx - start >= max_rows):
+            chunks.append((start, idx))
+            start, tokens = idx, 0
+        tokens += cost
+    if len(rows) > start:
+        chunks.append((start, len(rows)))
+    return chunks
+
+
+def run_chunked(rows, template, transport, concurrency=CHUNK_CONCURRENCY, retries=CHUNK_RETRIES, tracer=None):
+    """Send rows to the model in chunks and return ``(results, failed_chunks)``.
+
+    Results keep row order; rows belonging to chunks that still fail after
+    ``retries`` extra rounds are left out.
+    """
+    tracer = tracer or Tracer()
+    results = [None] * len(rows)
+    chunks = chunk_rows(rows)
+
+    def attempt(chunk):
+        start, end = chunk
+        batch = rows[start:end]
+        with tracer.span("prompt.build", rows=len(batch)):
+            prompt = template.replace("{rows}", json.dumps(batch))
+        with tracer.span("model.request", rows=len(batch)):
+            text = transport(prompt, CHUNK_MAX_TOKENS)
+        tracer.count("model.requests")
+        tracer.count("tokens.in.est", estimate_tokens(prompt))
+        tracer.count("tokens.out.est", estimate_tokens(text))
+        with tracer.span("json.parse", rows=len(batch)):
+            parsed = parse_ndjson(text)
+        if len(parsed) != len(batch):
+            raise PipelineError(f"expected {len(batch)} results, got {len(parsed)}")
+        results[start:end] = parsed
+
+    pending = chunks
+    with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for round_ in range(retries + 1):
+            if not pending:
+                break
+            if round_:
+                tracer.count("retries", len(pending))
+            futures = {pool.submit(attempt, chunk): chunk for chunk in pending}
+            pending = [futures[f] for f in concurrent.futures.as_completed(futures) if f.exception()]
+    with tracer.span("merge", rows=len(rows)):
+        merged = [result for result in results if result is not None]
+    return merged, len(pending)
+
+
+STAND_IN_SCHEMA = {
+    "MARA": {"MATNR": lambda i, rnd: f"M-{i:08d}", "MTART": ["FERT", "HALB", "ROH", "HAWA"],
+             "MATKL": ["001", "002", "010", "020"], "MEINS": ["EA", "KG", "L"], "ERSDA": "date"},
+    "KNA1": {"KUNNR": lambda i, rnd: str(100000 + i), "NAME1": lambda i, rnd: f"Customer {i}",
+             "LAND1": ["DE", "US", "FR", "IN", "AE"], "ORT01": ["Berlin", "Austin", "Lyon", "Pune", "Dubai"]},
+    "VBAK": {"VBELN": lambda i, rnd: str(5000000 + i), "ERDAT": "date", "AUART": ["OR", "RE", "CR"],
+             "KUNNR": lambda i, rnd: str(100000 + rnd.randrange(STAND_IN_ROWS)), "NETWR": "amount",
+             "WAERK": ["EUR", "USD"]},
+    "EKKO": {"EBELN": lambda i, rnd: str(4500000000 + i), "BUKRS": ["1000", "2000", "3000"],
+             "BSART": ["NB", "FO", "UB"], "LIFNR": lambda i, rnd: str(300000 + rnd.randrange(500)), "AEDAT": "date"},
+    "BKPF": {"BUKRS": ["1000", "2000", "3000"], "BELNR": lambda i, rnd: str(1900000000 + i),
+             "GJAHR": ["2023", "2024", "2025"], "BLART": ["SA", "KR", "DR"], "BUDAT": "date"},
+}
+
+
+def _stand_in_value(spec, i, rnd):
+    if isinstance(spec, list):
+        return rnd.choice(spec)
+    if spec == "date":
+        return (datetime.date(2023, 1, 1) + datetime.timedelta(days=rnd.randrange(1000))).strftime("%Y%m%d")
+    if spec == "amount":
+        return round(rnd.random() * 10000, 2)
+    return spec(i, rnd)
+
+
+def to_sqlite(sql):
+    """Rewrite the Open SQL forms the model tends to emit into SQLite syntax."""
+    sql = re.sub(r"\s+", " ", sql.strip()).rstrip(".;")
+    limit = None
+    if re.match(r"(?i)^SELECT SINGLE ", sql):
+        sql, limit = re.sub(r"(?i)^SELECT SINGLE ", "SELECT ", sql), 1
+    up_to = re.search(r"(?i) UP TO (\d+) ROWS", sql)
+    if up_to:
+        sql, limit = sql[:up_to.start()] + sql[up_to.end():], int(up_to.group(1))
+    return f"{sql} LIMIT {limit}" if limit is not None else sql
+
+
+class StandInExecutor:
+    """Executes queries against a seeded in-memory SQLite copy of common SAP tables.
+
+    This is the offline counterpart of the stand-in adapter in ``demo.py``;
+    the data is deterministic but not row-for-row identical to it.
+    """
+
+    def __init__(self, timeout=QUERY_TIMEOUT_S, seed=42):
+        self.timeout = timeout
+        self.connection = sqlite3.connect(":memory:", check_same_thread=False)
+        rnd = random.Random(seed)
+        for table, columns in STAND_IN_SCHEMA.items():
+            names = list(columns)
+            self.connection.execute(f"CREATE TABLE {table} ({', '.join(names)})")
+            rows = [[_stand_in_value(columns[name], i, rnd) for name in names] for i in range(STAND_IN_ROWS)]
+            self.connection.executemany(f"INSERT INTO {table} VALUES ({', '.join('?' * len(names))})", rows)
+        self.connection.commit()
+
+    def execute(self, sql):
+        """Run one query and return a ``queryResults`` entry."""
+        result = {"query": sql, "rows": 0, "sample": [], "status": "success"}
+        started = time.perf_counter()
+        deadline = started + self.timeout
+        self.connection.set_progress_handler(lambda: time.perf_counter() > deadline, 10000)
+        try:
+            cursor = self.connection.execute(to_sqlite(sql))
+            names = [column[0] for column in cursor.description or ()]
+            for row in cursor:
+                if len(result["sample"]) < QUERY_SAMPLE_ROWS:
+                    result["sample"].append(dict(zip(names, row)))
+                result["rows"] += 1
+            if result["rows"] == 1 and names and names[0].upper() == "COUNT(*)":
+                result["rows"] = result["sample"][0][names[0]]
+        except sqlite3.Error as exc:
+            timed_out = time.perf_counter() > deadline
+            result["status"] = "timeout" if timed_out else "error"
+            result["error"] = "timeout" if timed_out else str(exc)
+        finally:
+            self.connection.set_progress_handler(None, 0)
+        result["latencyMs"] = round((time.perf_counter() - started) * 1000)
+        return result
+
+
+def process_file(path, transport, executor=None, tracer=None):
+    """Run every stage over one CSV file and return its export document."""
+    tracer = tracer or Tracer()
+    with tracer.span("csv.parse", file=path) as args:
+        rows = read_rows(path)
+        args["rows"] = len(rows)
+    tracer.count("rows", len(rows))
+    with tracer.span("stage.evaluate", file=path):
+        evaluated, failed_eval = run_chunked(rows, EVALUATE_PROMPT, transport, tracer=tracer)
+    passed = [test for test in evaluated if test.get("evaluation") == "pass"]
+    with tracer.span("stage.generate", file=path):
+        queries, failed_gen = run_chunked(passed, GENERATE_PROMPT, transport, tracer=tracer)
+    executor = executor or StandInExecutor()
+    results = []
+    with tracer.span("stage.execute", file=path):
+        for query in queries:
+            with tracer.span("query.execute"):
+                results.append(executor.execute(query.get("sapQuery", "")))
+    return {
+        "evaluatedTests": evaluated,
+        "sapQueries": queries,
+        "queryResults": results,
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z"),
+    }, len(rows), failed_eval + failed_gen
+
+
+def export_records(document):
+    """Flatten an export document into typed records, as ``exportRecords`` does in demo.py."""
+    for test in document["evaluatedTests"]:
+        yield {"type": "evaluation", **test}
+    results = document["queryResults"]
+    for idx, query in enumerate(document["sapQueries"]):
+        result = {k: v for k, v in (results[idx] if idx < len(results) else {}).items() if k not in ("query", "sample")}
+        yield {"type": "query", **query, **result}
+
+
+def _json_pieces(document, meta):
+    yield f'{{"timestamp":{json.dumps(meta["timestamp"])},"partial":{json.dumps(meta["partial"])}'
+    for key in ("evaluatedTests", "sapQueries", "queryResults"):
+        yield f',"{key}":['
+        for idx, item in enumerate(document[key]):
+            yield (",\n" if idx else "\n") + json.dumps(item)
+        yield "]"
+    yield "}\n"
+
+
+def _ndjson_pieces(document, meta):
+    yield json.dumps({"type": "meta", **meta}) + "\n"
+    for record in export_records(document):
+        yield json.dumps(record) + "\n"
+
+
+def _csv_pieces(document, meta):
+    class Line:
+        def write(self, text):
+            return text
+
+    writer = csv.writer(Line())
+    yield writer.writerow(EXPORT_COLUMNS)
+    for record in export_records(document):
+        yield writer.writerow([
+            json.dumps(value) if isinstance(value, (dict, list)) else value
+            for value in (record.get(column) for column in EXPORT_COLUMNS)
+        ])
+
+
+def _columnar_pieces(document, meta):
+    yield json.dumps({"type": "meta", **meta, "columns": EXPORT_COLUMNS}) + "\n"
+    row_group = 0
+    records = export_records(document)
+    while True:
+        group = [record for _, record in zip(range(EXPORT_ROW_GROUP), records)]
+        if not group:
+            break
+        yield json.dumps({
+            "rowGroup": row_group,
+            "rows": len(group),
+            "columns": {column: [record.get(column) for record in group] for column in EXPORT_COLUMNS},
+        }) + "\n"
+        row_group += 1
+
+
+EXPORT_FORMATS = {
+    "json": ("json", _json_pieces),
+    "ndjson": ("ndjson", _ndjson_pieces),
+    "csv": ("csv", _csv_pieces),
+    "columnar": ("columns.ndjson", _columnar_pieces),
+}
+
+
+def write_export(document, path, fmt="json", compress=False, partial=False):
+    """Stream an export document to ``path`` piece by piece, optionally gzipped."""
+    meta = {"timestamp": document["timestamp"], "partial": partial}
+    opener = gzip.open if compress else open
+    with opener(path, "wt", encoding="utf-8", newline="") as handle:
+        for piece in EXPORT_FORMATS[fmt][1](document, meta):
+            handle.write(piece)
+
+
+def expand_inputs(patterns):
+    """Resolve directories and glob patterns into a sorted list of CSV paths."""
+    paths = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            pattern = os.path.join(pattern, "**", "*.csv")
+        paths.update(p for p in glob.glob(pattern, recursive=True) if os.path.isfile(p))
+    return sorted(paths)
+
+
+class Checkpoint:
+    """Per-file progress record so an interrupted batch can resume."""
+
+    def __init__(self, out_dir):
+        self.path = os.path.join(out_dir, CHECKPOINT_FILE)
+        self.lock = threading.Lock()
+        try:
+            with open(self.path, encoding="utf-8") as handle:
+                self.entries = json.load(handle)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def is_done(self, path, digest, output):
+        """True if ``path`` with this content was already exported to ``output``."""
+        entry = self.entries.get(os.path.abspath(path))
+        return (bool(entry) and entry["sha256"] == digest and entry["output"] == output
+                and os.path.exists(output))
+
+    def record(self, path, entry):
+        with self.lock:
+            self.entries[os.path.abspath(path)] = entry
+            tmp = f"{self.path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as handle:
+                json.dump(self.entries, handle, indent=2)
+            os.replace(tmp, self.path)
+
+
+def output_path(out_dir, path, fmt="json", compress=False):
+    stem = os.path.splitext(os.path.basename(path))[0]
+    suffix = EXPORT_FORMATS[fmt][0] + (".gz" if compress else "")
+    return os.path.join(out_dir, f"{stem}-{hashlib.sha1(os.path.abspath(path).encode()).hexdigest()[:8]}.sap-test-results.{suffix}")
+
+
+def run_batch(inputs, out_dir, workers=4, transport=None, resume=True, log=None, fmt="json", compress=False,
+              tracer=None):
+    """Process every CSV matched by ``inputs`` and write one export per file.
+
+    Returns a report dict with per-file outcomes, rows-per-minute throughput
+    and per-stage timings; the full span timeline is written to
+    ``trace.json`` in ``out_dir``.  Files already exported with the same
+    content, format and compression are skipped when ``resume`` is true.
+    """
+    tracer = tracer or Tracer("batch")
+    transport = transport or RateLimitedTransport(AnthropicTransport())
+    os.makedirs(out_dir, exist_ok=True)
+    checkpoint = Checkpoint(out_dir)
+    executors = threading.local()
+    log = log or (lambda message: None)
+
+    def handle(path):
+        digest = file_digest(path)
+        target = output_path(out_dir, path, fmt, compress)
+        if resume and checkpoint.is_done(path, digest, target):
+            log(f"skip  {path} (checkpointed)")
+            return {"file": path, "status": "skipped", "rows": 0}
+        if not hasattr(executors, "executor"):
+            executors.executor = StandInExecutor()
+        started = time.perf_counter()
+        document, rows, failed_chunks = process_file(path, transport, executors.executor, tracer)
+        status = "partial" if failed_chunks else "done"
+        with tracer.span("export.write", file=path, format=fmt):
+            write_export(document, f"{target}.tmp", fmt, compress, partial=status == "partial")
+        os.replace(f"{target}.tmp", target)
+        if status == "done":
+            checkpoint.record(path, {"sha256": digest, "output": target, "rows": rows})
+        log(f"{status:5} {path} ({rows} rows, {time.perf_counter() - started:.1f}s)")
+        return {"file": path, "status": status, "rows": rows, "output": target, "failedChunks": failed_chunks}
+
+    paths = expand_inputs(inputs)
+    started = time.perf_counter()
+    outcomes = []
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(handle, path): path for path in paths}
+        for future in concurrent.futures.as_completed(futures):
+            try:
+                outcomes.append(future.result())
+            except Exception as exc:
+                log(f"error {futures[future]}: {exc}")
+                outcomes.append({"file": futures[future], "status": "error", "rows": 0, "error": str(exc)})
+
+    elapsed = time.perf_counter() - started
+    rows = sum(outcome["rows"] for outcome in outcomes)
+    report = {
+        "files": sorted(outcomes, key=lambda outcome: outcome["file"]),
+        "rows": rows,
+        "seconds": round(elapsed, 3),
+        "rowsPerMinute": round(rows / elapsed * 60, 1) if elapsed > 0 else 0.0,
+    }
+    if hasattr(transport, "metrics"):
+        report["scheduler"] = transport.metrics()
+    report["trace"] = tracer.summary()
+    with open(os.path.join(out_dir, TRACE_FILE), "w", encoding="utf-8") as handle:
+        json.dump(tracer.to_chrome_trace(), handle)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the SAP test converter pipeline over CSV files.")
+    parser.add_argument("inputs", nargs="+", help="CSV files, directories or glob patterns")
+    parser.add_argument("--out", default="sap-test-results", help="output directory (default: %(default)s)")
+    parser.add_argument("--workers", type=int, default=4, help="files processed in parallel (default: %(default)s)")
+    parser.add_argument("--format", choices=sorted(EXPORT_FORMATS), default="json",
+                        help="export format (default: %(default)s)")
+    parser.add_argument("--gzip", action="store_true", help="gzip-compress each export")
+    parser.add_argument("--no-resume", action="store_true", help="reprocess files already in the checkpoint")
+    args = parser.parse_args(argv)
+
+    report = run_batch(args.inputs, args.out, workers=args.workers, resume=not args.no_resume,
+                       fmt=args.format, compress=args.gzip, log=lambda message: print(message, file=sys.stderr))
+    failed = [outcome for outcome in report["files"] if outcome["status"] in ("error", "partial")]
+    print(f"{len(report['files'])} files, {report['rows']} rows in {report['seconds']}s "
+          f"({report['rowsPerMinute']} rows/min), {len(failed)} incomplete")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,491 @@
+"""Delta-aware bulk sync for the Salesforce Connector Agent.
+
+Agent outputs for a tender are mapped to one ``Tender__c`` record and
+``Tender_Line_Item__c`` records keyed by external ID.  Each record is
+hashed and compared with the state recorded after the last successful
+sync, so only new or changed records are written.  Line items go through
+the composite sObject collections API in batches of ``batch_size``
+(200 is the Salesforce maximum), and line items that disappeared are
+deleted.  Generated files are uploaded as ``ContentVersion`` records
+concurrently.  Requests share a pool of keep-alive HTTP connections::
+
+    from sf_sync import SalesforceClient, SalesforceSync
+
+    client = SalesforceClient(instance_url, access_token, pool_size=4)
+    report = SalesforceSync(client, state_dir=".sf-sync").sync(outputs)
+
+``MockSalesforce`` serves the same endpoints from memory for local runs
+and tests; ``python sf_sync.py --mock --port 8765`` starts one.
+"""
+
+import argparse
+import base64
+import concurrent.futures
+import datetime
+import hashlib
+import http.client
+import http.server
+import itertools
+import json
+import os
+import queue
+import re
+import sys
+import threading
+import urllib.parse
+
+from tender_extract import parse_date, submission_deadline
+
+SF_API_VERSION = "v59.0"
+SYNC_BATCH_SIZE = 200
+POOL_SIZE = 4
+ATTACHMENT_WORKERS = 4
+REQUEST_TIMEOUT_S = 60.0
+TENDER_OBJECT = "Tender__c"
+TENDER_KEY = "Tender_Id__c"
+LINE_OBJECT = "Tender_Line_Item__c"
+LINE_KEY = "External_Id__c"
+SF_DATE_PATTERN = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
+
+class SalesforceError(Exception):
+    """Raised when Salesforce rejects a request."""
+
+    def __init__(self, message, status=None, body=None):
+        super().__init__(message)
+        self.status = status
+        self.body = body
+
+
+class SalesforceClient:
+    """REST client over a bounded pool of keep-alive connections.
+
+    ``http.client`` connections are not thread-safe, so each request
+    borrows one from the pool and returns it when the response has been
+    read; a connection dropped by the server is replaced and the request
+    retried once.
+    """
+
+    def __init__(self, instance_url, access_token, pool_size=POOL_SIZE, api_version=SF_API_VERSION,
+                 timeout=REQUEST_TIMEOUT_S):
+        parsed = urllib.parse.urlsplit(instance_url)
+        self.scheme, self.host = parsed.scheme, parsed.netloc
+        self.base = f"/services/data/{api_version}"
+        self.headers = {"Authorization": f"Bearer {access_token}", "Content-Type": "application/json",
+                        "Accept": "application/json"}
+        self.timeout = timeout
+        self.idle = queue.LifoQueue()
+        self.slots = threading.BoundedSemaphore(pool_size)
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def _connect(self):
+        factory = http.client.HTTPSConnection if self.scheme == "https" else http.client.HTTPConnection
+        return factory(self.host, timeout=self.timeout)
+
+    def request(self, method, path, payload=None):
+        """Send one API request and return the decoded JSON body (or ``None``)."""
+        body = json.dumps(payload).encode() if payload is not None else None
+        with self.slots:
+            try:
+                connection = self.idle.get_nowait()
+            except queue.Empty:
+                connection = self._connect()
+            for attempt in range(2):
+                try:
+                    connection.request(method, self.base + path, body, self.headers)
+                    response = connection.getresponse()
+                    data = response.read()
+                    break
+                except (ConnectionError, http.client.HTTPException):
+                    connection.close()
+                    if attempt:
+                        raise
+                    connection = self._connect()
+            self.idle.put(connection)
+        with self.lock:
+            self.calls += 1
+        decoded = json.loads(data) if data else None
+        if response.status >= 400:
+            raise SalesforceError(f"{method} {path} failed with {response.status}", response.status, decoded)
+        return decoded
+
+    def upsert(self, sobject, key, value, fields):
+        return self.request("PATCH", f"/sobjects/{sobject}/{key}/{urllib.parse.quote(str(value), safe='')}", fields)
+
+    def upsert_many(self, sobject, key, records):
+        """Upsert up to 200 records by external ID; returns per-record results in order."""
+        payload = {"allOrNone": False, "records": [dict(record, attributes={"type": sobject}) for record in records]}
+        return self.request("PATCH", f"/composite/sobjects/{sobject}/{key}", payload)
+
+    def delete_many(self, ids):
+        return self.request("DELETE", f"/composite/sobjects?ids={','.join(ids)}&allOrNone=false")
+
+    def upload(self, parent_id, name, content):
+        return self.request("POST", "/sobjects/ContentVersion", {
+            "Title": os.path.splitext(name)[0],
+            "PathOnClient": name,
+            "VersionData": base64.b64encode(content).decode(),
+            "FirstPublishLocationId": parent_id,
+        })
+
+    def close(self):
+        while True:
+            try:
+                self.idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+def record_hash(record):
+    return hashlib.sha256(json.dumps(record, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def sf_date(value):
+    """``YYYY-MM-DD`` for a Salesforce Date field, or ``None`` if ``value`` is not a date."""
+    parsed = parse_date(value)
+    return parsed.date().isoformat() if parsed else None
+
+
+def _is_sf_date(value):
+    if not isinstance(value, str) or not SF_DATE_PATTERN.match(value):
+        return False
+    try:
+        datetime.date.fromisoformat(value)
+    except ValueError:
+        return False
+    return True
+
+
+def _first(matches):
+    return matches[0] if isinstance(matches, list) and matches and isinstance(matches[0], dict) else {}
+
+
+def build_records(outputs):
+    """Map hub agent outputs to ``(tender_id, fields, {external_id: line_fields}, {name: path})``."""
+    tender = outputs.get("tender") or {}
+    tender_id = tender.get("tenderId")
+    if not tender_id:
+        raise SalesforceError("tender output has no tenderId")
+    pricing = outputs.get("pricing") or {}
+    approval = outputs.get("approval") or {}
+    impact = outputs.get("impact") or {}
+    fields = {
+        "Name": str(tender_id)[:80],
+        "Authority__c": tender.get("authority"),
+        "Delivery_Terms__c": tender.get("deliveryTerms"),
+        "Submission_Deadline__c": sf_date(submission_deadline(tender.get("deadlines"))),
+        "Region__c": tender.get("region"),
+        "Suggested_Total__c": pricing.get("suggestedTotal"),
+        "Pricing_Confidence__c": pricing.get("confidence"),
+        "Risk_Score__c": approval.get("riskScore"),
+        "Recommendation__c": approval.get("recommendation"),
+        "Win_Probability__c": impact.get("winProbability"),
+    }
+    products = outputs.get("products") or []
+    priced = {line.get("line"): line for line in pricing.get("lines", [])}
+    lines = {}
+    for index, item in enumerate(tender.get("items", [])):
+        number = item.get("line", index + 1)
+        match, price = _first(products[index] if index < len(products) else None), priced.get(number, {})
+        external_id = f"{tender_id}:{number}"
+        lines[external_id] = {
+            LINE_KEY: external_id,
+            "Tender__r": {TENDER_KEY: tender_id},
+            "Line_Number__c": number,
+            "Description__c": (item.get("description") or "")[:255],
+            "Molecule__c": item.get("molecule"),
+            "Strength__c": item.get("strength"),
+            "Quantity__c": item.get("quantity"),
+            "SKU__c": match.get("sku"),
+            "Match_Score__c": match.get("score"),
+            "Bid_Price__c": price.get("suggestedPrice"),
+            "Win_Probability__c": price.get("winProbability"),
+        }
+    documents = outputs.get("documents") or {}
+    if isinstance(documents, (list, tuple)):
+        documents = {os.path.basename(path): path for path in documents}
+    return tender_id, fields, lines, documents
+
+
+class SyncState:
+    """Hashes and Salesforce IDs from the last successful sync, one JSON file per tender."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, tender_id):
+        return os.path.join(self.directory, f"{hashlib.sha1(str(tender_id).encode()).hexdigest()}.json")
+
+    def load(self, tender_id):
+        try:
+            with open(self._path(tender_id), encoding="utf-8") as handle:
+                return json.load(handle)
+        except FileNotFoundError:
+            return {"tender": {}, "lines": {}, "attachments": {}}
+
+    def save(self, tender_id, state):
+        path = self._path(tender_id)
+        with open(f"{path}.tmp", "w", encoding="utf-8") as handle:
+            json.dump(state, handle)
+        os.replace(f"{path}.tmp", path)
+
+
+class SalesforceSync:
+    """Writes only what changed since the last sync of each tender."""
+
+    def __init__(self, client, state_dir=".sf-sync", batch_size=SYNC_BATCH_SIZE, attachment_workers=ATTACHMENT_WORKERS):
+        if not 1 <= batch_size <= SYNC_BATCH_SIZE:
+            raise ValueError(f"batch_size must be between 1 and {SYNC_BATCH_SIZE}")
+        self.client = client
+        self.state = SyncState(state_dir)
+        self.batch_size = batch_size
+        self.attachment_workers = attachment_workers
+
+    def sync(self, outputs):
+        """Sync one tender's agent outputs and return a report of what was written.
+
+        State is saved after each step, so a failed run resumes with only
+        the records that did not make it.
+        """
+        tender_id, fields, lines, documents = build_records(outputs)
+        state = self.state.load(tender_id)
+        calls = self.client.calls
+        report = {"tender": tender_id, "tenderRecord": "unchanged", "errors": [],
+                  "lines": {"upserted": 0, "unchanged": 0, "deleted": 0, "failed": 0},
+                  "attachments": {"uploaded": 0, "unchanged": 0, "failed": 0}}
+
+        digest = record_hash(fields)
+        if state["tender"].get("hash") != digest:
+            result = self.client.upsert(TENDER_OBJECT, TENDER_KEY, tender_id, fields) or {}
+            state["tender"] = {"hash": digest, "id": result.get("id") or state["tender"].get("id")}
+            report["tenderRecord"] = "created" if result.get("created") else "updated"
+            self.state.save(tender_id, state)
+
+        changed = [(key, record, record_hash(record)) for key, record in lines.items()
+                   if state["lines"].get(key, {}).get("hash") != record_hash(record)]
+        report["lines"]["unchanged"] = len(lines) - len(changed)
+        for start in range(0, len(changed), self.batch_size):
+            batch = changed[start:start + self.batch_size]
+            results = self.client.upsert_many(LINE_OBJECT, LINE_KEY, [record for _, record, _ in batch])
+            for (key, _, digest), result in zip(batch, results):
+                if result.get("success"):
+                    state["lines"][key] = {"hash": digest, "id": result.get("id")}
+                    report["lines"]["upserted"] += 1
+                else:
+                    report["lines"]["failed"] += 1
+                    report["errors"].append({"record": key, "errors": result.get("errors")})
+            self.state.save(tender_id, state)
+
+        stale = [key for key in state["lines"] if key not in lines]
+        for start in range(0, len(stale), self.batch_size):
+            batch = stale[start:start + self.batch_size]
+            ids = [state["lines"][key]["id"] for key in batch if state["lines"][key].get("id")]
+            results = self.client.delete_many(ids) if ids else []
+            failed = {result.get("id") for result in results if not result.get("success")}
+            for key in batch:
+                if state["lines"][key].get("id") not in failed:
+                    del state["lines"][key]
+                    report["lines"]["deleted"] += 1
+            self.state.save(tender_id, state)
+
+        self._sync_attachments(documents, state, report)
+        self.state.save(tender_id, state)
+        report["apiCalls"] = self.client.calls - calls
+        return report
+
+    def _sync_attachments(self, documents, state, report):
+        parent = state["tender"].get("id")
+        pending = []
+        for name, path in documents.items():
+            with open(path, "rb") as handle:
+                content = handle.read()
+            digest = hashlib.sha256(content).hexdigest()
+            if state["attachments"].get(name, {}).get("hash") == digest:
+                report["attachments"]["unchanged"] += 1
+            else:
+                pending.append((name, content, digest))
+        if not pending:
+            return
+        if not parent:
+            raise SalesforceError("cannot attach files before the Tender__c record has an id")
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.attachment_workers) as pool:
+            futures = {pool.submit(self.client.upload, parent, name, content): (name, digest)
+                       for name, content, digest in pending}
+            for future in concurrent.futures.as_completed(futures):
+                name, digest = futures[future]
+                try:
+                    result = future.result() or {}
+                except SalesforceError as exc:
+                    report["attachments"]["failed"] += 1
+                    report["errors"].append({"record": name, "errors": exc.body or str(exc)})
+                    continue
+                state["attachments"][name] = {"hash": digest, "id": result.get("id")}
+                report["attachments"]["uploaded"] += 1
+
+
+class MockSalesforce:
+    """In-memory stand-in for the REST endpoints ``SalesforceClient`` uses.
+
+    Records are kept per sObject and external ID; ``calls`` counts every
+    request so tests can assert on API usage.  Like a real org, it rejects
+    ``*_Deadline__c`` values that are not ``YYYY-MM-DD`` dates.  Use as a context manager
+    or call ``start``/``stop``; ``url`` is the instance URL to connect to.
+    """
+
+    PATHS = [
+        ("PATCH", re.compile(r"^/sobjects/(\w+)/(\w+)/([^/]+)$"), "_upsert_one"),
+        ("PATCH", re.compile(r"^/composite/sobjects/(\w+)/(\w+)$"), "_upsert_many"),
+        ("DELETE", re.compile(r"^/composite/sobjects$"), "_delete_many"),
+        ("POST", re.compile(r"^/sobjects/ContentVersion$"), "_content_version"),
+    ]
+
+    def __init__(self, host="127.0.0.1", port=0, api_version=SF_API_VERSION, fail=None):
+        self.records = {}
+        self.files = {}
+        self.calls = []
+        self.fail = fail or (lambda method, path, payload: None)
+        self.base = f"/services/data/{api_version}"
+        self.ids = itertools.count(1)
+        self.lock = threading.Lock()
+        mock = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _dispatch(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                payload = json.loads(self.rfile.read(length)) if length else None
+                status, body = mock.handle(self.command, self.path, payload)
+                data = json.dumps(body).encode() if body is not None else b""
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = do_POST = do_PATCH = do_DELETE = _dispatch
+
+        self.server = http.server.ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://{host}:{self.server.server_address[1]}"
+        self.thread = None
+
+    def _new_id(self, sobject):
+        return f"{sobject[:3]}{next(self.ids):012d}"
+
+    def handle(self, method, raw_path, payload):
+        parsed = urllib.parse.urlsplit(raw_path)
+        with self.lock:
+            self.calls.append((method, parsed.path))
+        if not parsed.path.startswith(self.base):
+            return 404, [{"errorCode": "NOT_FOUND", "message": "unknown API version"}]
+        path = parsed.path[len(self.base):]
+        injected = self.fail(method, path, payload)
+        if injected:
+            return injected
+        for verb, pattern, handler in self.PATHS:
+            match = pattern.match(path)
+            if verb == method and match:
+                with self.lock:
+                    return getattr(self, handler)(payload, urllib.parse.parse_qs(parsed.query),
+                                                  *map(urllib.parse.unquote, match.groups()))
+        return 404, [{"errorCode": "NOT_FOUND", "message": f"{method} {path}"}]
+
+    def _store(self, sobject, key, value, fields):
+        table = self.records.setdefault(sobject, {})
+        created = value not in table
+        record = table.setdefault(value, {"Id": self._new_id(sobject), key: value})
+        record.update({name: field for name, field in fields.items() if name != "attributes"})
+        return {"id": record["Id"], "success": True, "errors": [], "created": created}
+
+    @staticmethod
+    def _invalid_fields(fields):
+        errors = []
+        for name, value in fields.items():
+            if name.endswith("_Deadline__c") and value is not None and not _is_sf_date(value):
+                errors.append({"statusCode": "INVALID_TYPE_ON_FIELD_IN_RECORD", "fields": [name],
+                               "message": f"{name}: value not of required type: {value}"})
+        return errors
+
+    def _upsert_one(self, payload, query, sobject, key, value):
+        errors = self._invalid_fields(payload or {})
+        if errors:
+            return 400, [dict(error, errorCode=error["statusCode"]) for error in errors]
+        result = self._store(sobject, key, value, payload or {})
+        return (201 if result["created"] else 200), result
+
+    def _upsert_many(self, payload, query, sobject, key):
+        records = (payload or {}).get("records", [])
+        if len(records) > SYNC_BATCH_SIZE:
+            return 400, [{"errorCode": "EXCEEDED_ID_LIMIT", "message": "record limit is 200"}]
+        results = []
+        for record in records:
+            errors = self._invalid_fields(record)
+            if not record.get(key):
+                results.append({"success": False, "errors": [{"statusCode": "MISSING_EXTERNAL_ID"}]})
+            elif errors:
+                results.append({"success": False, "errors": errors})
+            else:
+                results.append(self._store(sobject, key, record[key], record))
+        return 200, results
+
+    def _delete_many(self, payload, query):
+        ids = ",".join(query.get("ids", [])).split(",")
+        results = []
+        for record_id in filter(None, ids):
+            owner = next((table for table in self.records.values()
+                          for value, record in table.items() if record["Id"] == record_id), None)
+            if owner is None:
+                results.append({"id": record_id, "success": False, "errors": [{"statusCode": "ENTITY_IS_DELETED"}]})
+                continue
+            del owner[next(value for value, record in owner.items() if record["Id"] == record_id)]
+            results.append({"id": record_id, "success": True, "errors": []})
+        return 200, results
+
+    def _content_version(self, payload, query):
+        record_id = self._new_id("ContentVersion")
+        self.files[record_id] = dict(payload, VersionData=base64.b64decode(payload.get("VersionData", "")))
+        return 201, {"id": record_id, "success": True, "errors": []}
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Salesforce sync utilities for the Tender Intelligence Hub.")
+    parser.add_argument("--mock", action="store_true", help="serve a local mock Salesforce until interrupted")
+    parser.add_argument("--port", type=int, default=8765, help="mock server port (default: %(default)s)")
+    args = parser.parse_args(argv)
+    if not args.mock:
+        parser.print_help()
+        return 2
+    mock = MockSalesforce(port=args.port)
+    print(f"mock Salesforce listening on {mock.url}", file=sys.stderr)
+    try:
+        mock.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        mock.server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,260 @@
+"""Dependency-graph executor for the Tender Intelligence Hub agents.
+
+Each agent in ``a.py`` declares the inputs it reads and the outputs it
+produces.  ``DagExecutor`` starts an agent as soon as all of its inputs
+exist, so agents that only need the Tender Understanding output run side by
+side and the wall-clock time per tender follows the critical path instead
+of the sum of all agents::
+
+    from tender_dag import DagExecutor, build_tender_graph
+
+    executor = DagExecutor(build_tender_graph(handlers, timeouts={"competitor_analysis": 20}))
+    result = executor.run({"document": path, "product_master": master, "history": history})
+    result.outputs["pricing"], result.agents["pricing_optimization"]["status"]
+
+An agent that fails or overruns its timeout contributes its ``fallback``
+outputs, if it has one, and the run carries on with partial results;
+agents whose required inputs never appear are marked ``skipped``.
+"""
+
+import concurrent.futures
+import threading
+import time
+
+AGENT_TIMEOUT_S = 120.0
+DAG_WORKERS = 8
+
+# Inputs and outputs per agent, from the agent table in ``a.py``.  Inputs
+# marked optional let the agent run with whatever partial results exist;
+# ``features`` is the shared ``feature_store.FeatureStore``.
+TENDER_AGENT_IO = {
+    "tender_understanding": {"inputs": ("document",), "outputs": ("tender",)},
+    "product_matching": {"inputs": ("tender", "product_master"), "outputs": ("products",)},
+    "competitor_analysis": {"inputs": ("tender", "products"), "optional": ("features",), "outputs": ("competitors",)},
+    "pricing_optimization": {"inputs": ("tender", "history"), "optional": ("products", "competitors"),
+                             "outputs": ("pricing",)},
+    "risk_compliance": {"inputs": ("tender", "products"), "optional": ("competitors", "features"),
+                        "outputs": ("approval",)},
+    "business_impact": {"inputs": ("tender", "pricing", "history"), "optional": ("features",),
+                        "outputs": ("impact",)},
+    "rfp_assistant": {"inputs": ("tender",), "outputs": ("rfp_index",)},
+    "translation": {"inputs": ("tender",), "outputs": ("translations",)},
+    "document_generator": {"inputs": ("tender", "pricing", "approval"), "optional": ("translations",),
+                           "outputs": ("documents",)},
+    "salesforce_connector": {"inputs": ("tender",),
+                             "optional": ("products", "competitors", "pricing", "approval", "impact",
+                                          "translations", "documents"),
+                             "outputs": ("salesforce",)},
+}
+
+
+class DagError(Exception):
+    """Raised when an agent graph cannot be scheduled."""
+
+
+class AgentSpec:
+    """One agent node: a callable plus the inputs it needs and outputs it makes.
+
+    ``run`` receives a dict of the available inputs and returns a dict keyed
+    by output name; an agent with a single output may return the value
+    itself.  ``fallback`` is a dict of outputs, or a callable taking the
+    inputs and the exception, used when the agent fails or times out.
+    """
+
+    def __init__(self, name, run, inputs=(), outputs=(), optional=(), timeout=AGENT_TIMEOUT_S, fallback=None):
+        self.name = name
+        self.run = run
+        self.inputs = tuple(inputs)
+        self.outputs = tuple(outputs)
+        self.optional = tuple(optional)
+        self.timeout = timeout
+        self.fallback = fallback
+
+    def __repr__(self):
+        return f"AgentSpec({self.name!r}, inputs={self.inputs}, outputs={self.outputs})"
+
+
+class DagResult:
+    """Outputs and per-agent outcomes of one ``DagExecutor.run``."""
+
+    def __init__(self, outputs, agents, seconds, critical_path):
+        self.outputs = outputs
+        self.agents = agents
+        self.seconds = seconds
+        self.critical_path = critical_path
+
+    @property
+    def complete(self):
+        return all(agent["status"] == "done" for agent in self.agents.values())
+
+    def summary(self):
+        busy = sum(agent.get("ms", 0.0) for agent in self.agents.values())
+        return {
+            "seconds": round(self.seconds, 3),
+            "agentMs": round(busy, 1),
+            "criticalPath": self.critical_path,
+            "agents": self.agents,
+        }
+
+
+def build_tender_graph(handlers, timeouts=None, fallbacks=None, io=TENDER_AGENT_IO):
+    """Return ``AgentSpec`` nodes for every agent in ``handlers``.
+
+    ``handlers`` maps agent names from ``TENDER_AGENT_IO`` to callables;
+    agents without a handler are left out of the graph.
+    """
+    timeouts, fallbacks = timeouts or {}, fallbacks or {}
+    unknown = set(handlers) - set(io)
+    if unknown:
+        raise DagError(f"unknown agents: {', '.join(sorted(unknown))}")
+    return [
+        AgentSpec(name, handler, io[name]["inputs"], io[name]["outputs"], io[name].get("optional", ()),
+                  timeouts.get(name, AGENT_TIMEOUT_S), fallbacks.get(name))
+        for name, handler in handlers.items()
+    ]
+
+
+class DagExecutor:
+    """Runs a set of ``AgentSpec`` nodes on threads in dependency order.
+
+    At most ``workers`` agents run at once, each on its own thread, and an
+    agent's timeout counts from the moment it starts.  A timed-out agent
+    keeps its thread until it returns, because Python threads cannot be
+    interrupted; it stops counting against ``workers`` and its late result
+    is discarded.
+    """
+
+    def __init__(self, specs, workers=DAG_WORKERS):
+        self.specs = {}
+        self.producers = {}
+        for spec in specs:
+            if spec.name in self.specs:
+                raise DagError(f"duplicate agent {spec.name!r}")
+            self.specs[spec.name] = spec
+            for output in spec.outputs:
+                if output in self.producers:
+                    raise DagError(f"output {output!r} produced by both {self.producers[output]!r} and {spec.name!r}")
+                self.producers[output] = spec.name
+        self.workers = workers
+        self.order = self._topological_order()
+
+    def _upstream(self, spec):
+        return {self.producers[name] for name in spec.inputs + spec.optional if name in self.producers}
+
+    def _topological_order(self):
+        order, state = [], {}
+
+        def visit(name, path):
+            if state.get(name) == "done":
+                return
+            if state.get(name) == "visiting":
+                raise DagError(f"dependency cycle: {' -> '.join(path + [name])}")
+            state[name] = "visiting"
+            for upstream in sorted(self._upstream(self.specs[name])):
+                visit(upstream, path + [name])
+            state[name] = "done"
+            order.append(name)
+
+        for name in self.specs:
+            visit(name, [])
+        return order
+
+    def run(self, initial):
+        """Execute the graph over ``initial`` inputs and return a ``DagResult``."""
+        missing = {name for spec in self.specs.values() for name in spec.inputs
+                   if name not in self.producers and name not in initial}
+        if missing:
+            raise DagError(f"inputs with no value or producer: {', '.join(sorted(missing))}")
+
+        outputs = dict(initial)
+        agents = {}
+        waiting = list(self.order)
+        running = {}
+        begun = {}
+        started = time.perf_counter()
+
+        def settled(name):
+            return name in outputs or name not in self.producers or self.producers[name] in agents
+
+        while waiting or running:
+            for name in list(waiting):
+                spec = self.specs[name]
+                if not all(settled(dep) for dep in spec.inputs + spec.optional):
+                    continue
+                absent = [dep for dep in spec.inputs if dep not in outputs]
+                if absent:
+                    waiting.remove(name)
+                    agents[name] = {"status": "skipped", "ms": 0.0, "missing": absent}
+                    continue
+                if len(running) >= self.workers:
+                    continue
+                waiting.remove(name)
+                inputs = {dep: outputs[dep] for dep in spec.inputs + spec.optional if dep in outputs}
+                future = concurrent.futures.Future()
+                running[future] = (name, inputs, time.perf_counter())
+                threading.Thread(target=self._invoke, args=(spec, inputs, future, begun), name=f"agent-{name}",
+                                 daemon=True).start()
+            if not running:
+                continue
+
+            now = time.perf_counter()
+            timeout = min(begun.get(name, launched) + self.specs[name].timeout
+                          for name, _, launched in running.values()) - now
+            done, _ = concurrent.futures.wait(running, timeout=max(timeout, 0),
+                                              return_when=concurrent.futures.FIRST_COMPLETED)
+            now = time.perf_counter()
+            for future, (name, inputs, launched) in list(running.items()):
+                spec = self.specs[name]
+                begin = begun.get(name, launched)
+                if future in done:
+                    error = future.exception()
+                    status = "failed" if error else "done"
+                elif now - begin >= spec.timeout:
+                    error, status = TimeoutError(f"{name} exceeded {spec.timeout}s"), "timeout"
+                else:
+                    continue
+                del running[future]
+                record = {"status": status, "ms": round((now - begin) * 1000, 1)}
+                produced = future.result() if status == "done" else None
+                if produced is None:
+                    record["error"] = str(error)
+                    produced = self._fallback(spec, inputs, error)
+                    record["fallback"] = produced is not None
+                outputs.update(produced or {})
+                agents[name] = record
+
+        seconds = time.perf_counter() - started
+        return DagResult(outputs, agents, seconds, self._critical_path(agents))
+
+    @staticmethod
+    def _invoke(spec, inputs, future, begun):
+        begun[spec.name] = time.perf_counter()
+        try:
+            future.set_result(DagExecutor._outputs(spec, spec.run(inputs)))
+        except Exception as exc:
+            future.set_exception(exc)
+
+    @staticmethod
+    def _outputs(spec, value):
+        if len(spec.outputs) == 1 and not (isinstance(value, dict) and set(value) == set(spec.outputs)):
+            return {spec.outputs[0]: value}
+        if not isinstance(value, dict):
+            raise DagError(f"{spec.name} must return a dict with {spec.outputs}")
+        return {name: value[name] for name in spec.outputs if name in value}
+
+    @staticmethod
+    def _fallback(spec, inputs, error):
+        if spec.fallback is None:
+            return None
+        produced = spec.fallback(inputs, error) if callable(spec.fallback) else spec.fallback
+        return {name: produced[name] for name in spec.outputs if name in produced}
+
+    def _critical_path(self, agents):
+        """Longest chain of agent durations through the graph, in run order."""
+        best = {}
+        for name in self.order:
+            upstream = [best[up] for up in self._upstream(self.specs[name]) if up in best]
+            ms, path = max(upstream, default=(0.0, []), key=lambda item: item[0])
+            best[name] = (ms + agents.get(name, {}).get("ms", 0.0), path + [name])
+        ms, path = max(best.values(), default=(0.0, []), key=lambda item: item[0])
+        return {"ms": round(ms, 1), "agents": path}
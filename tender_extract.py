@@ -0,0 +1,403 @@
+"""Page-streaming extraction for the Tender Understanding Agent.
+
+Tender documents are read one page at a time rather than loaded whole.
+Header fields (tender ID, authority, deadlines, delivery terms) are
+emitted as soon as they have been seen, and drug schedule lines are
+yielded in batches while the rest of the document is still being read::
+
+    from tender_extract import PageCache, stream_tender
+
+    cache = PageCache(".tender-page-cache")
+    for kind, payload in stream_tender("tender.pdf", cache=cache):
+        if kind == "header":
+            start_matching(payload)
+        elif kind == "items":
+            enqueue(payload)
+
+Every page is parsed independently and cached under a hash of its raw
+content (for PDFs, the content stream plus the fonts and XObjects it
+draws), so a re-issued corrigendum only re-parses the pages that changed.
+Plain text (``pdftotext`` output, pages split by form feeds) is
+memory-mapped; PDF, Word and Excel need ``pypdf``, ``python-docx`` and
+``openpyxl`` respectively, imported only when such a file is opened.
+"""
+
+import csv
+import datetime
+import hashlib
+import json
+import mmap
+import os
+import re
+import threading
+from collections import OrderedDict
+
+PARSER_VERSION = "2"
+ITEM_BATCH = 200
+HEADER_SCAN_PAGES = 5
+ROWS_PER_PAGE = 100
+PAGE_CACHE_ENTRIES = 20000
+
+HEADER_PATTERNS = {
+    "tenderId": re.compile(r"(?im)\b(?:tender|bid|rfq|rfp)\s*(?:no|number|id|ref(?:erence)?)\b"
+                           r"(?:\.?\s*[:#\-]|\.|\s)\s*([A-Z0-9][A-Z0-9/_.\-]{3,})"),
+    "authority": re.compile(r"(?im)^\s*(?:issued by|procuring (?:entity|authority)|purchaser|"
+                            r"contracting authority|authority)\s*[:\-]\s*(.+?)\s*$"),
+    "deliveryTerms": re.compile(r"(?im)^\s*(?:delivery (?:terms|period|schedule)|incoterms?)\s*[:\-]\s*(.+?)\s*$"),
+}
+DEADLINE_PATTERN = re.compile(
+    r"(?im)^\s*((?:bid )?(?:submission|closing|opening|clarification|pre-bid)[\w ]{0,30}?"
+    r"(?:date|deadline|meeting)?)\s*[:\-]\s*(\d{1,2}[./\-]\d{1,2}[./\-]\d{2,4}|\d{4}-\d{2}-\d{2}|"
+    r"\d{1,2} [A-Za-z]{3,9},? \d{4})"
+)
+ITEM_PATTERN = re.compile(
+    r"^\s*(\d{1,5})[.)]?\s+(.+?)\s+(\d{1,3}(?:[,.\s]\d{3})+|\d+)\s*"
+    r"(tabs?|tablets?|caps?|capsules?|vials?|amps?|ampoules?|bottles?|strips?|packs?|boxes|units?|"
+    r"sachets?|tubes?|bags?|nos?\.?|ea)?\s*$",
+    re.IGNORECASE,
+)
+STRENGTH_PATTERN = re.compile(
+    r"\b(\d+(?:\.\d+)?\s*(?:mg|g|mcg|µg|ml|iu|%)(?:\s*/\s*\d*(?:\.\d+)?\s*(?:ml|g|dose|actuation))?)",
+    re.IGNORECASE,
+)
+DATE_FORMATS = ("%Y-%m-%d", "%d/%m/%Y", "%d.%m.%Y", "%d-%m-%Y", "%d/%m/%y", "%d %B %Y", "%d %b %Y", "%d %b, %Y")
+SUBMISSION_LABELS = ("submission", "closing", "opening")
+FORMULATIONS = ("tablet", "capsule", "injection", "infusion", "syrup", "suspension", "cream", "ointment",
+                "gel", "drops", "inhaler", "sachet", "solution", "powder", "vial", "ampoule", "patch")
+
+
+class ExtractionError(Exception):
+    """Raised when a tender document cannot be read."""
+
+
+class Page:
+    """One page of a document: a content digest plus a lazy text loader.
+
+    The digest is taken from the page's raw bytes where the format allows
+    it, so cached pages skip text extraction as well as parsing.
+    """
+
+    __slots__ = ("number", "digest", "_load")
+
+    def __init__(self, number, raw, load):
+        self.number = number
+        self.digest = hashlib.sha256(PARSER_VERSION.encode() + b"\0" + raw).hexdigest()
+        self._load = load
+
+    def text(self):
+        return self._load()
+
+
+def _text_pages(path):
+    with open(path, "rb") as handle:
+        if os.fstat(handle.fileno()).st_size == 0:
+            return
+        with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as view:
+            start = number = 0
+            while start <= len(view):
+                end = view.find(b"\f", start)
+                end = len(view) if end < 0 else end
+                raw = view[start:end]
+                number += 1
+                yield Page(number, raw, lambda raw=raw: raw.decode("utf-8", "replace"))
+                start = end + 1
+
+
+def _pdf_object_digest(value, memo, active=()):
+    """Digest of a PDF object with references resolved; streams count by their data.
+
+    ``memo`` maps indirect object numbers to digests so shared fonts and
+    XObjects are hashed once per document.
+    """
+    if hasattr(value, "idnum") and hasattr(value, "get_object"):
+        key = (value.idnum, value.generation)
+        if key in memo:
+            return memo[key]
+        if key in active:
+            return b"cycle"
+        memo[key] = digest = _pdf_object_digest(value.get_object(), memo, active + (key,))
+        return digest
+    digest = hashlib.sha256(type(value).__name__.encode())
+    if isinstance(value, dict):
+        for name in sorted(value):
+            digest.update(str(name).encode() + b"\0" + _pdf_object_digest(value[name], memo, active))
+        if hasattr(value, "get_data"):
+            digest.update(value.get_data())
+    elif isinstance(value, list):
+        for item in value:
+            digest.update(_pdf_object_digest(item, memo, active))
+    else:
+        digest.update(repr(value).encode())
+    return digest.digest()
+
+
+def _pdf_pages(path):
+    try:
+        from pypdf import PdfReader
+    except ImportError as exc:
+        raise ExtractionError("reading PDF tenders needs pypdf (pip install pypdf)") from exc
+    reader = PdfReader(path)
+    memo = {}
+    for index, page in enumerate(reader.pages):
+        contents = page.get_contents()
+        raw = contents.get_data() if contents is not None else b""
+        # Many producers emit the same content stream on every page (``q /Fm0 Do Q``) and
+        # keep the text in per-page XObjects and fonts, so the resources are part of the page.
+        resources = page.get("/Resources")
+        raw += b"\0" + (_pdf_object_digest(resources, memo) if resources is not None else b"")
+        yield Page(index + 1, raw, page.extract_text)
+
+
+def _row_pages(rows):
+    batch, number = [], 0
+    for row in rows:
+        cells = ["" if cell is None else str(cell) for cell in row]
+        if any(cell.strip() for cell in cells):
+            batch.append("  ".join(cells))
+        if len(batch) >= ROWS_PER_PAGE:
+            number += 1
+            text = "\n".join(batch)
+            yield Page(number, text.encode(), lambda text=text: text)
+            batch = []
+    if batch:
+        text = "\n".join(batch)
+        yield Page(number + 1, text.encode(), lambda text=text: text)
+
+
+def _xlsx_pages(path):
+    try:
+        from openpyxl import load_workbook
+    except ImportError as exc:
+        raise ExtractionError("reading Excel tenders needs openpyxl (pip install openpyxl)") from exc
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        yield from _row_pages(row for sheet in workbook.worksheets for row in sheet.iter_rows(values_only=True))
+    finally:
+        workbook.close()
+
+
+def _docx_pages(path):
+    try:
+        import docx
+    except ImportError as exc:
+        raise ExtractionError("reading Word tenders needs python-docx (pip install python-docx)") from exc
+    document = docx.Document(path)
+    rows = [[paragraph.text] for paragraph in document.paragraphs]
+    rows += [[cell.text for cell in row.cells] for table in document.tables for row in table.rows]
+    yield from _row_pages(rows)
+
+
+def _csv_pages(path):
+    with open(path, newline="", encoding="utf-8-sig") as handle:
+        yield from _row_pages(csv.reader(handle))
+
+
+PAGE_READERS = {
+    ".txt": _text_pages,
+    ".pdf": _pdf_pages,
+    ".xlsx": _xlsx_pages,
+    ".xlsm": _xlsx_pages,
+    ".docx": _docx_pages,
+    ".csv": _csv_pages,
+}
+
+
+def iter_pages(path):
+    """Yield ``Page`` objects for a tender document, one at a time."""
+    reader = PAGE_READERS.get(os.path.splitext(path)[1].lower())
+    if reader is None:
+        raise ExtractionError(f"unsupported tender format: {path}")
+    return reader(path)
+
+
+def parse_quantity(text):
+    return int(re.sub(r"[,.\s]", "", text))
+
+
+def parse_item(match):
+    number, description, quantity, unit = match.groups()
+    lowered = description.lower()
+    strength = STRENGTH_PATTERN.search(description)
+    return {
+        "line": int(number),
+        "description": description.strip(),
+        "molecule": re.split(r"\s+\d|\s*\(|,", description, maxsplit=1)[0].strip(),
+        "strength": re.sub(r"\s+", "", strength.group(1)).lower() if strength else None,
+        "formulation": next((name for name in FORMULATIONS if name in lowered), None),
+        "quantity": parse_quantity(quantity),
+        "unit": unit.lower().rstrip(".") if unit else None,
+    }
+
+
+def parse_page(text):
+    """Parse one page of text into header fields and schedule line items."""
+    header = {}
+    for field, pattern in HEADER_PATTERNS.items():
+        match = pattern.search(text)
+        if match:
+            header[field] = match.group(1).strip()
+    deadlines = {re.sub(r"\s+", " ", label.strip().lower()): value for label, value in DEADLINE_PATTERN.findall(text)}
+    if deadlines:
+        header["deadlines"] = deadlines
+    items = [parse_item(match) for match in map(ITEM_PATTERN.match, text.splitlines()) if match]
+    return {"header": header, "items": items}
+
+
+def parse_date(value):
+    """``datetime.datetime`` for a date as tenders write it (ISO, ``dd/mm/yyyy``, ``5 March 2026``...)."""
+    text = re.sub(r"\s+", " ", str(value or "").strip())
+    if not text:
+        return None
+    try:
+        return datetime.datetime.fromisoformat(text)
+    except ValueError:
+        pass
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.datetime.strptime(text, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def submission_deadline(deadlines):
+    """The bid submission date from a ``deadlines`` header field, as written.
+
+    Labels mentioning submission are preferred, then closing, then
+    opening; pre-bid meeting and clarification dates are only used when
+    none of those is present.
+    """
+    deadlines = deadlines or {}
+    for word in SUBMISSION_LABELS:
+        for label, value in deadlines.items():
+            if word in str(label).lower():
+                return value
+    return next(iter(deadlines.values()), None)
+
+
+class PageCache:
+    """Parsed pages keyed by content digest: an in-memory LRU over an optional directory.
+
+    Entries on disk are sharded by the first two hex digits of the digest
+    and written atomically, so several agents can share one directory.
+    """
+
+    def __init__(self, directory=None, max_entries=PAGE_CACHE_ENTRIES):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def _path(self, digest):
+        return os.path.join(self.directory, digest[:2], f"{digest}.json")
+
+    def get(self, digest):
+        with self.lock:
+            if digest in self.entries:
+                self.entries.move_to_end(digest)
+                self.hits += 1
+                return self.entries[digest]
+        if self.directory:
+            try:
+                with open(self._path(digest), encoding="utf-8") as handle:
+                    parsed = json.load(handle)
+            except (OSError, ValueError):
+                parsed = None
+            if parsed is not None:
+                self._remember(digest, parsed)
+                with self.lock:
+                    self.hits += 1
+                return parsed
+        with self.lock:
+            self.misses += 1
+        return None
+
+    def put(self, digest, parsed):
+        self._remember(digest, parsed)
+        if self.directory:
+            path = self._path(digest)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(f"{path}.{threading.get_ident()}.tmp", "w", encoding="utf-8") as handle:
+                json.dump(parsed, handle)
+            os.replace(f"{path}.{threading.get_ident()}.tmp", path)
+
+    def _remember(self, digest, parsed):
+        with self.lock:
+            self.entries[digest] = parsed
+            self.entries.move_to_end(digest)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+
+def _merge_header(header, found):
+    changed = False
+    for field, value in found.items():
+        if field == "deadlines":
+            fresh = {label: date for label, date in value.items() if header.setdefault("deadlines", {}).get(label) != date}
+            header["deadlines"].update(fresh)
+            changed = changed or bool(fresh)
+        elif field not in header:
+            header[field] = value
+            changed = True
+    return changed
+
+
+def stream_tender(path, cache=None, batch_size=ITEM_BATCH, header_pages=HEADER_SCAN_PAGES):
+    """Yield ``(kind, payload)`` events while reading a tender page by page.
+
+    ``("header", fields)`` comes first, once the opening ``header_pages``
+    pages have been read or every header field has been found; a later
+    ``header`` event carries the merged fields again if more turn up
+    further in.  ``("items", [...])`` batches follow as schedule lines are
+    parsed, and ``("done", stats)`` closes the stream.
+    """
+    cache = cache if cache is not None else PageCache()
+    header = {}
+    header_sent = False
+    batch = []
+    stats = {"pages": 0, "cachedPages": 0, "items": 0}
+
+    for page in iter_pages(path):
+        parsed = cache.get(page.digest)
+        if parsed is None:
+            parsed = parse_page(page.text())
+            cache.put(page.digest, parsed)
+        else:
+            stats["cachedPages"] += 1
+        stats["pages"] += 1
+
+        changed = _merge_header(header, parsed["header"])
+        complete = all(field in header for field in HEADER_PATTERNS) and "deadlines" in header
+        if not header_sent and (complete or stats["pages"] >= header_pages):
+            header_sent = True
+            yield "header", dict(header)
+        elif header_sent and changed:
+            yield "header", dict(header)
+
+        for item in parsed["items"]:
+            batch.append(dict(item, page=page.number))
+            if len(batch) >= batch_size:
+                stats["items"] += len(batch)
+                yield "items", batch
+                batch = []
+
+    if not header_sent:
+        yield "header", dict(header)
+    if batch:
+        stats["items"] += len(batch)
+        yield "items", batch
+    yield "done", stats
+
+
+def extract_tender(path, cache=None):
+    """Read a whole tender and return the agent's structured JSON fields."""
+    tender = {"items": []}
+    for kind, payload in stream_tender(path, cache):
+        if kind == "header":
+            tender.update(payload)
+        elif kind == "items":
+            tender["items"].extend(payload)
+        else:
+            tender["stats"] = payload
+    return tender
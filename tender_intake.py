@@ -0,0 +1,292 @@
+"""Durable intake queue for the "Tender PDF / Portal Feed" entry point.
+
+Portal pollers and uploads call ``IntakeQueue.submit`` with a downloaded
+tender document.  The queue is a SQLite file, so queued work survives
+restarts.
+
+* A document whose bytes were already seen is dropped as a duplicate,
+  including documents that were superseded.
+* A new document for a tender ID that is still waiting replaces the
+  queued one, because a corrigendum supersedes the original; the old job
+  is kept with status ``superseded``.
+* If that tender is already processing or done, the new document is
+  queued as a new version.
+
+Jobs are claimed in order of submission deadline (the submission or
+closing date, not pre-bid meeting or clarification dates).  ``IntakeWorkers`` runs
+a bounded number of them through the orchestrator (for example a
+``tender_dag.DagExecutor``).  When ``max_pending`` jobs are waiting,
+``submit`` blocks or raises ``QueueFull``, so back-pressure reaches the
+feed instead of piling up in memory::
+
+    from tender_intake import IntakeQueue, IntakeWorkers
+
+    queue = IntakeQueue("intake.sqlite3", max_pending=500)
+    workers = IntakeWorkers(queue, lambda job: executor.run({"document": job["path"], ...}), workers=4).start()
+    queue.submit("downloads/moh-0457.pdf", source="moh-portal")
+    workers.metrics()   # throughput, queue lag, wait and per-stage latency
+
+Claimed jobs hold a lease; jobs whose worker died are requeued once the
+lease expires.
+"""
+
+import datetime
+import sqlite3
+import threading
+import time
+
+from common import Tracer, file_digest, percentile
+from tender_extract import ExtractionError, parse_date, stream_tender, submission_deadline
+
+INTAKE_MAX_PENDING = 1000
+INTAKE_WORKERS = 4
+INTAKE_MAX_ATTEMPTS = 3
+LEASE_S = 1800.0
+POLL_S = 0.5
+METRICS_WINDOW_S = 3600.0
+
+
+class QueueFull(Exception):
+    """Raised by ``submit`` when the queue stays full past its timeout."""
+
+
+def parse_deadline(value):
+    """Epoch seconds for a datetime, epoch number or date string; ``None`` if unparseable."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, datetime.datetime):
+        return value.timestamp()
+    if isinstance(value, datetime.date):
+        return datetime.datetime(value.year, value.month, value.day).timestamp()
+    parsed = parse_date(value)
+    return parsed.timestamp() if parsed else None
+
+
+def peek_header(path):
+    """Header fields from the first pages of a tender, without reading the rest."""
+    try:
+        for kind, payload in stream_tender(path):
+            if kind == "header":
+                return payload
+    except ExtractionError:
+        pass
+    return {}
+
+
+class IntakeQueue:
+    """SQLite-backed priority queue of tender documents with dedup and a pending limit."""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS jobs (
+            id INTEGER PRIMARY KEY, tender_id TEXT, version INTEGER NOT NULL DEFAULT 1,
+            content_hash TEXT NOT NULL, path TEXT NOT NULL, source TEXT, deadline REAL,
+            status TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0, error TEXT,
+            enqueued REAL NOT NULL, started REAL, finished REAL, lease REAL);
+        CREATE UNIQUE INDEX IF NOT EXISTS jobs_content ON jobs (content_hash);
+        CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (status, deadline, enqueued);
+        CREATE INDEX IF NOT EXISTS jobs_tender ON jobs (tender_id, status);
+    """
+
+    def __init__(self, path="intake.sqlite3", max_pending=INTAKE_MAX_PENDING, lease=LEASE_S):
+        self.max_pending = max_pending
+        self.lease = lease
+        self.connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(self.SCHEMA)
+        self.lock = threading.Lock()
+        self.changed = threading.Condition(self.lock)
+        self.counters = {"submitted": 0, "duplicates": 0, "superseded": 0, "rejected": 0}
+
+    def _pending(self):
+        return self.connection.execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued'").fetchone()[0]
+
+    def submit(self, path, tender_id=None, deadline=None, source=None, block=True, timeout=None):
+        """Queue a downloaded tender document; returns ``{"status", "id"}``.
+
+        ``status`` is ``queued``, ``duplicate`` (same bytes seen before, in
+        any job) or ``superseded`` (replaced a waiting job for the same
+        tender; ``id`` is the new job).
+        Missing ``tender_id``/``deadline`` are read from the document header.
+        """
+        content_hash = file_digest(path)
+        if tender_id is None or deadline is None:
+            header = peek_header(path)
+            tender_id = tender_id or header.get("tenderId")
+            if deadline is None:
+                deadline = submission_deadline(header.get("deadlines"))
+        deadline = parse_deadline(deadline)
+        now = time.time()
+        limit = None if timeout is None else time.monotonic() + timeout
+
+        with self.changed:
+            while True:
+                # Re-checked after every wait: another submit may have queued
+                # these bytes, or a job for this tender, while we slept.
+                if self.connection.execute("SELECT id FROM jobs WHERE content_hash = ?", (content_hash,)).fetchone():
+                    self.counters["duplicates"] += 1
+                    return {"status": "duplicate", "id": None}
+                waiting = None
+                if tender_id:
+                    waiting = self.connection.execute(
+                        "SELECT id, source, deadline, enqueued FROM jobs WHERE tender_id = ? AND status = 'queued'",
+                        (tender_id,)).fetchone()
+                if waiting:
+                    self.connection.execute("BEGIN")
+                    try:
+                        self.connection.execute("UPDATE jobs SET status = 'superseded' WHERE id = ?", (waiting[0],))
+                        job_id = self._insert(tender_id, content_hash, path, source or waiting[1],
+                                              waiting[2] if deadline is None else deadline, waiting[3])
+                    except sqlite3.Error:
+                        self.connection.execute("ROLLBACK")
+                        raise
+                    self.connection.execute("COMMIT")
+                    self.counters["superseded"] += 1
+                    return {"status": "superseded", "id": job_id}
+                if self._pending() < self.max_pending:
+                    break
+                remaining = None if limit is None else limit - time.monotonic()
+                if not block or (remaining is not None and remaining <= 0):
+                    self.counters["rejected"] += 1
+                    raise QueueFull(f"{self.max_pending} tenders already waiting")
+                self.changed.wait(remaining)
+            job_id = self._insert(tender_id, content_hash, path, source, deadline, now)
+            self.counters["submitted"] += 1
+            self.changed.notify_all()
+            return {"status": "queued", "id": job_id}
+
+    def _insert(self, tender_id, content_hash, path, source, deadline, enqueued):
+        version = 1
+        if tender_id:
+            version += self.connection.execute("SELECT COALESCE(MAX(version), 0) FROM jobs WHERE tender_id = ?",
+                                               (tender_id,)).fetchone()[0]
+        cursor = self.connection.execute(
+            "INSERT INTO jobs (tender_id, version, content_hash, path, source, deadline, status, enqueued) "
+            "VALUES (?, ?, ?, ?, ?, ?, 'queued', ?)",
+            (tender_id, version, content_hash, path, source, deadline, enqueued))
+        return cursor.lastrowid
+
+    def claim(self):
+        """Lease the queued job with the earliest deadline, or return ``None``."""
+        now = time.time()
+        with self.changed:
+            self.connection.execute("UPDATE jobs SET status = 'queued', lease = NULL "
+                                    "WHERE status = 'running' AND lease < ?", (now,))
+            row = self.connection.execute(
+                "SELECT id, tender_id, version, path, source, deadline, attempts, enqueued FROM jobs "
+                "WHERE status = 'queued' ORDER BY deadline IS NULL, deadline, enqueued LIMIT 1").fetchone()
+            if row is None:
+                return None
+            self.connection.execute("UPDATE jobs SET status = 'running', started = ?, lease = ?, "
+                                    "attempts = attempts + 1 WHERE id = ?", (now, now + self.lease, row[0]))
+            self.changed.notify_all()
+        keys = ("id", "tenderId", "version", "path", "source", "deadline", "attempts", "enqueued")
+        return dict(zip(keys, row), attempts=row[6] + 1, started=now)
+
+    def finish(self, job_id, error=None, max_attempts=INTAKE_MAX_ATTEMPTS):
+        """Mark a claimed job done, or requeue/fail it after an error."""
+        now = time.time()
+        with self.changed:
+            if error is None:
+                self.connection.execute("UPDATE jobs SET status = 'done', finished = ?, lease = NULL, error = NULL "
+                                        "WHERE id = ?", (now, job_id))
+            else:
+                self.connection.execute(
+                    "UPDATE jobs SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'queued' END, "
+                    "finished = ?, lease = NULL, error = ? WHERE id = ?", (max_attempts, now, str(error), job_id))
+            self.changed.notify_all()
+
+    def depth(self):
+        """Job counts by status plus the age of the oldest queued job."""
+        with self.lock:
+            counts = dict(self.connection.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status"))
+            oldest = self.connection.execute("SELECT MIN(enqueued) FROM jobs WHERE status = 'queued'").fetchone()[0]
+        return {status: counts.get(status, 0) for status in ("queued", "running", "done", "failed", "superseded")}, (
+            time.time() - oldest if oldest else 0.0)
+
+    def close(self):
+        self.connection.close()
+
+
+class IntakeWorkers:
+    """A fixed pool of threads that feed queued tenders to the orchestrator.
+
+    ``handler(job)`` processes one tender.  If it returns an object with a
+    ``summary()`` (a ``tender_dag.DagResult``) or a dict with ``agents``,
+    per-agent timings are recorded as ``agent.<name>`` stages.
+    """
+
+    def __init__(self, queue, handler, workers=INTAKE_WORKERS, tracer=None, poll=POLL_S):
+        self.queue = queue
+        self.handler = handler
+        self.workers = workers
+        self.tracer = tracer or Tracer("intake")
+        self.poll = poll
+        self.stopping = threading.Event()
+        self.threads = []
+        self.completed = []
+        self.waits = []
+        self.lock = threading.Lock()
+        self.started = time.time()
+
+    def start(self):
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._loop, name=f"intake-{index}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+        return self
+
+    def stop(self, timeout=None):
+        self.stopping.set()
+        for thread in self.threads:
+            thread.join(timeout)
+
+    def _loop(self):
+        while not self.stopping.is_set():
+            job = self.queue.claim()
+            if job is None:
+                self.stopping.wait(self.poll)
+                continue
+            wait = job["started"] - job["enqueued"]
+            self.tracer.record("intake.wait", time.perf_counter() - wait, wait, {"job": job["id"]})
+            error = None
+            try:
+                with self.tracer.span("intake.process", job=job["id"], tender=job["tenderId"]):
+                    result = self.handler(job)
+                self._record_agents(result)
+            except Exception as exc:
+                error = exc
+                self.tracer.count("intake.errors")
+            self.queue.finish(job["id"], error)
+            with self.lock:
+                self.completed.append(time.time())
+                self.waits.append(wait)
+
+    def _record_agents(self, result):
+        summary = result.summary() if hasattr(result, "summary") else result
+        agents = summary.get("agents", {}) if isinstance(summary, dict) else {}
+        now = time.perf_counter()
+        for name, agent in agents.items():
+            if isinstance(agent, dict) and "ms" in agent:
+                self.tracer.record(f"agent.{name}", now, agent["ms"] / 1000, {"status": agent.get("status")})
+
+    def metrics(self, window=METRICS_WINDOW_S):
+        """Throughput, queue depth and lag, wait percentiles and per-stage latency."""
+        now = time.time()
+        depth, lag = self.queue.depth()
+        with self.lock:
+            recent = [t for t in self.completed if now - t <= window]
+            waits = list(self.waits[-1000:])
+        span = min(window, max(now - self.started, 1e-9))
+        stages = self.tracer.summary()["stages"]
+        return {
+            "queue": depth,
+            "queueLagS": round(lag, 3),
+            "throughputPerMin": round(len(recent) / span * 60, 2),
+            "waitS": {"p50": round(percentile(waits, 0.5), 3), "p95": round(percentile(waits, 0.95), 3)},
+            "intake": dict(self.queue.counters),
+            "stages": {name: dict(stage, avgMs=round(stage["totalMs"] / stage["count"], 3))
+                       for name, stage in stages.items()},
+            "workers": self.workers,
+        }
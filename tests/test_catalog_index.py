@@ -0,0 +1,32 @@
+from catalog_index import CatalogIndex
+
+MASTER = [
+    {"sku": "P-500", "name": "Paracetamol 500mg tablets", "molecule": "Paracetamol", "strength": "500 mg",
+     "formulation": "tablet", "pack": "10x10", "score": "A", "match": "preferred"},
+    {"sku": "P-1G", "name": "Paracetamol 1g tablets", "molecule": "Paracetamol", "strength": "1 g",
+     "formulation": "tablet", "pack": "100"},
+    {"sku": "A-250", "name": "Amoxicillin 250mg capsules", "molecule": "Amoxicillin", "strength": "250mg",
+     "formulation": "capsule", "pack": "20"},
+]
+
+
+def test_match_lines_after_save_and_load(tmp_path):
+    CatalogIndex.build(MASTER).save(str(tmp_path / "catalog.idx"))
+    index = CatalogIndex.load(str(tmp_path / "catalog.idx"))
+    try:
+        lines = [{"description": "Paracetamol 500 mg tablet", "pack": "100"},
+                 {"description": "Amoxycilin 250 mg capsule"},
+                 {"description": "Paracetamol 500 mg tablet", "pack": "100"}]
+        matches = index.match_lines(lines, top_k=2)
+        assert [match["sku"] for match in matches[0]] == ["P-500", "P-1G"]
+        assert matches[1][0]["sku"] == "A-250" and matches[1][0]["match"] == "fuzzy"
+        assert matches[2] == matches[0]
+    finally:
+        index.close()
+
+
+def test_master_fields_are_not_overwritten():
+    match = CatalogIndex.build(MASTER).match_lines([{"description": "Paracetamol 500 mg tablet"}])[0][0]
+    assert match["sku"] == "P-500" and match["match"] == "exact"
+    assert match["molecule"] == "Paracetamol" and match["strength"] == "500 mg"
+    assert match["normalized"]["molecule"] == "paracetamol"
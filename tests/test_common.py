@@ -0,0 +1,137 @@
+import threading
+import time
+
+import pytest
+
+from common import PipelineError, RateLimitedTransport, TransportError, percentile
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.001)
+
+
+def scheduler(transport, **options):
+    clock = Clock()
+    return RateLimitedTransport(transport, clock=clock, sleep=clock.sleep, **options)
+
+
+def test_retryable_errors_are_retried_and_counted():
+    attempts = []
+
+    def transport(prompt, max_tokens):
+        attempts.append(prompt)
+        if len(attempts) < 3:
+            raise TransportError("HTTP 503", status=503, retryable=True)
+        return "ok"
+
+    limited = scheduler(transport)
+    assert limited("prompt", 10) == "ok"
+    metrics = limited.metrics()
+    assert (metrics["completed"], metrics["retries"], metrics["failed"], metrics["inFlight"]) == (1, 2, 0, 0)
+
+
+def test_non_transport_errors_release_the_slot():
+    def truncated(prompt, max_tokens):
+        raise PipelineError("response truncated")
+
+    limited = scheduler(truncated)
+    for _ in range(3):
+        with pytest.raises(PipelineError):
+            limited("prompt", 10)
+    metrics = limited.metrics()
+    assert (metrics["inFlight"], metrics["failed"], metrics["retries"]) == (0, 3, 0)
+
+
+def test_breaker_opens_after_repeated_failures():
+    def down(prompt, max_tokens):
+        raise TransportError("HTTP 500", status=500, retryable=True)
+
+    limited = scheduler(down, max_attempts=1)
+    for _ in range(5):
+        with pytest.raises(TransportError):
+            limited("prompt", 10)
+    with pytest.raises(TransportError, match="circuit open"):
+        limited("prompt", 10)
+    assert limited.metrics()["breaker"] == "open"
+    assert limited.metrics()["rejected"] == 1
+
+
+def test_counters_are_exact_under_concurrency():
+    limited = RateLimitedTransport(lambda prompt, max_tokens: "ok", rpm=10000, input_tpm=10 ** 9)
+    threads = [threading.Thread(target=lambda: [limited("prompt", 10) for _ in range(50)]) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert limited.metrics()["completed"] == 400
+    assert limited.metrics()["inFlight"] == 0
+
+
+def test_half_open_breaker_lets_one_probe_through():
+    calls, release, outcome = [], threading.Event(), {}
+
+    def upstream(prompt, max_tokens):
+        calls.append(prompt)
+        if prompt == "probe":
+            release.wait(5)
+        if outcome.get("healthy"):
+            return "ok"
+        raise TransportError("HTTP 500", status=500, retryable=True)
+
+    limited = scheduler(upstream, max_attempts=1)
+    for _ in range(5):
+        with pytest.raises(TransportError):
+            limited("prompt", 10)
+    limited.clock.now += 31
+
+    for healthy, expected in ((False, "open"), (True, "closed")):
+        calls.clear()
+        release.clear()
+        outcome["healthy"] = healthy
+        results = {}
+
+        def call(prompt):
+            try:
+                results[prompt] = limited(prompt, 10)
+            except TransportError as exc:
+                results[prompt] = str(exc)
+
+        probe = threading.Thread(target=call, args=("probe",))
+        probe.start()
+        wait_for(lambda: calls)
+        waiters = [threading.Thread(target=call, args=(f"waiter-{n}",)) for n in range(3)]
+        for waiter in waiters:
+            waiter.start()
+        wait_for(lambda: limited.metrics()["queued"] == 3)
+        assert calls == ["probe"]
+        release.set()
+        for thread in [probe] + waiters:
+            thread.join(5)
+        assert limited.metrics()["breaker"] == expected
+        if healthy:
+            assert sorted(calls) == ["probe", "waiter-0", "waiter-1", "waiter-2"]
+            assert set(results.values()) == {"ok"}
+        else:
+            assert calls == ["probe"]
+            assert all("circuit open" in results[f"waiter-{n}"] for n in range(3))
+            limited.clock.now += 31
+
+
+def test_percentile():
+    assert percentile([], 0.5) == 0.0
+    assert percentile([5, 1, 3], 0.5) == 3
+    assert percentile([5, 1, 3], 0.95) == 5
@@ -0,0 +1,63 @@
+import os
+
+from doc_render import DocumentRenderer, load_template, render_variants
+
+TEMPLATE = ("<h1>{{ tender.authority }}</h1>\n"
+            "{% section pricing %}<table>{% rows pricing.lines %}"
+            "<tr><td>{{ row.molecule }}</td><td>{{ row.price | money }}</td></tr>"
+            "{% endrows %}</table>{% endsection %}\n"
+            "{% section logistics teams=supply %}<p>Deliver to {{ tender.store }}</p>{% endsection %}\n")
+
+
+def proposal(prices=(1.5, 2.0, 3.25, 4.0, 5.5), authority="CMS <North>"):
+    return {"tender": {"authority": authority, "store": "Central Medical Store"},
+            "pricing": {"lines": [{"molecule": f"M{index}", "price": price} for index, price in enumerate(prices)]}}
+
+
+def write_template(tmp_path, text=TEMPLATE):
+    path = tmp_path / "proposal.html"
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+
+def test_templates_compile_once_until_the_file_changes(tmp_path):
+    path = write_template(tmp_path)
+    template = load_template(path)
+    assert load_template(path) is template
+    write_template(tmp_path, TEMPLATE + "<footer>{{ tender.store }}</footer>")
+    os.utime(path, ns=(os.stat(path).st_atime_ns, os.stat(path).st_mtime_ns + 10 ** 9))
+    assert load_template(path) is not template
+
+
+def test_price_change_rerenders_only_the_affected_fragments(tmp_path):
+    path = write_template(tmp_path)
+    renderer = DocumentRenderer(str(tmp_path / "cache"), row_block=2)
+    output = str(tmp_path / "out" / "proposal.html")
+    renderer.render(path, proposal(), output)
+    assert renderer.render(path, proposal(), output)["rendered"] == 0
+
+    stats = renderer.render(path, proposal(prices=(1.5, 2.0, 3.25, 4.0, 6.75)), output)
+    assert stats["rendered"] == 1
+    assert stats["sections"]["pricing"] == {"rendered": 1, "reused": 4}
+    text = open(output, encoding="utf-8").read()
+    assert "<td>6.75</td>" in text and "<td>5.50</td>" not in text
+    assert "<h1>CMS &lt;North&gt;</h1>" in text
+
+    stats = renderer.render(path, proposal(prices=(1.5, 2.0, 3.25, 4.0, 6.75), authority="CMS South"), output)
+    assert stats["rendered"] == 1
+    assert stats["sections"]["pricing"]["rendered"] == 0
+
+
+def test_render_variants_filters_team_sections_and_reports_errors(tmp_path):
+    path = write_template(tmp_path)
+    jobs = [{"template": path, "data": proposal(), "output": str(tmp_path / "sales.html"), "team": "sales"},
+            {"template": path, "data": proposal(), "output": str(tmp_path / "supply.html"), "team": "supply",
+             "language": "ar"},
+            {"template": str(tmp_path / "missing.html"), "data": proposal(), "output": str(tmp_path / "x.html")}]
+    results = render_variants(jobs, cache_dir=str(tmp_path / "cache"), workers=2)
+    assert [result.get("team") for result in results[:2]] == ["sales", "supply"]
+    assert results[1]["language"] == "ar"
+    assert "logistics" not in results[0]["sections"]
+    assert "Deliver to" not in (tmp_path / "sales.html").read_text(encoding="utf-8")
+    assert "Deliver to Central Medical Store" in (tmp_path / "supply.html").read_text(encoding="utf-8")
+    assert results[2]["output"] == jobs[2]["output"] and "error" in results[2]
@@ -0,0 +1,86 @@
+import math
+
+import numpy as np
+import pytest
+
+from feature_store import ColumnCache, FeatureStore
+
+OUTCOMES = [
+    {"id": 1, "molecule": "Paracetamol", "region": "AE", "authority": "DHA", "date": "2026-01-10", "quantity": 100,
+     "ourPrice": 1.1, "winningPrice": 1.0, "won": False, "winner": "Acme",
+     "competitors": [{"name": "Acme", "price": 1.0}, {"name": "Beta", "price": 1.2}]},
+    {"id": 2, "molecule": "paracetamol", "region": "AE", "authority": "DHA", "date": "2026-02-10", "quantity": 200,
+     "ourPrice": 0.9, "winningPrice": 0.9, "won": True, "competitors": [{"name": "Acme", "price": 1.0}]},
+    {"id": 3, "molecule": "Ibuprofen", "region": "AE", "authority": "MOH", "date": "2026-03-01", "quantity": 50,
+     "ourPrice": 2.0, "winningPrice": 1.8, "won": False, "winner": "Beta",
+     "competitors": [{"name": "Beta", "price": 1.8}]},
+    {"id": 4, "molecule": "Paracetamol", "region": "SA", "authority": "MOH", "date": "2026-03-05", "quantity": 10,
+     "ourPrice": 1.0, "winningPrice": 1.0, "won": True},
+]
+
+
+class Source:
+    def __init__(self, rows):
+        self.rows = list(rows)
+        self.calls = []
+
+    def __call__(self, after, limit):
+        self.calls.append((after, limit))
+        return [row for row in self.rows if row["id"] > (after or 0)][:limit]
+
+
+@pytest.fixture
+def store(tmp_path):
+    features = FeatureStore(str(tmp_path / "features.sqlite3"))
+    yield features
+    features.close()
+
+
+def test_refresh_resumes_from_the_watermark(store):
+    source = Source(OUTCOMES)
+    assert store.refresh(source, batch=2)["rows"] == 4
+    assert source.calls == [(None, 2), (2, 2), (4, 2)]
+    assert store.watermark == 4
+
+    assert store.refresh(source, batch=2)["rows"] == 0
+    assert source.calls[-1] == (4, 2)
+
+    source.rows.append(dict(OUTCOMES[3], id=5))
+    assert store.refresh(source, batch=2)["rows"] == 1
+    assert store.watermark == 5
+    assert store.get("molecule", "Paracetamol")["tenders"] == 4
+
+
+def test_agent_features(store):
+    store.ingest(OUTCOMES)
+    competition = store.competitor_features("Paracetamol", "AE")
+    assert [competitor["name"] for competitor in competition["competitors"]] == ["acme", "beta"]
+    assert competition["competitors"][0]["wins"] == 1 and competition["competitors"][0]["overall"]["tenders"] == 2
+    assert competition["molecule"]["winRate"] == 0.6
+    assert competition["marketInRegion"]["tenders"] == 2
+
+    tender = {"authority": "DHA", "region": "AE", "items": [{"molecule": "Paracetamol"}, {"molecule": "Unknownol"}]}
+    risk = store.risk_features(tender)
+    assert risk["authority"]["tenders"] == 2
+    assert risk["knownMolecules"] == 1 and risk["unknownMolecules"] == ["unknownol"]
+    assert risk["meanMoleculeWinRate"] == 0.6
+
+    impact = store.impact_features(tender)
+    assert impact["marketValue"] == 280.0
+    assert impact["molecules"]["unknownol"] == {"winRate": None, "marketValue": None}
+
+
+def test_column_cache_lookups_and_invalidation(store):
+    store.ingest(OUTCOMES)
+    molecules = store.cache("molecule")
+    tenders = molecules.many(["paracetamol", "ibuprofen", "unknownol"], "tenders")
+    assert tenders[:2].tolist() == [3.0, 1.0] and math.isnan(tenders[2])
+    assert np.isnan(ColumnCache([]).many(["paracetamol"], "winRate")).all()
+    with pytest.raises(ValueError):
+        store.cache("supplier")
+
+    competitors = store.cache("competitor")
+    store.ingest([dict(OUTCOMES[3], id=5)])
+    assert store.cache("competitor") is competitors
+    assert store.cache("molecule") is not molecules
+    assert store.get("molecule", "paracetamol")["tenders"] == 4
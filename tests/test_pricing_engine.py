@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+from pricing_engine import BidHistory, ElasticityModel, PricingEngine, PricingError, fit_logistic_groups
+
+
+def history_rows(count=600, seed=1):
+    rng = np.random.default_rng(seed)
+    rows = []
+    for index in range(count):
+        molecule, base = (("paracetamol", 2.0), ("amoxicillin", 5.0))[index % 2]
+        competitor = base * rng.lognormal(0, 0.1)
+        price = base * rng.uniform(0.8, 1.2)
+        won = rng.random() < 1 / (1 + np.exp(-(0.5 - 8 * np.log(price / competitor))))
+        rows.append({"molecule": molecule, "region": ("AE", "SA")[index % 3 == 0], "price": price,
+                     "competitorPrice": competitor, "won": won})
+    return rows
+
+
+def test_grouped_fit_recovers_curves_and_keeps_empty_groups_at_their_prior():
+    rng = np.random.default_rng(3)
+    groups = np.repeat([0, 1], 20000)
+    x = rng.uniform(-0.3, 0.3, len(groups))
+    truth = np.array([[0.5, 6.0], [-0.5, 3.0]])
+    won = rng.random(len(groups)) < 1 / (1 + np.exp(-(truth[groups, 0] - truth[groups, 1] * x)))
+    prior = np.array([[0.0, 5.0]] * 3)
+    theta = fit_logistic_groups(groups, x, won, 3, prior)
+    assert np.allclose(theta[:2], truth, atol=0.3)
+    assert np.array_equal(theta[2], prior[2])
+
+
+def test_thin_groups_shrink_towards_their_parent():
+    rows = history_rows()
+    rows += [{"molecule": "paracetamol", "region": "OM", "price": 2.4, "competitorPrice": 2.0, "won": True}] * 2
+    model = ElasticityModel(BidHistory.from_records(rows))
+    molecule = model.lookup("Paracetamol", None)
+    thin, thick = model.lookup("paracetamol", "OM"), model.lookup("paracetamol", "AE")
+    assert model.rows[thin] == 2 and model.rows[thick] > 100
+    assert thin != molecule and model.parents[thin] == molecule
+    assert abs(model.theta[thin, 1] - model.theta[molecule, 1]) < 1.0
+    assert model.lookup("paracetamol", "nowhere") == molecule
+
+
+def test_batch_pricing_matches_single_tenders():
+    engine = PricingEngine(BidHistory.from_records(history_rows()))
+    tenders = [{"region": "AE", "items": [{"line": 1, "molecule": "Paracetamol", "quantity": 1000},
+                                          {"line": 2, "molecule": "amoxicillin", "quantity": 50, "unitCost": 4.5}]},
+               {"region": "SA", "items": [{"molecule": "amoxicillin", "quantity": 10}]}]
+    batch = engine.price_tenders(tenders)
+    assert [engine.price_tender(tender) for tender in tenders] == batch
+    line = batch[0]["lines"][0]
+    assert 2.0 * 0.7 <= line["bidRange"][0] <= line["suggestedPrice"] <= line["bidRange"][1] <= 2.0 * 1.3
+    assert batch[0]["lines"][1]["suggestedPrice"] > 4.5
+    assert batch[0]["suggestedTotal"] == pytest.approx(
+        sum(line["suggestedPrice"] * quantity for line, quantity in zip(batch[0]["lines"], (1000, 50))), abs=0.1)
+    assert batch[1]["lines"][0]["line"] == 1 and batch[0]["unpriced"] == []
+
+
+def test_unseen_molecules_are_left_unpriced():
+    engine = PricingEngine(BidHistory.from_records(history_rows()))
+    quote = engine.price_tender({"region": "AE", "items": [{"line": 1, "molecule": "paracetamol", "quantity": 10},
+                                                          {"line": 2, "molecule": "insulin", "quantity": 10}]})
+    assert quote["unpriced"] == [2]
+    assert quote["lines"][1]["suggestedPrice"] is None and quote["lines"][1]["confidence"] == 0.0
+    assert quote["suggestedTotal"] == pytest.approx(quote["lines"][0]["suggestedPrice"] * 10, abs=0.01)
+    assert quote["confidence"] == pytest.approx(quote["lines"][0]["confidence"] / 2, abs=0.001)
+
+
+def test_model_refits_after_append_and_needs_history():
+    with pytest.raises(PricingError):
+        PricingEngine(BidHistory()).price_tender({"items": [{"molecule": "x"}]})
+    history = BidHistory.from_records(history_rows(100))
+    engine = PricingEngine(history)
+    first = engine.model
+    assert engine.model is first
+    history.append([{"molecule": "insulin", "region": "AE", "price": 9.0, "competitorPrice": 10.0, "won": True}])
+    assert engine.model is not first
+    assert engine.price_tender({"region": "AE", "items": [{"molecule": "insulin"}]})["unpriced"] == []
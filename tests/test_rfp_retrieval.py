@@ -0,0 +1,40 @@
+import numpy as np
+
+from rfp_retrieval import RetrievalIndex
+
+PAGES = [(1, "Bidders must hold a valid GMP certificate issued by the national authority."),
+         (2, "Delivery shall be made within 60 days to the central medical store.")]
+
+
+def embed(texts):
+    return np.array([[len(text), text.count("e") + 1.0] for text in texts], dtype=np.float32)
+
+
+def test_index_built_without_embeddings_opens_with_embed(tmp_path):
+    path = str(tmp_path / "tender.rfp")
+    RetrievalIndex.build(path, PAGES).close()
+    index = RetrievalIndex.open(path, embed=embed)
+    assert [hit["page"] for hit in index.search("GMP certificate", k=1)] == [1]
+    index.close()
+
+
+def test_hybrid_search(tmp_path):
+    index = RetrievalIndex.build(str(tmp_path / "tender.rfp"), PAGES, embed=embed)
+    assert index.search("delivery days", k=1)[0]["page"] == 2
+    index.close()
+
+
+def test_reindex_drops_answers_only_when_text_changes(tmp_path):
+    path = str(tmp_path / "tender.rfp")
+    index = RetrievalIndex.build(path, PAGES)
+    index.cache_answer("Delivery time?", "60 days", [2])
+    index.close()
+
+    index = RetrievalIndex.build(path, PAGES)
+    assert index.cached_answer("delivery time?") == ("60 days", [2])
+    index.close()
+
+    index = RetrievalIndex.build(path, PAGES[:1] + [(2, "Delivery shall be made within 45 days.")])
+    assert index.cached_answer("Delivery time?") is None
+    assert index.connection.execute("SELECT COUNT(*) FROM answers").fetchone()[0] == 0
+    index.close()
@@ -0,0 +1,118 @@
+import json
+import os
+
+import pytest
+
+import sap_pipeline
+from sap_bench import ReplayTransport, write_synthetic_csv
+from sap_pipeline import EVALUATE_PROMPT, Checkpoint, chunk_rows, output_path, read_rows, run_batch, run_chunked
+
+PREFIX, SUFFIX = EVALUATE_PROMPT.split("{rows}")
+
+
+def rows(count):
+    return [{"Test Case": f"TC-{index:04d}", "Steps": "step " * (index % 7)} for index in range(count)]
+
+
+def echo_transport(fail=lambda batch: False):
+    calls = []
+
+    def transport(prompt, max_tokens):
+        batch = json.loads(prompt[len(PREFIX):-len(SUFFIX)])
+        calls.append(batch)
+        if fail(batch):
+            raise sap_pipeline.PipelineError("bad response")
+        return "\n".join(json.dumps({"testCase": row["Test Case"], "evaluation": "pass"}) for row in batch)
+
+    transport.calls = calls
+    return transport
+
+
+def test_chunks_cover_rows_in_order_under_the_row_limit():
+    chunks = chunk_rows(rows(60), max_rows=25)
+    assert chunks[0][0] == 0 and chunks[-1][1] == 60
+    assert all(end == start for (_, end), (start, _) in zip(chunks, chunks[1:]))
+    assert all(end - start <= 25 for start, end in chunks)
+
+
+def test_run_chunked_merges_results_in_row_order():
+    results, failed = run_chunked(rows(60), EVALUATE_PROMPT, echo_transport(), concurrency=4)
+    assert failed == 0
+    assert [result["testCase"] for result in results] == [row["Test Case"] for row in rows(60)]
+
+
+def test_run_chunked_retries_failed_chunks():
+    attempts = {}
+
+    def flaky(batch):
+        first = batch[0]["Test Case"]
+        attempts[first] = attempts.get(first, 0) + 1
+        return first == "TC-0000" and attempts[first] == 1
+
+    transport = echo_transport(flaky)
+    results, failed = run_chunked(rows(60), EVALUATE_PROMPT, transport, retries=2)
+    assert failed == 0 and len(results) == 60
+    assert attempts["TC-0000"] == 2
+
+
+def test_run_chunked_drops_chunks_that_keep_failing():
+    transport = echo_transport(lambda batch: batch[0]["Test Case"] == "TC-0000")
+    results, failed = run_chunked(rows(60), EVALUATE_PROMPT, transport, retries=1)
+    first_chunk = chunk_rows(rows(60))[0]
+    assert failed == 1
+    assert len(results) == 60 - (first_chunk[1] - first_chunk[0])
+    assert results[0]["testCase"] == f"TC-{first_chunk[1]:04d}"
+
+
+def test_parse_ndjson_tolerates_fences_and_arrays():
+    text = '```json\n{"a": 1}\n[{"a": 2}, {"a": 3}]\n```'
+    assert sap_pipeline.parse_ndjson(text) == [{"a": 1}, {"a": 2}, {"a": 3}]
+    with pytest.raises(sap_pipeline.PipelineError):
+        sap_pipeline.parse_ndjson("not json")
+
+
+def test_batch_resumes_from_checkpoint(tmp_path):
+    suites, out = tmp_path / "suites", tmp_path / "out"
+    suites.mkdir()
+    write_synthetic_csv(str(suites / "a.csv"), 30)
+    write_synthetic_csv(str(suites / "b.csv"), 30, seed=8)
+    transport = ReplayTransport()
+
+    first = run_batch([str(suites)], str(out), transport=transport)
+    assert [outcome["status"] for outcome in first["files"]] == ["done", "done"]
+    assert [outcome["status"] for outcome in run_batch([str(suites)], str(out), transport=transport)["files"]] == [
+        "skipped", "skipped"]
+
+    write_synthetic_csv(str(suites / "b.csv"), 31, seed=8)
+    again = run_batch([str(suites)], str(out), transport=transport)
+    assert [outcome["status"] for outcome in again["files"]] == ["skipped", "done"]
+    assert os.path.exists(os.path.join(str(out), "trace.json"))
+
+
+def test_read_rows_tolerates_ragged_lines(tmp_path):
+    source = tmp_path / "ragged.csv"
+    source.write_text("Test Case,Steps\nTC-1,open,extra,cells\nTC-2\n,\n", encoding="utf-8")
+    assert read_rows(str(source)) == [{"Test Case": "TC-1", "Steps": "open"}, {"Test Case": "TC-2", "Steps": ""}]
+
+
+def test_batch_rewrites_files_in_a_new_format(tmp_path):
+    suites, out = tmp_path / "suites", tmp_path / "out"
+    suites.mkdir()
+    write_synthetic_csv(str(suites / "a.csv"), 10)
+    transport = ReplayTransport()
+    run_batch([str(suites)], str(out), transport=transport)
+    report = run_batch([str(suites)], str(out), transport=transport, fmt="csv", compress=True)
+    assert report["files"][0]["status"] == "done"
+    assert os.path.exists(output_path(str(out), str(suites / "a.csv"), "csv", True))
+
+
+def test_checkpoint_survives_reload(tmp_path):
+    source = tmp_path / "a.csv"
+    source.write_text("Test Case\nTC-1\n", encoding="utf-8")
+    target = output_path(str(tmp_path), str(source))
+    open(target, "w").close()
+    Checkpoint(str(tmp_path)).record(str(source), {"sha256": "abc", "output": target, "rows": 1})
+    checkpoint = Checkpoint(str(tmp_path))
+    assert checkpoint.is_done(str(source), "abc", target)
+    assert not checkpoint.is_done(str(source), "def", target)
+    assert not checkpoint.is_done(str(source), "abc", output_path(str(tmp_path), str(source), "ndjson"))
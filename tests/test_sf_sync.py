@@ -0,0 +1,73 @@
+import pytest
+
+from sf_sync import LINE_OBJECT, TENDER_OBJECT, MockSalesforce, SalesforceClient, SalesforceError, SalesforceSync
+
+
+DEADLINES = {"pre-bid meeting date": "01/03/2026", "bid submission deadline": "15/03/2026"}
+
+
+def outputs(lines=450, price=10.0, deadlines=DEADLINES):
+    items = [{"line": n, "description": f"Item {n}", "molecule": "paracetamol", "quantity": 100}
+             for n in range(1, lines + 1)]
+    return {
+        "tender": {"tenderId": "MOH-1", "authority": "MOH", "items": items, "deadlines": deadlines},
+        "pricing": {"suggestedTotal": 1000,
+                    "lines": [{"line": n, "suggestedPrice": price} for n in range(1, lines + 1)]},
+    }
+
+
+@pytest.fixture
+def org(tmp_path):
+    with MockSalesforce() as mock:
+        client = SalesforceClient(mock.url, "token")
+        yield mock, SalesforceSync(client, state_dir=str(tmp_path / "state"))
+        client.close()
+
+
+def test_first_sync_writes_everything_in_batches(org, tmp_path):
+    mock, sync = org
+    document = tmp_path / "proposal.pdf"
+    document.write_bytes(b"%PDF-1.4 proposal")
+    report = sync.sync(dict(outputs(), documents=[str(document)]))
+    # One tender upsert, ceil(450 / 200) line batches and one upload.
+    assert report["apiCalls"] == 1 + 3 + 1 == len(mock.calls)
+    assert report["tenderRecord"] == "created"
+    assert report["lines"]["upserted"] == 450
+    assert len(mock.records[LINE_OBJECT]) == 450
+    assert mock.records[TENDER_OBJECT]["MOH-1"]["Submission_Deadline__c"] == "2026-03-15"
+
+
+def test_resync_sends_only_deltas(org):
+    mock, sync = org
+    sync.sync(outputs())
+    assert sync.sync(outputs())["apiCalls"] == 0
+
+    changed = outputs()
+    changed["pricing"]["lines"][7]["suggestedPrice"] = 11.5
+    report = sync.sync(changed)
+    assert report["apiCalls"] == 1
+    assert report["lines"] == {"upserted": 1, "unchanged": 449, "deleted": 0, "failed": 0}
+    assert mock.records[LINE_OBJECT]["MOH-1:8"]["Bid_Price__c"] == 11.5
+
+
+def test_removed_lines_are_deleted(org):
+    mock, sync = org
+    sync.sync(outputs())
+    report = sync.sync(outputs(lines=440))
+    assert report["lines"]["deleted"] == 10
+    assert report["apiCalls"] == 1
+    assert len(mock.records[LINE_OBJECT]) == 440
+
+
+def test_deadline_labels_as_written_by_agents(org):
+    mock, sync = org
+    sync.sync(outputs(lines=1, deadlines={"Pre-bid meeting": "01/03/2026", "Submission Deadline": "5 April 2026"}))
+    assert mock.records[TENDER_OBJECT]["MOH-1"]["Submission_Deadline__c"] == "2026-04-05"
+
+
+def test_mock_rejects_non_iso_dates():
+    with MockSalesforce() as mock:
+        client = SalesforceClient(mock.url, "token")
+        with pytest.raises(SalesforceError):
+            client.upsert(TENDER_OBJECT, "Tender_Id__c", "MOH-2", {"Submission_Deadline__c": "15/03/2026"})
+        client.close()
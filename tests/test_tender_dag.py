@@ -0,0 +1,120 @@
+import threading
+import time
+
+import pytest
+
+from tender_dag import AgentSpec, DagError, DagExecutor, build_tender_graph
+
+
+def test_independent_agents_run_in_parallel():
+    barrier = threading.Barrier(2, timeout=2)
+
+    def waits(inputs):
+        barrier.wait()
+        return inputs["tender"]
+
+    result = DagExecutor([
+        AgentSpec("understand", lambda inputs: "T", ["document"], ["tender"]),
+        AgentSpec("left", waits, ["tender"], ["left"]),
+        AgentSpec("right", waits, ["tender"], ["right"]),
+    ]).run({"document": "doc"})
+    assert result.complete
+    assert (result.outputs["left"], result.outputs["right"]) == ("T", "T")
+    assert result.critical_path["agents"][0] == "understand"
+
+
+def test_agent_without_required_input_is_skipped():
+    result = DagExecutor([
+        AgentSpec("broken", lambda inputs: 1 / 0, ["document"], ["tender"]),
+        AgentSpec("pricing", lambda inputs: "price", ["tender"], ["pricing"]),
+        AgentSpec("optional", lambda inputs: sorted(inputs), ["document"], ["summary"], optional=["tender"]),
+    ]).run({"document": "doc"})
+    assert result.agents["broken"]["status"] == "failed"
+    assert result.agents["pricing"] == {"status": "skipped", "ms": 0.0, "missing": ["tender"]}
+    assert result.outputs["summary"] == ["document"]
+
+
+def test_timeout_uses_fallback_outputs():
+    release = threading.Event()
+
+    def slow(inputs):
+        release.wait(5)
+        return "late"
+
+    try:
+        result = DagExecutor([
+            AgentSpec("slow", slow, ["document"], ["competitors"], timeout=0.05, fallback={"competitors": []}),
+            AgentSpec("after", lambda inputs: len(inputs["competitors"]), ["competitors"], ["count"]),
+        ]).run({"document": "doc"})
+    finally:
+        release.set()
+    assert result.agents["slow"]["status"] == "timeout"
+    assert result.agents["slow"]["fallback"] is True
+    assert result.outputs["competitors"] == [] and result.outputs["count"] == 0
+
+
+def test_callable_fallback_receives_the_error():
+    def fallback(inputs, error):
+        return {"pricing": {"error": str(error)}}
+
+    result = DagExecutor([
+        AgentSpec("pricing", lambda inputs: 1 / 0, ["tender"], ["pricing"], fallback=fallback),
+    ]).run({"tender": {}})
+    assert result.agents["pricing"]["status"] == "failed"
+    assert "division" in result.outputs["pricing"]["error"]
+
+
+def test_malformed_return_value_fails_the_agent():
+    result = DagExecutor([AgentSpec("both", lambda inputs: "x", ["document"], ["a", "b"])]).run({"document": 1})
+    assert result.agents["both"]["status"] == "failed"
+
+
+def test_graph_errors():
+    with pytest.raises(DagError, match="cycle"):
+        DagExecutor([AgentSpec("a", None, ["y"], ["x"]), AgentSpec("b", None, ["x"], ["y"])])
+    with pytest.raises(DagError, match="produced by both"):
+        DagExecutor([AgentSpec("a", None, [], ["x"]), AgentSpec("b", None, [], ["x"])])
+    with pytest.raises(DagError, match="no value or producer"):
+        DagExecutor([AgentSpec("a", None, ["missing"], ["x"])]).run({})
+    with pytest.raises(DagError, match="unknown agents"):
+        build_tender_graph({"nope": print})
+
+
+def test_tender_graph_runs_end_to_end():
+    handlers = {name: (lambda name: lambda inputs: f"{name}:{len(inputs)}")(name) for name in (
+        "tender_understanding", "product_matching", "competitor_analysis", "pricing_optimization",
+        "risk_compliance", "business_impact", "rfp_assistant", "translation", "document_generator",
+        "salesforce_connector")}
+    started = time.perf_counter()
+    result = DagExecutor(build_tender_graph(handlers)).run(
+        {"document": "d", "product_master": [], "history": [], "features": None})
+    assert result.complete, result.agents
+    assert result.outputs["salesforce"].startswith("salesforce_connector:")
+    assert time.perf_counter() - started < 5
+
+
+def test_timeout_counts_from_agent_start():
+    def slow(seconds):
+        return lambda inputs: time.sleep(seconds) or seconds
+
+    result = DagExecutor([
+        AgentSpec("a", slow(0.3), ["document"], ["a"]),
+        AgentSpec("b", slow(0.3), ["document"], ["b"], timeout=0.5),
+    ], workers=1).run({"document": "doc"})
+    assert result.complete, result.agents
+    assert result.agents["b"]["ms"] < 500
+
+
+def test_timed_out_agent_does_not_hold_a_worker():
+    release = threading.Event()
+    try:
+        result = DagExecutor([
+            AgentSpec("hung", lambda inputs: release.wait(5), ["document"], ["hung"], timeout=0.1,
+                      fallback={"hung": None}),
+            AgentSpec("after", lambda inputs: "ok", ["hung"], ["after"], timeout=0.5),
+            AgentSpec("other", lambda inputs: "ok", ["document"], ["other"], timeout=0.5),
+        ], workers=1).run({"document": "doc"})
+    finally:
+        release.set()
+    assert result.agents["hung"]["status"] == "timeout"
+    assert result.agents["after"]["status"] == result.agents["other"]["status"] == "done"
@@ -0,0 +1,84 @@
+import datetime
+
+import pytest
+
+from tender_extract import (PageCache, extract_tender, iter_pages, parse_date, parse_page, stream_tender,
+                            submission_deadline)
+
+PAGE_ONE = """Tender No: MOH-2026-0457
+Issued by: Ministry of Health
+Pre-bid meeting date: 02/03/2026
+Bid submission deadline: 15/03/2026
+1 Paracetamol 500 mg tablet 10,000 tabs
+"""
+PAGE_TWO = """2 Amoxicillin 250 mg capsule 2000 caps
+Delivery terms: DDP central store
+"""
+
+
+def test_text_tender_streams_and_reuses_cached_pages(tmp_path):
+    path = tmp_path / "tender.txt"
+    path.write_text(PAGE_ONE + "\f" + PAGE_TWO)
+    tender = extract_tender(str(path))
+    assert tender["tenderId"] == "MOH-2026-0457"
+    assert submission_deadline(tender["deadlines"]) == "15/03/2026"
+    assert [(item["line"], item["quantity"], item["page"]) for item in tender["items"]] == [(1, 10000, 1), (2, 2000, 2)]
+
+    cache = PageCache()
+    list(stream_tender(str(path), cache))
+    path.write_text(PAGE_ONE + "\f" + PAGE_TWO.replace("2000", "2500"))
+    *_, (kind, stats) = stream_tender(str(path), cache)
+    assert kind == "done" and stats["cachedPages"] == 1
+
+
+def test_pdf_pages_with_shared_content_stream_differ(tmp_path):
+    pytest.importorskip("pypdf")
+    from pypdf import PdfWriter
+    from pypdf.generic import ArrayObject, DecodedStreamObject, DictionaryObject, NameObject, NumberObject
+
+    writer = PdfWriter()
+    font = writer._add_object(DictionaryObject({NameObject("/Type"): NameObject("/Font"),
+                                                NameObject("/Subtype"): NameObject("/Type1"),
+                                                NameObject("/BaseFont"): NameObject("/Helvetica")}))
+    for text in ("1 Paracetamol 500 mg tablet 1000 tabs", "2 Amoxicillin 250 mg capsule 2000 caps"):
+        page = writer.add_blank_page(612, 792)
+        form = DecodedStreamObject()
+        form.set_data(f"BT /F1 12 Tf 72 700 Td ({text}) Tj ET".encode())
+        form.update({NameObject("/Type"): NameObject("/XObject"), NameObject("/Subtype"): NameObject("/Form"),
+                     NameObject("/BBox"): ArrayObject([NumberObject(0), NumberObject(0), NumberObject(612),
+                                                       NumberObject(792)]),
+                     NameObject("/Resources"): DictionaryObject(
+                         {NameObject("/Font"): DictionaryObject({NameObject("/F1"): font})})})
+        content = DecodedStreamObject()
+        content.set_data(b"q /Fm0 Do Q")
+        page[NameObject("/Contents")] = writer._add_object(content)
+        page[NameObject("/Resources")] = DictionaryObject(
+            {NameObject("/XObject"): DictionaryObject({NameObject("/Fm0"): writer._add_object(form)})})
+    path = tmp_path / "tender.pdf"
+    writer.write(str(path))
+
+    first, second = iter_pages(str(path))
+    assert first.digest != second.digest
+    assert [item["molecule"] for item in extract_tender(str(path))["items"]] == ["Paracetamol", "Amoxicillin"]
+
+
+def test_tender_id_needs_a_whole_label():
+    assert parse_page("Tender Notice: MOH/2026/001\nTender No.: MOH-2026-0457")["header"]["tenderId"] == "MOH-2026-0457"
+    assert "tenderId" not in parse_page("Tender notification for the supply of medicines")["header"]
+    assert parse_page("RFP Reference #RF-2211")["header"]["tenderId"] == "RF-2211"
+
+
+def test_parse_date():
+    assert parse_date("15/03/2026") == datetime.datetime(2026, 3, 15)
+    assert parse_date("5  March 2026") == datetime.datetime(2026, 3, 5)
+    assert parse_date("2026-03-15T12:00") == datetime.datetime(2026, 3, 15, 12)
+    assert parse_date("next week") is None and parse_date(None) is None
+
+
+def test_submission_deadline_prefers_submission_labels():
+    assert submission_deadline({"pre-bid meeting date": "02/03", "closing date": "20/03",
+                                "bid submission deadline": "15/03"}) == "15/03"
+    assert submission_deadline({"pre-bid meeting date": "02/03", "bid opening date": "21/03"}) == "21/03"
+    assert submission_deadline({"clarification date": "01/03"}) == "01/03"
+    assert submission_deadline(None) is None
+    assert submission_deadline({"Pre-bid Meeting": "02/03", "Bid Submission Deadline": "15/03"}) == "15/03"
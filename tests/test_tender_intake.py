@@ -0,0 +1,110 @@
+import threading
+import time
+
+import pytest
+
+from tender_intake import IntakeQueue, QueueFull, parse_deadline
+
+
+def write_tender(directory, name, tender_id, deadlines, body=""):
+    lines = [f"Tender No: {tender_id}", "Issued by: Ministry of Health"]
+    lines += [f"{label}: {date}" for label, date in deadlines.items()]
+    path = directory / name
+    path.write_text("\n".join(lines + [body]) + "\n", encoding="utf-8")
+    return str(path)
+
+
+@pytest.fixture
+def queue(tmp_path):
+    intake = IntakeQueue(str(tmp_path / "intake.sqlite3"), max_pending=3)
+    yield intake
+    intake.close()
+
+
+def test_same_bytes_are_a_duplicate(queue, tmp_path):
+    path = write_tender(tmp_path, "a.txt", "MOH-0001", {"Bid submission deadline": "15/03/2026"})
+    assert queue.submit(path)["status"] == "queued"
+    assert queue.submit(path)["status"] == "duplicate"
+
+
+def test_corrigendum_supersedes_waiting_job(queue, tmp_path):
+    original = write_tender(tmp_path, "a.txt", "MOH-0001", {"Bid submission deadline": "15/03/2026"})
+    corrigendum = write_tender(tmp_path, "b.txt", "MOH-0001", {"Bid submission deadline": "20/03/2026"}, "Corrigendum 1")
+    queue.submit(original)
+    assert queue.submit(corrigendum)["status"] == "superseded"
+    job = queue.claim()
+    assert (job["path"], job["version"]) == (corrigendum, 2)
+    assert queue.claim() is None
+
+
+def test_original_reposted_after_corrigendum_is_a_duplicate(queue, tmp_path):
+    original = write_tender(tmp_path, "a.txt", "MOH-0001", {"Bid submission deadline": "15/03/2026"})
+    corrigendum = write_tender(tmp_path, "b.txt", "MOH-0001", {"Bid submission deadline": "20/03/2026"}, "Corrigendum 1")
+    queue.submit(original)
+    queue.submit(corrigendum)
+    for _ in range(3):
+        assert queue.submit(original)["status"] == "duplicate"
+    job = queue.claim()
+    assert (job["path"], job["version"]) == (corrigendum, 2)
+    assert queue.depth()[0]["superseded"] == 1
+
+
+def test_jobs_are_claimed_by_submission_deadline(queue, tmp_path):
+    later = write_tender(tmp_path, "later.txt", "MOH-0001",
+                         {"Pre-bid meeting": "01/02/2026", "Bid submission deadline": "15/03/2026"})
+    sooner = write_tender(tmp_path, "sooner.txt", "MOH-0002", {"Closing date": "05/03/2026"})
+    queue.submit(later)
+    queue.submit(sooner)
+    assert [queue.claim()["tenderId"], queue.claim()["tenderId"]] == ["MOH-0002", "MOH-0001"]
+
+
+def test_other_deadline_labels_are_a_fallback(queue, tmp_path):
+    path = write_tender(tmp_path, "a.txt", "MOH-0001", {"Pre-bid meeting": "01/02/2026"})
+    queue.submit(path)
+    assert queue.claim()["deadline"] == parse_deadline("01/02/2026")
+
+
+def test_full_queue_pushes_back(queue, tmp_path):
+    for index in range(3):
+        queue.submit(write_tender(tmp_path, f"{index}.txt", f"MOH-000{index}", {"Closing date": "05/03/2026"}))
+    extra = write_tender(tmp_path, "extra.txt", "MOH-0009", {"Closing date": "05/03/2026"})
+    with pytest.raises(QueueFull):
+        queue.submit(extra, block=False)
+    assert queue.counters["rejected"] == 1
+
+
+def test_failed_job_is_retried_then_failed(queue, tmp_path):
+    queue.submit(write_tender(tmp_path, "a.txt", "MOH-0001", {"Closing date": "05/03/2026"}))
+    for attempt in range(1, 3):
+        job = queue.claim()
+        assert job["attempts"] == attempt
+        queue.finish(job["id"], RuntimeError("agent crashed"), max_attempts=2)
+    assert queue.claim() is None
+    assert queue.depth()[0]["failed"] == 1
+
+
+def submit_together(queue, paths):
+    results, threads = [], []
+    for path in paths:
+        thread = threading.Thread(target=lambda path=path: results.append(queue.submit(path, timeout=5)))
+        thread.start()
+        threads.append(thread)
+    time.sleep(0.2)
+    queue.finish(queue.claim()["id"])
+    for thread in threads:
+        thread.join(5)
+    return sorted(result["status"] for result in results)
+
+
+def test_blocked_submits_recheck_after_waking(tmp_path):
+    queue = IntakeQueue(str(tmp_path / "intake.sqlite3"), max_pending=2)
+    for index in range(2):
+        queue.submit(write_tender(tmp_path, f"{index}.txt", f"MOH-000{index}", {"Closing date": "05/03/2026"}))
+    same = write_tender(tmp_path, "same.txt", "MOH-0100", {"Closing date": "05/03/2026"})
+    assert submit_together(queue, [same, same]) == ["duplicate", "queued"]
+
+    first = write_tender(tmp_path, "first.txt", "MOH-0200", {"Closing date": "05/03/2026"})
+    second = write_tender(tmp_path, "second.txt", "MOH-0200", {"Closing date": "05/03/2026"}, body="Corrigendum 1")
+    assert submit_together(queue, [first, second]) == ["queued", "superseded"]
+    assert queue.depth()[0]["queued"] == 2
+    queue.close()
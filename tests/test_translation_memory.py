@@ -0,0 +1,53 @@
+import json
+import re
+
+from translation_memory import TranslationMemory, Translator, split_segments, transfer_numbers
+
+
+class FakeTransport:
+    """Translates by tagging each segment, and records how many segments it was sent."""
+
+    def __init__(self):
+        self.sent = []
+
+    def __call__(self, prompt, max_tokens):
+        rows = json.loads(re.search(r"\n\n(\[.*\])\n\n", prompt, re.DOTALL).group(1))
+        self.sent.extend(row["text"] for row in rows)
+        return "\n".join(json.dumps({"id": row["id"], "translation": f"FR {row['text']}"}) for row in rows)
+
+
+def test_transfer_numbers():
+    assert transfer_numbers("Supply 500 vials by 12/03", "Fournir 500 flacons avant le 12/03",
+                            "Supply 750 vials by 14/04") == "Fournir 750 flacons avant le 14/04"
+    assert transfer_numbers("Lot 5 of 5", "Lot 5 sur 5", "Lot 6 of 5") is None
+    assert transfer_numbers("Pack of 10", "Boîte de 10 (10 unités)", "Pack of 20") is None
+    assert transfer_numbers("Pack of 10", "Boîte de 10", "Pack of 10 and 2") is None
+
+
+def test_memory_exact_and_near_matches():
+    memory = TranslationMemory(":memory:")
+    memory.store("en>fr", {"Deliver 100 boxes.": "Livrer 100 boîtes."})
+    found = memory.lookup("en>fr", ["deliver  100 BOXES.", "Deliver 250 boxes.", "Deliver boxes."])
+    assert found == {"deliver  100 BOXES.": ("Livrer 100 boîtes.", "exact"),
+                     "Deliver 250 boxes.": ("Livrer 250 boîtes.", "near")}
+
+
+def test_translator_sends_number_variants_once():
+    transport = FakeTransport()
+    translator = Translator(TranslationMemory(":memory:"), transport=transport, concurrency=1)
+    text = "Line 1 quantity 100.\nLine 2 quantity 200.\nLine 3 quantity 300.\nDeliver to Tender No. 7 site."
+    translated, stats = translator.translate(text, "en", "fr")
+    assert transport.sent == ["Line 1 quantity 100.", "Deliver to Tender No. 7 site."]
+    assert translated.splitlines() == ["FR Line 1 quantity 100.", "FR Line 2 quantity 200.",
+                                       "FR Line 3 quantity 300.", "FR Deliver to Tender No. 7 site."]
+    assert stats["near"] == 2 and stats["translated"] == 2 and stats["failed"] == 0
+
+    _, again = translator.translate(text, "en", "fr")
+    assert (again["exact"], again["near"], again["batches"]) == (2, 2, 0)
+
+
+def test_segments_keep_abbreviations():
+    text = "Supply per Art. 5 and approx. 10 days. Delivery follows.\nSee ref. 12."
+    assert [segment for segment, _ in split_segments(text)] == [
+        "Supply per Art. 5 and approx. 10 days.", "Delivery follows.", "See ref. 12."]
+    assert "".join(segment + separator for segment, separator in split_segments(text)) == text
@@ -0,0 +1,265 @@
+"""Translation memory and segment batching for the Translation Agent.
+
+Documents are split into segments (lines and sentences).  Every segment is
+looked up in a persistent SQLite translation memory keyed by language pair
+and normalised text:
+
+* exact matches are reused as they are;
+* near matches, which differ only in numbers (quantities, dates, clause
+  numbers), reuse the stored translation with the new numbers put in.
+
+Only segments with no match go to the model.  They are deduplicated,
+packed into token-budgeted NDJSON batches and sent in parallel, so the
+cost of translating a tender grows with its new content, not its length::
+
+    from translation_memory import TranslationMemory, Translator
+
+    translator = Translator(TranslationMemory("tm.sqlite3"))
+    french, stats = translator.translate(text, "en", "fr")
+
+The memory keeps at most ``max_entries`` segments per file, evicting the
+least recently used.
+"""
+
+import concurrent.futures
+import json
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+
+from common import AnthropicTransport, PipelineError, RateLimitedTransport, estimate_tokens, parse_ndjson
+
+TM_MAX_ENTRIES = 500000
+TRANSLATE_TOKEN_BUDGET = 2000
+TRANSLATE_MAX_SEGMENTS = 60
+TRANSLATE_MAX_TOKENS = 8000
+TRANSLATE_CONCURRENCY = 4
+TRANSLATE_RETRIES = 1
+
+LANGUAGE_NAMES = {"en": "English", "fr": "French", "ar": "Arabic", "es": "Spanish", "pt": "Portuguese",
+                  "de": "German"}
+# A full stop after these does not end a sentence ("Tender No. 123", "approx. 5 days").
+ABBREVIATIONS = ("no", "nos", "cl", "art", "sec", "para", "ref", "fig", "vol", "approx", "e.g", "i.e", "viz", "vs",
+                 "incl", "min", "max", "qty", "dept", "mr", "mrs", "ms", "dr", "st")
+SEGMENT_PATTERN = re.compile(
+    r"(\s*\n\s*|" + "".join(rf"(?<!\b{re.escape(word)}\.)" for word in ABBREVIATIONS) + r"(?<=[.!?;؟۔])\s+)",
+    re.IGNORECASE,
+)
+NUMBER_PATTERN = re.compile(r"\d+(?:[.,/\-]\d+)*")
+
+TRANSLATE_PROMPT = (
+    "Translate each segment from {source} to {target} for a pharmaceutical tender. Keep numbers, codes, "
+    "units and product names unchanged. Return ONLY newline-delimited JSON with no preamble or markdown: "
+    "one JSON object per line, one line per segment, in the same order:"
+    '\n\n{rows}\n\nLine format: {{"id": 0, "translation": "..."}}'
+)
+
+
+def split_segments(text):
+    """Split text into ``[(segment, separator), ...]`` that joins back to ``text``."""
+    parts = SEGMENT_PATTERN.split(text)
+    pieces = []
+    for index in range(0, len(parts), 2):
+        separator = parts[index + 1] if index + 1 < len(parts) else ""
+        pieces.append((parts[index], separator))
+    return pieces
+
+
+def normalize_segment(segment):
+    text = unicodedata.normalize("NFKC", segment).casefold()
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def skeleton(key):
+    return NUMBER_PATTERN.sub("#", key)
+
+
+def transfer_numbers(source, target, new_source):
+    """Rewrite the numbers in ``target`` for ``new_source``; ``None`` if that is ambiguous."""
+    old, new = NUMBER_PATTERN.findall(source), NUMBER_PATTERN.findall(new_source)
+    if len(old) != len(new) or len(set(old)) != len(old):
+        return None
+    bounded = {number: rf"(?<![\d.,]){re.escape(number)}(?![\d]|[.,]\d)" for number in old}
+    if any(len(re.findall(bounded[number], target)) != 1 for number in old):
+        return None
+    mapping = dict(zip(old, new))
+    pattern = "|".join(bounded[number] for number in sorted(old, key=len, reverse=True))
+    return re.sub(pattern, lambda match: mapping[match.group(0)], target) if pattern else target
+
+
+class TranslationMemory:
+    """Segment translations in SQLite, keyed by language pair and normalised text.
+
+    Safe to share between threads; ``path`` may be ``":memory:"``.
+    """
+
+    def __init__(self, path="translation-memory.sqlite3", max_entries=TM_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS segments (
+                pair TEXT NOT NULL, key TEXT NOT NULL, skeleton TEXT NOT NULL,
+                source TEXT NOT NULL, target TEXT NOT NULL, used REAL NOT NULL,
+                PRIMARY KEY (pair, key));
+            CREATE INDEX IF NOT EXISTS segments_skeleton ON segments (pair, skeleton);
+            CREATE INDEX IF NOT EXISTS segments_used ON segments (used);
+        """)
+        self.connection.commit()
+
+    def lookup(self, pair, segments):
+        """Return ``{segment: (translation, "exact" | "near")}`` for every segment with a match."""
+        found, touched = {}, []
+        with self.lock:
+            for segment in segments:
+                key = normalize_segment(segment)
+                row = self.connection.execute("SELECT target FROM segments WHERE pair = ? AND key = ?",
+                                              (pair, key)).fetchone()
+                if row:
+                    found[segment] = (row[0], "exact")
+                    touched.append(key)
+                    continue
+                for stored_key, source, target in self.connection.execute(
+                        "SELECT key, source, target FROM segments WHERE pair = ? AND skeleton = ? LIMIT 5",
+                        (pair, skeleton(key))):
+                    reused = transfer_numbers(source, target, segment)
+                    if reused is not None:
+                        found[segment] = (reused, "near")
+                        touched.append(stored_key)
+                        break
+            if touched:
+                now = time.time()
+                self.connection.executemany("UPDATE segments SET used = ? WHERE pair = ? AND key = ?",
+                                            [(now, pair, key) for key in touched])
+                self.connection.commit()
+        return found
+
+    def store(self, pair, translations):
+        """Remember ``{source_segment: translation}`` and evict the least recently used overflow."""
+        now = time.time()
+        rows = [(pair, normalize_segment(source), skeleton(normalize_segment(source)), source, target, now)
+                for source, target in translations.items()]
+        with self.lock:
+            self.connection.executemany("INSERT OR REPLACE INTO segments VALUES (?, ?, ?, ?, ?, ?)", rows)
+            excess = self.connection.execute("SELECT COUNT(*) FROM segments").fetchone()[0] - self.max_entries
+            if excess > 0:
+                self.connection.execute("DELETE FROM segments WHERE rowid IN "
+                                        "(SELECT rowid FROM segments ORDER BY used LIMIT ?)", (excess,))
+            self.connection.commit()
+
+    def __len__(self):
+        with self.lock:
+            return self.connection.execute("SELECT COUNT(*) FROM segments").fetchone()[0]
+
+    def close(self):
+        self.connection.close()
+
+
+def pack_batches(segments, token_budget=TRANSLATE_TOKEN_BUDGET, max_segments=TRANSLATE_MAX_SEGMENTS):
+    """Group segments into batches under a token budget, keeping order."""
+    batches, batch, tokens = [], [], 0
+    for segment in segments:
+        cost = estimate_tokens(segment)
+        if batch and (tokens + cost > token_budget or len(batch) >= max_segments):
+            batches.append(batch)
+            batch, tokens = [], 0
+        batch.append(segment)
+        tokens += cost
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+class Translator:
+    """Translates documents through a ``TranslationMemory`` and the model.
+
+    ``transport`` is any ``callable(prompt, max_tokens) -> text``, as in
+    ``common``; the default is a rate-limited Anthropic client.
+    """
+
+    def __init__(self, memory, transport=None, concurrency=TRANSLATE_CONCURRENCY, retries=TRANSLATE_RETRIES):
+        self.memory = memory
+        self.transport = transport or RateLimitedTransport(AnthropicTransport())
+        self.concurrency = concurrency
+        self.retries = retries
+
+    def _translate_batch(self, batch, source, target):
+        rows = [{"id": index, "text": segment} for index, segment in enumerate(batch)]
+        prompt = TRANSLATE_PROMPT.format(source=LANGUAGE_NAMES.get(source, source),
+                                         target=LANGUAGE_NAMES.get(target, target), rows="{rows}")
+        parsed = parse_ndjson(self.transport(prompt.replace("{rows}", json.dumps(rows, ensure_ascii=False)),
+                                             TRANSLATE_MAX_TOKENS))
+        translations = {row.get("id"): row.get("translation") for row in parsed if isinstance(row, dict)}
+        if sorted(translations) != list(range(len(batch))) or not all(isinstance(t, str) for t in translations.values()):
+            raise PipelineError(f"expected {len(batch)} translations, got {len(translations)}")
+        return {segment: translations[index] for index, segment in enumerate(batch)}
+
+    def translate_segments(self, segments, source, target):
+        """Translate a list of segments; returns ``({segment: translation}, stats)``.
+
+        Unmatched segments that differ only in numbers are sent once; the
+        rest reuse that translation as near matches where the numbers can
+        be transferred unambiguously.
+        """
+        pair = f"{source}>{target}"
+        unique = list(dict.fromkeys(segment for segment in segments if segment.strip()))
+        found = self.memory.lookup(pair, unique)
+        translations = {segment: translation for segment, (translation, _) in found.items()}
+        stats = {"segments": len(segments), "unique": len(unique),
+                 "exact": sum(kind == "exact" for _, kind in found.values()),
+                 "near": sum(kind == "near" for _, kind in found.values()),
+                 "translated": 0, "batches": 0, "failed": 0}
+
+        by_key = {}
+        for segment in unique:
+            if segment not in translations:
+                by_key.setdefault(normalize_segment(segment), []).append(segment)
+        by_skeleton = {}
+        for key in by_key:
+            by_skeleton.setdefault(skeleton(key), []).append(key)
+        first = [keys[0] for keys in by_skeleton.values()]
+        rest = [key for keys in by_skeleton.values() for key in keys[1:]]
+
+        self._run_batches([by_key[key][0] for key in first], by_key, pair, source, target, translations, stats)
+        if rest:
+            derived = self.memory.lookup(pair, [by_key[key][0] for key in rest])
+            for segment, (translation, _) in derived.items():
+                for duplicate in by_key[normalize_segment(segment)]:
+                    translations[duplicate] = translation
+            stats["near"] += len(derived)
+            self._run_batches([by_key[key][0] for key in rest if by_key[key][0] not in derived], by_key, pair,
+                              source, target, translations, stats)
+        return translations, stats
+
+    def _run_batches(self, segments, by_key, pair, source, target, translations, stats):
+        pending = pack_batches(segments)
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            for _ in range(self.retries + 1):
+                if not pending:
+                    break
+                futures = {pool.submit(self._translate_batch, batch, source, target): batch for batch in pending}
+                stats["batches"] += len(futures)
+                pending = []
+                for future in concurrent.futures.as_completed(futures):
+                    if future.exception():
+                        pending.append(futures[future])
+                        continue
+                    fresh = future.result()
+                    self.memory.store(pair, fresh)
+                    for segment, translation in fresh.items():
+                        for duplicate in by_key[normalize_segment(segment)]:
+                            translations[duplicate] = translation
+                        stats["translated"] += 1
+        stats["failed"] += sum(len(batch) for batch in pending)
+
+    def translate(self, text, source, target):
+        """Translate a document, keeping its line and sentence layout.
+
+        Segments that could not be translated are left in the source
+        language and counted in ``stats["failed"]``.
+        """
+        pieces = split_segments(text)
+        translations, stats = self.translate_segments([segment for segment, _ in pieces], source, target)
+        return "".join(translations.get(segment, segment) + separator for segment, separator in pieces), stats